@@ -16,8 +16,10 @@ from pydantic import BaseModel, Field, validator
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core.database import get_db
 from app.core.logging_config import StructuredLogger
+from app.core.service_manager import ServiceManager, get_service_manager
 from app.models.chat import ChatSession
 from app.models.document import Document
 from app.models.schemas import (
@@ -31,12 +33,7 @@ from app.services.session_manager import SessionManager
 from app.services.input_validator import InputValidator, ValidationError
 from app.services.rate_limiter import RateLimiter
 from app.services.rag_service import RAGService
-from app.services.embedding_service import EmbeddingService
-from app.services.vector_store import ChromaVectorStore
-from app.services.deepseek_client import DeepSeekClient
-from app.services.response_cache import ResponseCache
 from app.services.document_summary import DocumentSummaryService
-from app.config import settings
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
@@ -632,6 +629,7 @@ async def send_message(
     session_id: str,
     request: SendMessageRequest,
     db: AsyncSession = Depends(get_db),
+    services: ServiceManager = Depends(get_service_manager),
 ):
     """Send a message and receive streaming response.
 
@@ -639,6 +637,7 @@ async def send_message(
         session_id: Session UUID
         request: Message and optional focus context
         db: Database session
+        services: Application-scoped service container
 
     Returns:
         StreamingResponse with SSE events (always, even for errors)
@@ -696,15 +695,16 @@ async def send_message(
         interrupted = False
 
         try:
-            # Initialize RAG service dependencies inside generator to catch errors
-            embedding_service = EmbeddingService(api_key=settings.voyage_api_key)
-            vector_store = ChromaVectorStore(persist_path=settings.chroma_path)
-            deepseek_client = DeepSeekClient(api_key=settings.deepseek_api_key)
-            response_cache = ResponseCache(max_size=100)
+            # Resolve shared services inside generator to catch errors
+            embedding_service = services.get_embedding_service()
+            vector_store = services.get_vector_store()
+            deepseek_client = services.get_deepseek_client()
+            response_cache = services.get_response_cache()
             document_summary_service = DocumentSummaryService(
                 deepseek_client=deepseek_client,
                 embedding_service=embedding_service,
                 db_session=db,
+                summary_index=services.get_summary_index(),
             )
 
             # Initialize RAG service
@@ -714,6 +714,11 @@ async def send_message(
                 deepseek_client=deepseek_client,
                 response_cache=response_cache,
                 document_summary_service=document_summary_service,
+                chunk_offset_index=services.get_chunk_offset_index(),
+                db_session=db,
+                lazy_hydration=(
+                    settings.rag_lazy_hydration or not vector_store.store_documents
+                ),
             )
 
             # Retrieve context
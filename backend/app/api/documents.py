@@ -3,20 +3,26 @@ Document upload and management API endpoints.
 Handles file uploads, URL ingestion, status tracking, and CRUD operations.
 """
 
+import hashlib
 import json
 import os
 import uuid
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional, Tuple
 
 import aiofiles
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 from fastapi.responses import Response
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.core.database import get_db
+from app.core.database import async_session, get_db
+from app.core.service_manager import (
+    ServiceManager,
+    get_service_manager,
+    service_manager,
+)
 from app.models.document import Chunk, Document
 from app.models.schemas import (
     DocumentDetail,
@@ -30,6 +36,7 @@ from app.models.schemas import (
     UploadResponse,
     UrlIngestionRequest,
 )
+from app.services.ingestion_queue import IngestionJob, IngestionQueue
 from app.services.task_manager import TaskManager
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
@@ -43,6 +50,14 @@ MIME_TO_TYPE = {
     "text/markdown": "md",
 }
 MAX_FILE_SIZE = settings.max_file_size_mb * 1024 * 1024  # Convert to bytes
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read per step while streaming an upload
+MULTIPART_OVERHEAD = 64 * 1024  # Allowance for multipart boundaries and headers
+
+# Leading bytes of the binary formats we accept
+MAGIC_BYTES = {b"%PDF-": "pdf", b"PK\x03\x04": "docx"}
+
+# Document statuses left behind when the server stops mid-ingestion
+INTERRUPTED_STATUSES = ("pending", "chunking", "embedding")
 
 task_manager = TaskManager()
 
@@ -77,14 +92,16 @@ task_manager = TaskManager()
     },
 )
 async def upload_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
 ) -> UploadResponse:
     """Upload a document for processing.
 
-    Accepts PDF, DOCX, TXT, MD files up to 10MB.
-    Returns task_id for status polling.
+    Accepts PDF, DOCX, TXT, MD files up to max_file_size_mb (10MB by
+    default). Requests whose Content-Length already exceeds the limit
+    are rejected by middleware before the body is received (see
+    oversized_upload()); the rest is copied to disk in chunks, so memory
+    use does not grow with the limit. Returns task_id for status polling.
     """
     # Validate file extension
     ext = os.path.splitext(file.filename or "")[1].lower()
@@ -98,33 +115,27 @@ async def upload_document(
             },
         )
 
-    # Read file content
-    content = await file.read()
+    # Reject early when the multipart parser already knows the size
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise _file_too_large()
 
-    # Validate file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail={
-                "error": "File too large",
-                "message": f"Maximum file size is {settings.max_file_size_mb}MB",
-                "max_size_bytes": MAX_FILE_SIZE,
-            },
-        )
-
-    # Generate task ID and save file
     task_id = str(uuid.uuid4())
-    filename = f"{task_id}_{file.filename}"
+    filename, file_type, file_size, content_hash = await _store_upload(
+        file, ext, task_id
+    )
     file_path = os.path.join(settings.upload_path, filename)
 
-    # Ensure upload directory exists
-    os.makedirs(settings.upload_path, exist_ok=True)
-
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
-
-    # Determine file type
-    file_type = MIME_TO_TYPE.get(file.content_type or "", ext[1:])
+    # Reuse a completed document with the same content, if any
+    source_result = await db.execute(
+        select(Document.id)
+        .where(
+            Document.content_hash == content_hash,
+            Document.processing_status == "complete",
+        )
+        .order_by(Document.upload_time)
+        .limit(1)
+    )
+    clone_from = source_result.scalar_one_or_none()
 
     # Create document record
     doc = Document(
@@ -132,7 +143,8 @@ async def upload_document(
         filename=filename,
         original_name=file.filename or "unknown",
         file_type=file_type,
-        file_size=len(content),
+        file_size=file_size,
+        content_hash=content_hash,
         upload_time=datetime.now(timezone.utc).isoformat(),
         processing_status="pending",
     )
@@ -142,12 +154,155 @@ async def upload_document(
     # Create task status
     task_manager.create_task(task_id, task_id)
 
-    # Queue background processing
-    background_tasks.add_task(process_document_task, task_id, file_path, file_type, db)
+    # Queue for processing by the ingestion workers
+    ingestion_queue.submit(
+        IngestionJob(
+            task_id=task_id,
+            source=file_path,
+            file_type=file_type,
+            file_size=file_size,
+            clone_from=clone_from,
+        )
+    )
 
     return UploadResponse(task_id=task_id, status="pending")
 
 
+async def _store_upload(
+    file: UploadFile, ext: str, task_id: str
+) -> Tuple[str, str, int, str]:
+    """Stream an upload into content-addressed storage.
+
+    Args:
+        file: Uploaded file with an allowed extension
+        ext: Lower-case file extension including the dot
+        task_id: Task identifier, used to name the partial file
+
+    Returns:
+        Tuple of (stored filename, file type, size in bytes, SHA-256 hex).
+
+    Raises:
+        HTTPException: 413 if too large, 415 if the content doesn't
+            match the extension.
+    """
+    # Ensure upload directory exists
+    os.makedirs(settings.upload_path, exist_ok=True)
+
+    # Stream to disk, enforcing the size limit and hashing as bytes arrive
+    temp_path = os.path.join(settings.upload_path, f"{task_id}.part")
+    file_size, content_hash, head = await _receive_upload(file, temp_path)
+
+    # Check the content matches the extension
+    sniffed = _sniff_file_type(head)
+    if sniffed == "text" and ext in (".txt", ".md"):
+        file_type = MIME_TO_TYPE.get(file.content_type or "", ext[1:])
+    elif sniffed == ext[1:]:
+        file_type = sniffed
+    else:
+        os.remove(temp_path)
+        raise HTTPException(
+            status_code=415,
+            detail={
+                "error": "Unsupported file type",
+                "message": "The file's contents don't match its extension",
+                "supported_extensions": list(ALLOWED_EXTENSIONS),
+            },
+        )
+
+    # Store content-addressed: identical uploads share one file. Renaming
+    # the finished file means a concurrent duplicate never reads a partial one
+    filename = f"{content_hash}{ext}"
+    file_path = os.path.join(settings.upload_path, filename)
+    if os.path.exists(file_path):
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, file_path)
+    return filename, file_type, file_size, content_hash
+
+
+async def _receive_upload(file: UploadFile, temp_path: str) -> Tuple[int, str, bytes]:
+    """Stream an upload to temp_path in UPLOAD_CHUNK_SIZE pieces.
+
+    Only one chunk is held in memory at a time; size and SHA-256 are
+    computed on the fly.
+
+    Returns:
+        Tuple of (size in bytes, SHA-256 hex digest, first chunk).
+
+    Raises:
+        HTTPException: 413 once the copied size exceeds MAX_FILE_SIZE;
+            the partial file is removed. Starlette has already received
+            the whole body by then, so this only catches uploads sent
+            without a usable Content-Length.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise _file_too_large()
+                if not head:
+                    head = chunk
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size, digest.hexdigest(), head
+
+
+def _sniff_file_type(head: bytes) -> str:
+    """Classify an upload from its first bytes.
+
+    Returns:
+        'pdf' or 'docx' for known magic bytes, 'text' for content without
+        NUL bytes, otherwise 'binary'.
+    """
+    for magic, file_type in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return file_type
+    return "binary" if b"\x00" in head else "text"
+
+
+def oversized_upload(request: Request) -> Optional[HTTPException]:
+    """Check an upload request's declared size before its body is read.
+
+    UploadFile is only available once Starlette has spooled the whole
+    multipart body, so this runs as middleware on the Content-Length
+    header. Requests without it (chunked) fall through to the check in
+    _receive_upload().
+
+    Returns:
+        The 413 error if the request is an upload whose Content-Length
+        exceeds MAX_FILE_SIZE plus MULTIPART_OVERHEAD, else None.
+    """
+    if request.method != "POST" or request.url.path != f"{router.prefix}/upload":
+        return None
+    try:
+        content_length = int(request.headers.get("content-length", ""))
+    except ValueError:
+        return None
+    if content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        return _file_too_large()
+    return None
+
+
+def _file_too_large() -> HTTPException:
+    """Build the 413 response for an upload over MAX_FILE_SIZE."""
+    return HTTPException(
+        status_code=413,
+        detail={
+            "error": "File too large",
+            "message": f"Maximum file size is {settings.max_file_size_mb}MB",
+            "max_size_bytes": MAX_FILE_SIZE,
+        },
+    )
+
+
 @router.post(
     "/url",
     response_model=UploadResponse,
@@ -170,7 +325,6 @@ async def upload_document(
 )
 async def ingest_url(
     request: UrlIngestionRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ) -> UploadResponse:
     """Ingest content from a URL.
@@ -196,8 +350,10 @@ async def ingest_url(
     # Create task status
     task_manager.create_task(task_id, task_id)
 
-    # Queue background processing
-    background_tasks.add_task(process_url_task, task_id, request.url, db)
+    # Queue for processing by the ingestion workers
+    ingestion_queue.submit(
+        IngestionJob(task_id=task_id, source=request.url, file_type="url")
+    )
 
     return UploadResponse(task_id=task_id, status="pending")
 
@@ -230,14 +386,20 @@ async def ingest_url(
     },
 )
 async def get_task_status(task_id: str) -> TaskStatusResponse:
-    """Get processing status for an upload task."""
+    """Get processing status for an upload task.
+
+    While the task waits for an ingestion worker, queue_position is its
+    1-based place in the queue (1 = next); otherwise it is None.
+    """
     task = task_manager.get_task(task_id)
     if not task:
         raise HTTPException(
             status_code=404,
             detail={"error": "Not found", "message": "No upload found with this ID"},
         )
-    return TaskStatusResponse(**task.to_dict())
+    return TaskStatusResponse(
+        **task.to_dict(), queue_position=ingestion_queue.position(task_id)
+    )
 
 
 # =============================================================================
@@ -393,7 +555,9 @@ async def get_document(
     },
 )
 async def delete_document(
-    document_id: str, db: AsyncSession = Depends(get_db)
+    document_id: str,
+    db: AsyncSession = Depends(get_db),
+    services: ServiceManager = Depends(get_service_manager),
 ) -> Response:
     """Delete a document and all associated data.
 
@@ -401,7 +565,7 @@ async def delete_document(
     - Document record from SQLite
     - All chunk records from SQLite (via cascade)
     - Embeddings from ChromaDB
-    - Uploaded file from disk
+    - Uploaded file from disk, unless another document shares its content
     """
     # Get document
     result = await db.execute(select(Document).where(Document.id == document_id))
@@ -415,19 +579,18 @@ async def delete_document(
 
     try:
         # Delete from vector store
-        from app.services.vector_store import ChromaVectorStore
+        vector_store = services.get_vector_store()
+        await vector_store.adelete_by_document(document_id)
 
-        vector_store = ChromaVectorStore(settings.chroma_path)
-        vector_store.delete_by_document(document_id)
-
-        # Delete uploaded file
-        file_path = os.path.join(settings.upload_path, doc.filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Delete uploaded file once no other document references it
+        await _remove_unshared_upload(doc.filename, document_id, db)
 
         # Delete from database (chunks cascade)
         await db.delete(doc)
         await db.commit()
+        services.get_chunk_offset_index().invalidate(document_id)
+        services.get_summary_index().invalidate()
+        services.get_response_cache().invalidate_document(document_id)
 
         # Remove task status
         task_manager.delete_task(document_id)
@@ -445,252 +608,383 @@ async def delete_document(
         ) from e
 
 
-# =============================================================================
-# Background Tasks
-# =============================================================================
+@router.post(
+    "/{document_id}/reingest",
+    response_model=UploadResponse,
+    summary="Re-ingest Document",
+    description="Re-process an existing document: re-fetch its URL, or replace its file with a new upload. Only chunks whose content changed are re-embedded.",
+    responses={
+        200: {"description": "Re-ingestion queued"},
+        404: {"model": ErrorResponse, "description": "Document not found"},
+        409: {
+            "model": ErrorResponse,
+            "description": "Document is still being processed",
+        },
+        413: {"model": ErrorResponse, "description": "File too large"},
+        415: {"model": ErrorResponse, "description": "Unsupported file type"},
+    },
+)
+async def reingest_document(
+    document_id: str,
+    file: Optional[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_db),
+) -> UploadResponse:
+    """Re-ingest an existing document incrementally.
 
+    URL documents are fetched again; file documents are reconverted from
+    the new upload if one is given, else from the stored file. Stored
+    chunks are diffed against the new chunking by content hash, so
+    unchanged chunks keep their embeddings. The task ID is the document ID.
+    """
+    result = await db.execute(select(Document).where(Document.id == document_id))
+    doc = result.scalar_one_or_none()
+    if not doc:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "Not found", "message": "Document not found"},
+        )
+    if doc.processing_status not in ("complete", "error"):
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "error": "Busy",
+                "message": "This document is still being processed",
+            },
+        )
 
-async def process_document_task(
-    task_id: str, file_path: str, file_type: str, db: AsyncSession
-) -> None:
-    """Background task for processing uploaded documents.
+    if doc.file_type == "url":
+        source = doc.original_name
+    else:
+        if file is not None:
+            ext = os.path.splitext(file.filename or "")[1].lower()
+            if ext not in ALLOWED_EXTENSIONS:
+                raise HTTPException(
+                    status_code=415,
+                    detail={
+                        "error": "Unsupported file type",
+                        "message": "Supported formats: PDF, DOCX, TXT, MD",
+                        "supported_extensions": list(ALLOWED_EXTENSIONS),
+                    },
+                )
+            filename, file_type, file_size, content_hash = await _store_upload(
+                file, ext, str(uuid.uuid4())
+            )
+            if filename != doc.filename:
+                await _remove_unshared_upload(doc.filename, document_id, db)
+            doc.filename = filename
+            doc.original_name = file.filename or doc.original_name
+            doc.file_type = file_type
+            doc.file_size = file_size
+            doc.content_hash = content_hash
+        source = os.path.join(settings.upload_path, doc.filename)
+
+    doc.processing_status = "pending"
+    doc.error_message = None
+    await db.commit()
 
-    Orchestrates: convert → chunk → embed → store
-    Updates status at each stage via TaskManager.
-    """
-    from app.services.chunk_service import ChunkService, ChunkingError
-    from app.services.document_processor import (
-        DocumentProcessor,
-        ProcessingError,
+    task_manager.create_task(document_id, document_id)
+    ingestion_queue.submit(
+        IngestionJob(
+            task_id=document_id,
+            source=source,
+            file_type=doc.file_type,
+            file_size=doc.file_size,
+            reingest=True,
+        )
     )
-    from app.services.embedding_service import EmbeddingError, EmbeddingService
-    from app.services.task_manager import ProcessingStatus
-    from app.services.vector_store import ChromaVectorStore, VectorStoreError
 
-    try:
-        # Stage 1: Convert document to markdown
-        task_manager.update_status(task_id, ProcessingStatus.CONVERTING)
+    return UploadResponse(task_id=document_id, status="pending")
 
-        processor = DocumentProcessor()
-        result = await processor.process_file(file_path, file_type)
 
-        # Update document with markdown content
-        doc_result = await db.execute(select(Document).where(Document.id == task_id))
-        doc = doc_result.scalar_one()
-        doc.markdown_content = result.markdown
-        doc.doc_metadata = json.dumps(
-            {"title": result.title, "detected_language": result.detected_language}
+async def _remove_unshared_upload(
+    filename: str, document_id: str, db: AsyncSession
+) -> None:
+    """Delete an uploaded file unless another document still references it."""
+    shared = await db.execute(
+        select(func.count(Document.id)).where(
+            Document.filename == filename, Document.id != document_id
         )
-        doc.processing_status = "chunking"
-        await db.commit()
+    )
+    file_path = os.path.join(settings.upload_path, filename)
+    if not shared.scalar_one() and os.path.exists(file_path):
+        os.remove(file_path)
 
-        # Stage 2: Chunk the document
-        task_manager.update_status(task_id, ProcessingStatus.CHUNKING)
 
-        chunk_service = ChunkService()
-        chunks = chunk_service.chunk_document(result.markdown)
+# =============================================================================
+# Background Tasks
+# =============================================================================
 
-        if not chunks:
-            raise ChunkingError("This document appears to be empty.")
 
-        # Save chunks to database
-        for chunk in chunks:
-            chunk_record = Chunk(
-                id=str(uuid.uuid4()),
-                document_id=task_id,
-                chunk_index=chunk.index,
-                content=chunk.content,
-                token_count=chunk.token_count,
-                chunk_metadata=json.dumps(
-                    {"start_char": chunk.start_char, "end_char": chunk.end_char}
-                ),
-            )
-            db.add(chunk_record)
+async def process_ingestion_job(job: IngestionJob) -> None:
+    """Ingestion engine shared by file uploads and URL ingestion.
 
-        doc.processing_status = "embedding"
-        await db.commit()
+    Orchestrates: convert (file or URL) → chunk → embed → store
+    Runs on an IngestionQueue worker with its own database session and
+    updates status at each stage via TaskManager.
+    """
+    from app.services.chunk_service import ChunkingError
+    from app.services.document_processor import (
+        DocumentProcessor,
+        ProcessingError,
+    )
+    from app.services.embedding_service import EmbeddingError
+    from app.services.task_manager import ProcessingStatus
+    from app.services.vector_store import VectorStoreError
 
-        # Stage 3: Generate embeddings
-        if not settings.voyage_api_key:
-            # Skip embedding if no API key
-            doc.processing_status = "complete"
+    task_id = job.task_id
+    async with async_session() as db:
+        try:
+            # Identical content already processed: copy instead of converting
+            if job.clone_from and await _clone_document(task_id, job.clone_from, db):
+                return
+
+            # Interrupted after conversion: re-chunk the stored markdown and
+            # embed only chunks without a vector_stored checkpoint
+            if job.resume:
+                doc_result = await db.execute(
+                    select(Document).where(Document.id == task_id)
+                )
+                doc = doc_result.scalar_one()
+                if doc.markdown_content is not None:
+                    await _ingest_markdown(
+                        task_id, doc, doc.markdown_content, db, incremental=True
+                    )
+                    return
+
+            # Stage 1: Convert document (or fetched URL) to markdown
+            task_manager.update_status(task_id, ProcessingStatus.CONVERTING)
+
+            processor = DocumentProcessor(
+                conversion_pool=service_manager.get_conversion_pool(),
+                split_min_pages=settings.conversion_split_min_pages,
+                page_batch_size=settings.conversion_page_batch_size,
+            )
+            if job.file_type == "url":
+                result = await processor.process_url(job.source)
+            else:
+                result = await processor.process_file(
+                    job.source,
+                    job.file_type,
+                    on_progress=lambda done, total: (
+                        task_manager.update_conversion_progress(task_id, done, total)
+                    ),
+                )
+
+            # Update document with markdown content
+            doc_result = await db.execute(
+                select(Document).where(Document.id == task_id)
+            )
+            doc = doc_result.scalar_one()
+            doc.markdown_content = result.markdown
+            doc.doc_metadata = json.dumps(
+                {
+                    "title": result.title,
+                    "detected_language": result.detected_language,
+                    "conversion": result.conversion,
+                }
+            )
+            doc.processing_status = "chunking"
             await db.commit()
-            task_manager.update_status(task_id, ProcessingStatus.COMPLETE)
-            return
 
-        embedding_service = EmbeddingService(settings.voyage_api_key)
+            # Stages 2-4: Chunk, embed and store, streamed batch by batch
+            await _ingest_markdown(
+                task_id, doc, result.markdown, db, incremental=job.reingest
+            )
+
+        except ProcessingError as e:
+            await _handle_processing_error(task_id, str(e), db)
+        except ChunkingError as e:
+            await _handle_processing_error(task_id, str(e), db)
+        except EmbeddingError as e:
+            await _handle_processing_error(task_id, str(e), db)
+        except VectorStoreError as e:
+            await _handle_processing_error(
+                task_id, "Database error. Please try again.", db
+            )
+        except Exception as e:
+            await _handle_processing_error(
+                task_id, "Something went wrong. Please try again.", db
+            )
 
-        # Get all chunks for embedding
-        chunk_result = await db.execute(
-            select(Chunk)
-            .where(Chunk.document_id == task_id)
-            .order_by(Chunk.chunk_index)
-        )
-        chunk_records = chunk_result.scalars().all()
 
-        total_chunks = len(chunk_records)
-        chunk_texts = [c.content for c in chunk_records]
-        chunk_ids = [c.id for c in chunk_records]
+async def _clone_document(task_id: str, source_id: str, db: AsyncSession) -> bool:
+    """Copy a completed document's markdown, chunks and vectors to task_id.
 
-        # Update progress during embedding
-        for i in range(0, total_chunks, 10):
-            task_manager.update_embedding_progress(
-                task_id, min(i + 10, total_chunks), total_chunks
-            )
+    Used for uploads whose content hash matches an already processed
+    document, so neither Docling nor the embedding API is called again.
+    Chunk rows and vectors get fresh ids under the new document.
 
-        embeddings = await embedding_service.embed_documents(chunk_texts)
+    Returns:
+        True if cloned; False if the source is gone or incomplete (e.g.
+        deleted meanwhile, or missing vectors), so the caller should
+        process the upload normally.
+    """
+    from app.services.ingestion_pipeline import (
+        insert_chunk_rows,
+        mark_vectors_stored,
+    )
+    from app.services.task_manager import ProcessingStatus
 
-        # Stage 4: Store in vector database
-        vector_store = ChromaVectorStore(settings.chroma_path)
-        metadatas = [
-            {"document_id": task_id, "chunk_index": c.chunk_index}
-            for c in chunk_records
-        ]
+    source_result = await db.execute(select(Document).where(Document.id == source_id))
+    source = source_result.scalar_one_or_none()
+    if (
+        source is None
+        or source.processing_status != "complete"
+        or source.markdown_content is None
+    ):
+        return False
+
+    chunk_result = await db.execute(
+        select(Chunk).where(Chunk.document_id == source_id).order_by(Chunk.chunk_index)
+    )
+    source_chunks = chunk_result.scalars().all()
+    if not source_chunks:
+        return False
+    new_ids = {chunk.id: str(uuid.uuid4()) for chunk in source_chunks}
+
+    # Read vectors before writing anything, so an incomplete source can
+    # still fall back to full processing
+    vector_store = None
+    vectors = None
+    if settings.voyage_api_key:
+        vector_store = service_manager.get_vector_store()
+        vectors = await vector_store.aget_document_vectors(source_id)
+        if set(vectors.ids) != set(new_ids):
+            return False
+
+    await insert_chunk_rows(
+        db,
+        [
+            {
+                "id": new_ids[chunk.id],
+                "document_id": task_id,
+                "chunk_index": chunk.chunk_index,
+                "content": chunk.content,
+                "token_count": chunk.token_count,
+                "start_char": chunk.start_char,
+                "end_char": chunk.end_char,
+                "chunk_metadata": chunk.chunk_metadata,
+                "vector_stored": False,
+            }
+            for chunk in source_chunks
+        ],
+    )
 
-        vector_store.add(
-            ids=chunk_ids,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            documents=chunk_texts,
+    if vectors is not None:
+        await vector_store.aupsert(
+            ids=[new_ids[vector_id] for vector_id in vectors.ids],
+            embeddings=vectors.embeddings,
+            metadatas=[{**meta, "document_id": task_id} for meta in vectors.metadatas],
+            documents=vectors.documents,
         )
+        # Checkpoint only once the vectors are actually stored
+        await mark_vectors_stored(db, list(new_ids.values()))
+
+    doc_result = await db.execute(select(Document).where(Document.id == task_id))
+    doc = doc_result.scalar_one()
+    metadata = json.loads(source.doc_metadata) if source.doc_metadata else {}
+    metadata["duplicate_of"] = source_id
+    doc.markdown_content = source.markdown_content
+    doc.doc_metadata = json.dumps(metadata)
+    doc.processing_status = "complete"
+    await db.commit()
+    task_manager.update_status(task_id, ProcessingStatus.COMPLETE)
+    return True
 
-        # Mark complete
-        doc.processing_status = "complete"
-        await db.commit()
-        task_manager.update_status(task_id, ProcessingStatus.COMPLETE)
-
-    except ProcessingError as e:
-        await _handle_processing_error(task_id, str(e), db)
-    except ChunkingError as e:
-        await _handle_processing_error(task_id, str(e), db)
-    except EmbeddingError as e:
-        await _handle_processing_error(task_id, str(e), db)
-    except VectorStoreError as e:
-        await _handle_processing_error(task_id, "Database error. Please try again.", db)
-    except Exception as e:
-        await _handle_processing_error(
-            task_id, "Something went wrong. Please try again.", db
-        )
 
+async def _ingest_markdown(
+    task_id: str,
+    doc: Document,
+    markdown: str,
+    db: AsyncSession,
+    incremental: bool = False,
+) -> None:
+    """Chunk converted markdown and stream it into SQLite and the vector store.
 
-async def process_url_task(task_id: str, url: str, db: AsyncSession) -> None:
-    """Background task for processing URL content.
+    Chunks are produced in a worker thread and flow through
+    IngestionPipeline, so embedding starts with the first batch and each
+    embedded batch is searchable as soon as it is written. With
+    incremental=True the document's existing chunks are diffed against
+    the new ones and only changed chunks are embedded.
 
-    Orchestrates: fetch → convert → chunk → embed → store
+    Raises:
+        ChunkingError: If the document has no content.
     """
     from app.services.chunk_service import ChunkService, ChunkingError
-    from app.services.document_processor import (
-        DocumentProcessor,
-        ProcessingError,
-    )
-    from app.services.embedding_service import EmbeddingError, EmbeddingService
+    from app.services.ingestion_pipeline import IngestionPipeline
     from app.services.task_manager import ProcessingStatus
-    from app.services.vector_store import ChromaVectorStore, VectorStoreError
-
-    try:
-        # Stage 1: Fetch and convert URL to markdown
-        task_manager.update_status(task_id, ProcessingStatus.CONVERTING)
-
-        processor = DocumentProcessor()
-        result = await processor.process_url(url)
-
-        # Update document with markdown content
-        doc_result = await db.execute(select(Document).where(Document.id == task_id))
-        doc = doc_result.scalar_one()
-        doc.markdown_content = result.markdown
-        doc.doc_metadata = json.dumps(
-            {"title": result.title, "detected_language": result.detected_language}
-        )
-        doc.processing_status = "chunking"
-        await db.commit()
 
-        # Stage 2: Chunk the document
-        task_manager.update_status(task_id, ProcessingStatus.CHUNKING)
-
-        chunk_service = ChunkService()
-        chunks = chunk_service.chunk_document(result.markdown)
+    task_manager.update_status(task_id, ProcessingStatus.CHUNKING)
 
+    # Chunking runs off the event loop; chunks stream into the pipeline
+    chunks = ChunkService().aiter_chunks(markdown)
+    if incremental:
+        chunks = [chunk async for chunk in chunks]
         if not chunks:
             raise ChunkingError("This document appears to be empty.")
 
-        # Save chunks to database
-        for chunk in chunks:
-            chunk_record = Chunk(
-                id=str(uuid.uuid4()),
-                document_id=task_id,
-                chunk_index=chunk.index,
-                content=chunk.content,
-                token_count=chunk.token_count,
-                chunk_metadata=json.dumps(
-                    {"start_char": chunk.start_char, "end_char": chunk.end_char}
-                ),
-            )
-            db.add(chunk_record)
-
+    embedding_service = None
+    vector_store = None
+    if settings.voyage_api_key:
+        embedding_service = service_manager.get_embedding_service()
+        vector_store = service_manager.get_vector_store()
         doc.processing_status = "embedding"
-        await db.commit()
-
-        # Stage 3: Generate embeddings
-        if not settings.voyage_api_key:
-            # Skip embedding if no API key
-            doc.processing_status = "complete"
-            await db.commit()
-            task_manager.update_status(task_id, ProcessingStatus.COMPLETE)
-            return
+        task_manager.update_embedding_progress(task_id, 0, None)
 
-        embedding_service = EmbeddingService(settings.voyage_api_key)
-
-        # Get all chunks for embedding
-        chunk_result = await db.execute(
-            select(Chunk)
-            .where(Chunk.document_id == task_id)
-            .order_by(Chunk.chunk_index)
-        )
-        chunk_records = chunk_result.scalars().all()
+    pipeline = IngestionPipeline(
+        db=db,
+        task_manager=task_manager,
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+    )
+    if incremental:
+        await pipeline.reingest(task_id, doc.id, chunks)
+    else:
+        await pipeline.run(task_id, doc.id, chunks)
 
-        total_chunks = len(chunk_records)
-        chunk_texts = [c.content for c in chunk_records]
-        chunk_ids = [c.id for c in chunk_records]
+    # Mark complete (embedding is skipped without an API key)
+    doc.processing_status = "complete"
+    await db.commit()
+    service_manager.get_chunk_offset_index().invalidate(doc.id)
+    task_manager.update_status(task_id, ProcessingStatus.COMPLETE)
 
-        # Update progress during embedding
-        for i in range(0, total_chunks, 10):
-            task_manager.update_embedding_progress(
-                task_id, min(i + 10, total_chunks), total_chunks
-            )
 
-        embeddings = await embedding_service.embed_documents(chunk_texts)
+async def resume_interrupted_ingestion() -> int:
+    """Requeue documents whose ingestion was cut short by a restart.
 
-        # Stage 4: Store in vector database
-        vector_store = ChromaVectorStore(settings.chroma_path)
-        metadatas = [
-            {"document_id": task_id, "chunk_index": c.chunk_index}
-            for c in chunk_records
-        ]
+    Queued jobs live only in memory, so documents still pending, chunking
+    or embedding at startup are submitted again as incremental jobs.
+    Converted documents skip conversion, and chunks already checkpointed
+    as vector_stored are not embedded again.
 
-        vector_store.add(
-            ids=chunk_ids,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            documents=chunk_texts,
+    Returns:
+        Number of documents requeued
+    """
+    async with async_session() as db:
+        result = await db.execute(
+            select(Document).where(
+                Document.processing_status.in_(INTERRUPTED_STATUSES)
+            )
         )
-
-        # Mark complete
-        doc.processing_status = "complete"
-        await db.commit()
-        task_manager.update_status(task_id, ProcessingStatus.COMPLETE)
-
-    except ProcessingError as e:
-        await _handle_processing_error(task_id, str(e), db)
-    except ChunkingError as e:
-        await _handle_processing_error(task_id, str(e), db)
-    except EmbeddingError as e:
-        await _handle_processing_error(task_id, str(e), db)
-    except VectorStoreError as e:
-        await _handle_processing_error(task_id, "Database error. Please try again.", db)
-    except Exception as e:
-        await _handle_processing_error(
-            task_id, "Something went wrong. Please try again.", db
+        docs = result.scalars().all()
+
+    for doc in docs:
+        if doc.file_type == "url":
+            source = doc.original_name
+        else:
+            source = os.path.join(settings.upload_path, doc.filename)
+        task_manager.create_task(doc.id, doc.id)
+        ingestion_queue.submit(
+            IngestionJob(
+                task_id=doc.id,
+                source=source,
+                file_type=doc.file_type,
+                file_size=doc.file_size,
+                reingest=True,
+                resume=True,
+            )
         )
+    return len(docs)
 
 
 async def _handle_processing_error(
@@ -700,6 +994,9 @@ async def _handle_processing_error(
     from app.services.task_manager import ProcessingStatus
 
     try:
+        # Discard uncommitted work from the failed stage before recording
+        # the error, so it is not committed along with the status
+        await db.rollback()
         doc_result = await db.execute(select(Document).where(Document.id == task_id))
         doc = doc_result.scalar_one_or_none()
         if doc:
@@ -710,3 +1007,9 @@ async def _handle_processing_error(
         pass  # Best effort
 
     task_manager.update_status(task_id, ProcessingStatus.ERROR, error=error_message)
+
+
+# Worker pool shared by file uploads and URL ingestion
+ingestion_queue = IngestionQueue(
+    handler=process_ingestion_job, worker_count=settings.ingestion_workers
+)
@@ -42,6 +42,31 @@ class Settings(BaseSettings):
     upload_path: str = "./data/uploads"
     max_file_size_mb: int = 10
 
+    # Ingestion Configuration
+    ingestion_workers: int = Field(default=2)  # Concurrent ingestion jobs
+    conversion_workers: int = Field(default=2)  # Docling processes (0 = in-process)
+    conversion_timeout_seconds: int = Field(default=300)  # Per-document limit
+    conversion_memory_limit_mb: int = Field(default=0)  # Per-worker limit (0 = none)
+    conversion_max_jobs_per_worker: int = Field(default=50)  # Recycle workers after
+    conversion_split_min_pages: int = Field(default=100)  # Split PDFs from this size
+    conversion_page_batch_size: int = Field(default=40)  # Pages per parallel job
+
+    # Vector Store Configuration
+    vector_store_backend: str = Field(default="chroma")  # "chroma" or "numpy"
+    vector_store_max_workers: int = Field(default=4)  # Dedicated executor threads
+    vector_store_documents: bool = Field(default=True)  # Chroma: duplicate chunk text
+    vector_search_dimensions: int = Field(default=0)  # First-pass dims (0 = full)
+    chroma_rescore_factor: int = Field(default=4)  # Reduced-dim shortlist per result
+    chroma_hnsw_m: Optional[int] = Field(default=None)  # Graph degree (unset = default)
+    chroma_hnsw_construction_ef: Optional[int] = Field(default=None)  # Build beam width
+    chroma_hnsw_search_ef: Optional[int] = Field(default=None)  # Query beam width
+    numpy_index_path: str = "./data/numpy_index"
+    numpy_ivf_lists: int = Field(default=0)  # IVF partitions (0 = flat index)
+    numpy_ivf_probes: int = Field(default=8)  # Partitions scanned per query
+    numpy_ivf_min_rows: int = Field(default=20000)  # Use IVF above this size
+    numpy_quantization: str = Field(default="none")  # "none", "float16" or "int8"
+    numpy_rescore_factor: int = Field(default=4)  # Shortlist per result to rescore
+
     # API Keys (required for full functionality)
     voyage_api_key: Optional[str] = Field(default=None, alias="VOYAGE_API_KEY")
     deepseek_api_key: Optional[str] = Field(default=None, alias="DEEPSEEK_API_KEY")
@@ -57,12 +82,21 @@ class Settings(BaseSettings):
     # Context Configuration
     max_context_tokens: int = Field(default=120000)  # Leave 8K for response
     similarity_threshold: float = Field(default=0.7)
+    rag_lazy_hydration: bool = Field(default=True)  # Chunk text from SQLite
     focus_boost_amount: float = Field(default=0.2)
     top_k_chunks: int = Field(default=10)
 
     # Caching Configuration
     response_cache_max_size: int = Field(default=1000)
     response_cache_ttl_seconds: int = Field(default=3600)
+    embedding_cache_max_mb: int = Field(default=256)  # In-memory vector budget
+    embedding_cache_path: str = "./data/embedding_cache.db"  # Empty = memory only
+    embedding_cache_max_disk_entries: int = Field(default=200000)
+
+    # Embedding Batching
+    embedding_max_batch_size: int = Field(default=128)  # Texts per Voyage request
+    embedding_max_batch_tokens: int = Field(default=100000)  # Tokens per request
+    embedding_dimensions: int = Field(default=1024)  # Voyage output dimension
 
     # Rate Limiting
     rate_limit_queries_per_hour: int = Field(default=100)
@@ -115,6 +149,8 @@ class Settings(BaseSettings):
     def ensure_directories(self) -> None:
         """Create required directories if they don't exist."""
         os.makedirs(self.chroma_path, exist_ok=True)
+        if self.vector_store_backend == "numpy":
+            os.makedirs(self.numpy_index_path, exist_ok=True)
         os.makedirs(self.upload_path, exist_ok=True)
         db_path = self.database_url.replace("sqlite:///", "")
         db_dir = os.path.dirname(db_path)
@@ -129,6 +165,7 @@ class Settings(BaseSettings):
         logger.info(f"DEBUG: {self.debug}")
         logger.info(f"DATABASE_URL: {self.database_url}")
         logger.info(f"CHROMA_PATH: {self.chroma_path}")
+        logger.info(f"VECTOR_STORE_BACKEND: {self.vector_store_backend}")
         logger.info(f"UPLOAD_PATH: {self.upload_path}")
         logger.info(
             f"VOYAGE_API_KEY: {'configured' if self.voyage_api_key else 'NOT SET'}"
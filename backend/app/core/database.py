@@ -6,7 +6,7 @@ Implements async SQLite with aiosqlite and SQLAlchemy.
 import os
 from typing import AsyncGenerator
 
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -62,6 +62,50 @@ async def init_db() -> None:
         await conn.execute(text("PRAGMA foreign_keys=ON"))
         # Create tables
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+
+
+# Statements filling a newly added column from data already in the row
+_BACKFILLS = {
+    ("chunks", "start_char"): (
+        "UPDATE chunks SET "
+        "start_char = json_extract(chunk_metadata, '$.start_char'), "
+        "end_char = json_extract(chunk_metadata, '$.end_char') "
+        "WHERE chunk_metadata IS NOT NULL AND json_valid(chunk_metadata)"
+    ),
+    ("chunks", "vector_stored"): (
+        "UPDATE chunks SET vector_stored = 1 WHERE document_id IN "
+        "(SELECT id FROM documents WHERE processing_status = 'complete')"
+    ),
+}
+
+
+def _add_missing_columns(sync_conn) -> None:
+    """Add columns introduced after a table was first created.
+
+    create_all() never alters existing tables, so nullable columns added
+    to a model later are created here with ALTER TABLE, along with any
+    indexes on them. Columns listed in _BACKFILLS are then populated
+    from existing data.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        for column in missing:
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            )
+        if missing:
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+        for column in missing:
+            backfill = _BACKFILLS.get((table.name, column.name))
+            if backfill:
+                sync_conn.execute(text(backfill))
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -0,0 +1,266 @@
+"""
+Application-scoped service container for Iubar backend.
+Shares expensive clients (Voyage AI, vector store, DeepSeek, Docling
+workers) across requests and shuts them down cleanly when the
+application stops.
+"""
+
+import threading
+from typing import Optional
+
+from app.config import settings
+from app.core.logging_config import StructuredLogger
+from app.services.chunk_offset_index import ChunkOffsetIndex
+from app.services.conversion_pool import ConversionPool
+from app.services.deepseek_client import DeepSeekClient
+from app.services.document_summary import SummaryIndex
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import EmbeddingService
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services.response_cache import ResponseCache
+from app.services.vector_store import ChromaVectorStore, VectorStoreInterface
+
+logger = StructuredLogger(__name__)
+
+
+class ServiceManager:
+    """Lifecycle-managed registry of shared service instances.
+
+    Services are created lazily on first use, so request handlers keep
+    working when startup hooks have not run (e.g. TestClient without
+    lifespan). startup() pre-warms everything that can be built from the
+    current configuration; shutdown() releases executors and HTTP pools.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty service registry."""
+        self._lock = threading.Lock()
+        self._embedding_service: Optional[EmbeddingService] = None
+        self._vector_store: Optional[VectorStoreInterface] = None
+        self._deepseek_client: Optional[DeepSeekClient] = None
+        self._response_cache: Optional[ResponseCache] = None
+        self._summary_index: Optional[SummaryIndex] = None
+        self._chunk_offset_index: Optional[ChunkOffsetIndex] = None
+        self._conversion_pool: Optional[ConversionPool] = None
+
+    def get_embedding_service(self) -> EmbeddingService:
+        """Get or create the shared EmbeddingService.
+
+        Raises:
+            ValueError: If VOYAGE_API_KEY is not configured.
+        """
+        if self._embedding_service is None:
+            with self._lock:
+                if self._embedding_service is None:
+                    self._embedding_service = EmbeddingService(
+                        api_key=settings.voyage_api_key,
+                        cache=EmbeddingCache(
+                            max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+                            persist_path=settings.embedding_cache_path or None,
+                            max_disk_entries=settings.embedding_cache_max_disk_entries,
+                        ),
+                        max_batch_size=settings.embedding_max_batch_size,
+                        max_batch_tokens=settings.embedding_max_batch_tokens,
+                        dimensions=settings.embedding_dimensions,
+                    )
+        return self._embedding_service
+
+    def get_vector_store(self) -> VectorStoreInterface:
+        """Get or create the shared vector store.
+
+        Raises:
+            VectorStoreError: If the store cannot be opened.
+            ValueError: If the configured backend is unknown.
+        """
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    self._vector_store = self._create_vector_store()
+        return self._vector_store
+
+    def _create_vector_store(self) -> VectorStoreInterface:
+        """Build the vector store backend selected by VECTOR_STORE_BACKEND.
+
+        Raises:
+            ValueError: If the configured backend is unknown.
+        """
+        backend = settings.vector_store_backend
+        if backend == "numpy":
+            return NumpyVectorStore(
+                persist_path=settings.numpy_index_path,
+                ivf_lists=settings.numpy_ivf_lists,
+                ivf_probes=settings.numpy_ivf_probes,
+                ivf_min_rows=settings.numpy_ivf_min_rows,
+                quantization=settings.numpy_quantization,
+                rescore_factor=settings.numpy_rescore_factor,
+                search_dimensions=settings.vector_search_dimensions,
+            )
+        if backend == "chroma":
+            return ChromaVectorStore(
+                persist_path=settings.chroma_path,
+                max_workers=settings.vector_store_max_workers,
+                store_documents=settings.vector_store_documents,
+                search_dimensions=settings.vector_search_dimensions,
+                rescore_factor=settings.chroma_rescore_factor,
+                hnsw_m=settings.chroma_hnsw_m,
+                hnsw_construction_ef=settings.chroma_hnsw_construction_ef,
+                hnsw_search_ef=settings.chroma_hnsw_search_ef,
+            )
+        raise ValueError(f"Unknown vector store backend: {backend}")
+
+    def get_deepseek_client(self) -> DeepSeekClient:
+        """Get or create the shared DeepSeekClient."""
+        if self._deepseek_client is None:
+            with self._lock:
+                if self._deepseek_client is None:
+                    self._deepseek_client = DeepSeekClient(
+                        api_key=settings.deepseek_api_key
+                    )
+        return self._deepseek_client
+
+    def get_response_cache(self) -> ResponseCache:
+        """Get or create the shared ResponseCache."""
+        if self._response_cache is None:
+            with self._lock:
+                if self._response_cache is None:
+                    self._response_cache = ResponseCache(
+                        max_size=settings.response_cache_max_size,
+                        ttl_hours=max(1, settings.response_cache_ttl_seconds // 3600),
+                    )
+        return self._response_cache
+
+    def get_summary_index(self) -> SummaryIndex:
+        """Get or create the shared document summary index."""
+        if self._summary_index is None:
+            with self._lock:
+                if self._summary_index is None:
+                    self._summary_index = SummaryIndex()
+        return self._summary_index
+
+    def get_chunk_offset_index(self) -> ChunkOffsetIndex:
+        """Get or create the shared chunk offset index for focus lookups."""
+        if self._chunk_offset_index is None:
+            with self._lock:
+                if self._chunk_offset_index is None:
+                    self._chunk_offset_index = ChunkOffsetIndex()
+        return self._chunk_offset_index
+
+    def get_conversion_pool(self) -> Optional[ConversionPool]:
+        """Get or create the shared Docling conversion pool.
+
+        Returns:
+            ConversionPool, or None when CONVERSION_WORKERS is 0 and
+            documents are converted in-process.
+        """
+        if settings.conversion_workers <= 0:
+            return None
+        if self._conversion_pool is None:
+            with self._lock:
+                if self._conversion_pool is None:
+                    self._conversion_pool = ConversionPool(
+                        workers=settings.conversion_workers,
+                        timeout_seconds=settings.conversion_timeout_seconds,
+                        memory_limit_mb=settings.conversion_memory_limit_mb,
+                        max_jobs_per_worker=(
+                            settings.conversion_max_jobs_per_worker or None
+                        ),
+                    )
+        return self._conversion_pool
+
+    async def startup(self) -> None:
+        """Pre-warm services that the current configuration allows.
+
+        Failures are logged rather than raised so the API can still start
+        (e.g. without API keys); affected endpoints report errors lazily.
+        """
+        self.get_response_cache()
+
+        try:
+            self.get_vector_store()
+        except Exception as e:
+            logger.error(
+                "Vector store unavailable at startup",
+                error_type=type(e).__name__,
+                error_message=str(e),
+            )
+
+        conversion_pool = self.get_conversion_pool()
+        if conversion_pool is not None:
+            conversion_pool.start()
+
+        if settings.voyage_api_key:
+            self.get_embedding_service()
+        if settings.deepseek_api_key:
+            self.get_deepseek_client()
+
+        logger.info("Shared services initialized")
+
+    async def shutdown(self) -> None:
+        """Release executors and HTTP clients held by shared services."""
+        with self._lock:
+            embedding_service = self._embedding_service
+            vector_store = self._vector_store
+            deepseek_client = self._deepseek_client
+            conversion_pool = self._conversion_pool
+            self._embedding_service = None
+            self._vector_store = None
+            self._deepseek_client = None
+            self._response_cache = None
+            self._summary_index = None
+            self._chunk_offset_index = None
+            self._conversion_pool = None
+
+        if embedding_service is not None:
+            try:
+                embedding_service.shutdown()
+            except Exception as e:
+                logger.error(
+                    "Failed to shut down embedding service",
+                    error_type=type(e).__name__,
+                    error_message=str(e),
+                )
+
+        if vector_store is not None:
+            try:
+                vector_store.close()
+            except Exception as e:
+                logger.error(
+                    "Failed to close vector store",
+                    error_type=type(e).__name__,
+                    error_message=str(e),
+                )
+
+        if deepseek_client is not None:
+            try:
+                await deepseek_client.close()
+            except Exception as e:
+                logger.error(
+                    "Failed to close DeepSeek client",
+                    error_type=type(e).__name__,
+                    error_message=str(e),
+                )
+
+        if conversion_pool is not None:
+            try:
+                conversion_pool.shutdown()
+            except Exception as e:
+                logger.error(
+                    "Failed to shut down conversion pool",
+                    error_type=type(e).__name__,
+                    error_message=str(e),
+                )
+
+        logger.info("Shared services shut down")
+
+
+# Global service container (created once per process)
+service_manager = ServiceManager()
+
+
+def get_service_manager() -> ServiceManager:
+    """Dependency for the application-scoped service container.
+
+    Returns:
+        ServiceManager: Shared service registry.
+    """
+    return service_manager
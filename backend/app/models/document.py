@@ -2,7 +2,16 @@
 SQLAlchemy models for documents and chunks.
 """
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -22,6 +31,7 @@ class Document(Base):
     original_name = Column(String(255), nullable=False)
     file_type = Column(String(10), nullable=False)  # pdf, docx, txt, md, url, html
     file_size = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 hex
     upload_time = Column(String(30), nullable=False)  # ISO 8601
     processing_status = Column(String(20), nullable=False, default="pending")
     markdown_content = Column(Text, nullable=True)
@@ -38,7 +48,9 @@ class Chunk(Base):
     """Document chunk model.
 
     Stores individual chunks of a document with their token counts
-    and position metadata for vector search.
+    and position metadata for vector search. vector_stored is the
+    ingestion checkpoint: set once the chunk's vector batch is written,
+    so an interrupted ingestion only embeds chunks still unset.
     """
 
     __tablename__ = "chunks"
@@ -50,11 +62,15 @@ class Chunk(Base):
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
     token_count = Column(Integer, nullable=False)
+    start_char = Column(Integer, nullable=True)  # Offset in markdown_content
+    end_char = Column(Integer, nullable=True)
     chunk_metadata = Column(Text, nullable=True)  # JSON string (renamed from metadata)
+    vector_stored = Column(Boolean, nullable=True, default=False)
 
     # Relationship to document
     document = relationship("Document", back_populates="chunks")
 
     __table_args__ = (
         UniqueConstraint("document_id", "chunk_index", name="uq_document_chunk"),
+        Index("ix_chunks_document_start", "document_id", "start_char"),
     )
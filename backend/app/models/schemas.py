@@ -75,6 +75,7 @@ class TaskStatusResponse(BaseModel):
     error: Optional[str] = None
     created_at: str
     updated_at: str
+    queue_position: Optional[int] = None  # Set while waiting for a worker
 
 
 class DocumentMetadata(BaseModel):
@@ -82,6 +83,7 @@ class DocumentMetadata(BaseModel):
 
     title: Optional[str] = None
     detected_language: str = "en"
+    duplicate_of: Optional[str] = None  # Source document when cloned by content hash
 
 
 class DocumentSummary(BaseModel):
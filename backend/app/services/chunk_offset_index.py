@@ -0,0 +1,141 @@
+"""Per-document chunk offset index for focus caret lookups.
+
+Resolves a character position in a document's markdown to the chunk that
+covers it by bisecting sorted chunk start offsets, so the focused chunk
+can be found without a vector query.
+"""
+
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.document import Chunk
+
+
+@dataclass
+class DocumentOffsets:
+    """Chunk offsets of one document, sorted by start_char."""
+
+    starts: List[int]
+    ends: List[int]
+    chunk_ids: List[str]
+
+
+class ChunkOffsetIndex:
+    """In-memory sorted chunk offsets for recently focused documents.
+
+    Loaded per document from the indexed start_char/end_char columns on
+    first use and kept for the max_documents most recently used
+    documents. Shared across requests (see ServiceManager) and
+    invalidated whenever a document's chunks are rewritten.
+    """
+
+    def __init__(self, max_documents: int = 256) -> None:
+        """Initialize an empty index.
+
+        Args:
+            max_documents: Documents kept in memory (least recently used
+                are evicted first)
+        """
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._documents: "OrderedDict[str, DocumentOffsets]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def invalidate(self, document_id: Optional[str] = None) -> None:
+        """Drop one document's offsets, or all of them.
+
+        Args:
+            document_id: Document whose chunks changed (None = all)
+        """
+        with self._lock:
+            self._generation += 1
+            if document_id is None:
+                self._documents.clear()
+            else:
+                self._documents.pop(document_id, None)
+
+    def build(
+        self,
+        document_id: str,
+        rows: List[Tuple[str, int, int]],
+        generation: Optional[int] = None,
+    ) -> DocumentOffsets:
+        """Store a document's offsets.
+
+        Args:
+            document_id: Document UUID
+            rows: (chunk_id, start_char, end_char) per chunk
+            generation: Generation observed before loading; the offsets
+                are not cached if the index was invalidated meanwhile
+
+        Returns:
+            The document's DocumentOffsets
+        """
+        rows = sorted(rows, key=lambda row: (row[1], row[2]))
+        offsets = DocumentOffsets(
+            starts=[row[1] for row in rows],
+            ends=[row[2] for row in rows],
+            chunk_ids=[row[0] for row in rows],
+        )
+        with self._lock:
+            if generation is None or generation == self._generation:
+                self._documents[document_id] = offsets
+                self._documents.move_to_end(document_id)
+                while len(self._documents) > self.max_documents:
+                    self._documents.popitem(last=False)
+        return offsets
+
+    async def get(self, db: AsyncSession, document_id: str) -> DocumentOffsets:
+        """Get a document's offsets, loading them from SQLite if needed.
+
+        Args:
+            db: Database session
+            document_id: Document UUID
+
+        Returns:
+            DocumentOffsets (empty if the document has no positioned chunks)
+        """
+        with self._lock:
+            offsets = self._documents.get(document_id)
+            if offsets is not None:
+                self._documents.move_to_end(document_id)
+                return offsets
+            generation = self._generation
+
+        result = await db.execute(
+            select(Chunk.id, Chunk.start_char, Chunk.end_char).where(
+                Chunk.document_id == document_id, Chunk.start_char.is_not(None)
+            )
+        )
+        return self.build(document_id, [tuple(row) for row in result], generation)
+
+    async def locate(
+        self, db: AsyncSession, document_id: str, position: int
+    ) -> Optional[str]:
+        """Find the chunk covering a character position.
+
+        With overlapping chunks, the one starting closest before the
+        position wins.
+
+        Args:
+            db: Database session
+            document_id: Document UUID
+            position: Character offset in the document's markdown
+
+        Returns:
+            Chunk ID, or None if no chunk covers the position
+        """
+        offsets = await self.get(db, document_id)
+        i = bisect_right(offsets.starts, position) - 1
+        if i < 0 or position >= offsets.ends[i]:
+            return None
+        return offsets.chunk_ids[i]
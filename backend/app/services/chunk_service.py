@@ -3,12 +3,22 @@ Document chunking service using tiktoken for token counting.
 Splits documents into appropriately-sized chunks for embedding.
 """
 
+import asyncio
 import re
+import threading
 from dataclasses import dataclass
-from typing import List, Tuple
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
 
 import tiktoken
 
+# Token-safe cut positions, and the same cuts matched in reversed text
+_CUT = re.compile(r"(?<=\S) |(?<=\n)(?=\S)")
+_CUT_REVERSED = re.compile(r" (?=\S)|\S(?=\n)")
+
+# Marks the end of aiter_chunks() output
+_DONE = object()
+
 
 @dataclass
 class Chunk:
@@ -21,6 +31,24 @@ class Chunk:
     end_char: int
 
 
+@dataclass
+class _Span:
+    """A paragraph or sentence with its cached token counts.
+
+    head_end and tail_start are the first and last token-safe cut
+    positions in text (see _edge_cuts); head_tokens and tail_tokens
+    count text[:head_end] and text[tail_start:]. Both are None when the
+    text has no safe cut.
+    """
+
+    text: str
+    tokens: int
+    head_end: Optional[int] = None
+    head_tokens: int = 0
+    tail_start: Optional[int] = None
+    tail_tokens: int = 0
+
+
 class ChunkingError(Exception):
     """Custom exception for chunking operations."""
 
@@ -32,6 +60,10 @@ class ChunkService:
 
     Uses tiktoken cl100k_base encoding (same as OpenAI models).
     Targets 512-1024 tokens with 15% overlap.
+
+    Each paragraph is tokenized once, in a single encode_batch call, and
+    chunk boundaries, overlap and chunk token counts are derived from
+    those cached counts instead of re-encoding the joined chunk text.
     """
 
     ENCODING = "cl100k_base"
@@ -39,6 +71,7 @@ class ChunkService:
     MAX_TOKENS = 1024
     MIN_TOKENS = 512
     OVERLAP_RATIO = 0.15  # 15% overlap
+    MEASURE_BATCH = 256  # Paragraphs tokenized per encode_batch call
 
     def __init__(self) -> None:
         """Initialize tiktoken encoder."""
@@ -70,159 +103,280 @@ class ChunkService:
         Raises:
             ChunkingError: If document is empty.
         """
+        return list(self.iter_chunks(markdown))
+
+    def iter_chunks(self, markdown: str) -> Iterator[Chunk]:
+        """Yield the chunks of chunk_document() one at a time.
+
+        Paragraphs are tokenized MEASURE_BATCH at a time, so memory beyond
+        the markdown itself stays bounded by the chunk being built.
+
+        Args:
+            markdown: Markdown content to chunk.
+
+        Yields:
+            Chunk objects in index order.
+
+        Raises:
+            ChunkingError: If document is empty (on first iteration).
+        """
         if not markdown or not markdown.strip():
             raise ChunkingError("This document appears to be empty.")
 
-        chunks: List[Chunk] = []
+        index = 0
         overlap_tokens = int(self.TARGET_TOKENS * self.OVERLAP_RATIO)
 
-        # Split by paragraphs (double newline)
-        paragraphs = markdown.split("\n\n")
-
-        current_texts: List[str] = []
+        current: List[_Span] = []
         current_tokens = 0
         current_start = 0
         char_position = 0
 
-        for para in paragraphs:
-            para_tokens = self.count_tokens(para)
-            para_len = len(para) + 2  # +2 for \n\n
+        for para in self._iter_measured(_split_paragraphs(markdown)):
+            para_len = len(para.text) + 2  # +2 for \n\n
 
             # Handle oversized paragraphs
-            if para_tokens > self.MAX_TOKENS:
+            if para.tokens > self.MAX_TOKENS:
                 # Flush current chunk
-                if current_texts:
-                    chunk_text = "\n\n".join(current_texts)
-                    chunks.append(
-                        Chunk(
-                            index=len(chunks),
-                            content=chunk_text,
-                            token_count=self.count_tokens(chunk_text),
-                            start_char=current_start,
-                            end_char=char_position,
-                        )
+                if current:
+                    yield self._make_chunk(
+                        current, "\n\n", index, current_start, char_position
                     )
-                    current_texts = []
+                    index += 1
+                    current = []
                     current_tokens = 0
                     current_start = char_position
 
                 # Split large paragraph by sentences
-                sentence_chunks = self._split_by_sentences(
-                    para, char_position, len(chunks)
-                )
-                chunks.extend(sentence_chunks)
+                for chunk in self._split_by_sentences(para.text, char_position, index):
+                    yield chunk
+                    index += 1
                 char_position += para_len
                 current_start = char_position
                 continue
 
             # Check if adding this paragraph exceeds target
-            if current_tokens + para_tokens > self.TARGET_TOKENS and current_texts:
-                chunk_text = "\n\n".join(current_texts)
-                chunks.append(
-                    Chunk(
-                        index=len(chunks),
-                        content=chunk_text,
-                        token_count=self.count_tokens(chunk_text),
-                        start_char=current_start,
-                        end_char=char_position,
-                    )
+            if current_tokens + para.tokens > self.TARGET_TOKENS and current:
+                yield self._make_chunk(
+                    current, "\n\n", index, current_start, char_position
                 )
+                index += 1
 
                 # Keep overlap
-                overlap_texts, overlap_count = self._get_overlap(
-                    current_texts, overlap_tokens
-                )
-                current_texts = overlap_texts
-                current_tokens = overlap_count
-                current_start = char_position - sum(len(t) + 2 for t in overlap_texts)
+                current, current_tokens = self._get_overlap(current, overlap_tokens)
+                current_start = char_position - sum(len(s.text) + 2 for s in current)
 
-            current_texts.append(para)
-            current_tokens += para_tokens
+            current.append(para)
+            current_tokens += para.tokens
             char_position += para_len
 
         # Final chunk
-        if current_texts:
-            chunk_text = "\n\n".join(current_texts)
-            chunks.append(
-                Chunk(
-                    index=len(chunks),
-                    content=chunk_text,
-                    token_count=self.count_tokens(chunk_text),
-                    start_char=current_start,
-                    end_char=char_position,
-                )
-            )
+        if current:
+            yield self._make_chunk(current, "\n\n", index, current_start, char_position)
 
-        # Re-index chunks to ensure sequential indices
-        for i, chunk in enumerate(chunks):
-            chunk.index = i
+    async def aiter_chunks(
+        self, markdown: str, buffer_size: int = 64
+    ) -> AsyncIterator[Chunk]:
+        """Yield iter_chunks() results without blocking the event loop.
 
-        return chunks
+        Chunking runs in a worker thread (tiktoken releases the GIL while
+        encoding) and hands chunks over through a bounded queue, so the
+        consumer can start on the first chunks while later ones are still
+        being produced. Closing the iterator early stops the worker.
+
+        Args:
+            markdown: Markdown content to chunk.
+            buffer_size: Chunks buffered ahead of the consumer.
+
+        Yields:
+            Chunk objects in index order.
+
+        Raises:
+            ChunkingError: If document is empty.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        stopped = threading.Event()
+
+        def produce() -> None:
+            end: object = _DONE
+            try:
+                for chunk in self.iter_chunks(markdown):
+                    if stopped.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+            except Exception as e:
+                end = e
+            if not stopped.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(end), loop).result()
+
+        worker = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            await worker
+        finally:
+            # Unblock a worker waiting on a full queue so it can exit
+            stopped.set()
+            while not queue.empty():
+                queue.get_nowait()
 
     def _split_by_sentences(
         self, text: str, start_char: int, start_index: int
     ) -> List[Chunk]:
         """Split text by sentence boundaries."""
         # Split on sentence endings
-        sentences = re.split(r"(?<=[.!?])\s+", text)
+        sentences = self._measure(re.split(r"(?<=[.!?])\s+", text))
 
         chunks: List[Chunk] = []
-        current_sentences: List[str] = []
+        current: List[_Span] = []
         current_tokens = 0
         current_start = start_char
         char_pos = start_char
 
         for sentence in sentences:
-            sent_tokens = self.count_tokens(sentence)
-            sent_len = len(sentence) + 1
+            sent_len = len(sentence.text) + 1
 
-            if current_tokens + sent_tokens > self.TARGET_TOKENS and current_sentences:
-                chunk_text = " ".join(current_sentences)
+            if current_tokens + sentence.tokens > self.TARGET_TOKENS and current:
                 chunks.append(
-                    Chunk(
-                        index=start_index + len(chunks),
-                        content=chunk_text,
-                        token_count=self.count_tokens(chunk_text),
-                        start_char=current_start,
-                        end_char=char_pos,
+                    self._make_chunk(
+                        current,
+                        " ",
+                        start_index + len(chunks),
+                        current_start,
+                        char_pos,
                     )
                 )
                 # Keep last 2 sentences for overlap
-                current_sentences = (
-                    current_sentences[-2:] if len(current_sentences) > 2 else []
-                )
-                current_tokens = sum(self.count_tokens(s) for s in current_sentences)
+                current = current[-2:] if len(current) > 2 else []
+                current_tokens = sum(s.tokens for s in current)
                 current_start = char_pos
 
-            current_sentences.append(sentence)
-            current_tokens += sent_tokens
+            current.append(sentence)
+            current_tokens += sentence.tokens
             char_pos += sent_len
 
-        if current_sentences:
-            chunk_text = " ".join(current_sentences)
+        if current:
             chunks.append(
-                Chunk(
-                    index=start_index + len(chunks),
-                    content=chunk_text,
-                    token_count=self.count_tokens(chunk_text),
-                    start_char=current_start,
-                    end_char=char_pos,
+                self._make_chunk(
+                    current, " ", start_index + len(chunks), current_start, char_pos
                 )
             )
 
         return chunks
 
     def _get_overlap(
-        self, texts: List[str], target_tokens: int
-    ) -> Tuple[List[str], int]:
-        """Get texts for overlap from end of list."""
-        overlap: List[str] = []
+        self, spans: List[_Span], target_tokens: int
+    ) -> Tuple[List[_Span], int]:
+        """Get spans for overlap from end of list."""
+        overlap: List[_Span] = []
         total = 0
-        for text in reversed(texts):
-            tokens = self.count_tokens(text)
-            if total + tokens <= target_tokens:
-                overlap.insert(0, text)
-                total += tokens
+        for span in reversed(spans):
+            if total + span.tokens <= target_tokens:
+                overlap.insert(0, span)
+                total += span.tokens
             else:
                 break
         return overlap, total
+
+    def _make_chunk(
+        self, spans: List[_Span], sep: str, index: int, start: int, end: int
+    ) -> Chunk:
+        """Build a chunk from spans joined by sep."""
+        return Chunk(
+            index=index,
+            content=sep.join(s.text for s in spans),
+            token_count=self._joined_tokens(spans, sep),
+            start_char=start,
+            end_char=end,
+        )
+
+    def _iter_measured(self, texts: Iterable[str]) -> Iterator[_Span]:
+        """Measure texts MEASURE_BATCH at a time."""
+        texts = iter(texts)
+        while True:
+            batch = list(islice(texts, self.MEASURE_BATCH))
+            if not batch:
+                return
+            yield from self._measure(batch)
+
+    def _measure(self, texts: List[str]) -> List[_Span]:
+        """Tokenize texts and their edges in one encode_batch call."""
+        spans = [_Span(text=text, tokens=0) for text in texts]
+        batch: List[str] = list(texts)
+        edges: List[Tuple[_Span, int, int]] = []  # (span, head_end, tail_start)
+        for span in spans:
+            cuts = _edge_cuts(span.text)
+            if cuts:
+                edges.append((span, *cuts))
+                batch.append(span.text[: cuts[0]])
+                batch.append(span.text[cuts[1] :])
+
+        counts = [len(tokens) for tokens in self._encoder.encode_batch(batch)]
+        for span, count in zip(spans, counts):
+            span.tokens = count
+        edge_counts = counts[len(spans) :]
+        for i, (span, head_end, tail_start) in enumerate(edges):
+            span.head_end = head_end
+            span.head_tokens = edge_counts[2 * i]
+            span.tail_start = tail_start
+            span.tail_tokens = edge_counts[2 * i + 1]
+        return spans
+
+    def _joined_tokens(self, spans: List[_Span], sep: str) -> int:
+        """Count tokens of sep.join(spans) from the cached span counts.
+
+        BPE pieces never cross a safe cut, so the joined count is the sum
+        of each span's interior (between its first and last cut) plus the
+        short seams around every separator, which are the only parts that
+        get re-encoded. The result equals count_tokens on the joined text.
+        """
+        total = 0
+        seam: List[str] = []
+        for i, span in enumerate(spans):
+            if i:
+                seam.append(sep)
+            if span.head_end is None:
+                seam.append(span.text)
+                continue
+            seam.append(span.text[: span.head_end])
+            total += self.count_tokens("".join(seam))
+            total += span.tokens - span.head_tokens - span.tail_tokens
+            seam = [span.text[span.tail_start :]]
+        if seam:
+            total += self.count_tokens("".join(seam))
+        return total
+
+
+def _split_paragraphs(markdown: str) -> Iterator[str]:
+    """Lazily split markdown into paragraphs, matching str.split on blank lines."""
+    start = 0
+    while True:
+        end = markdown.find("\n\n", start)
+        if end == -1:
+            yield markdown[start:]
+            return
+        yield markdown[start:end]
+        start = end + 2
+
+
+def _edge_cuts(text: str) -> Optional[Tuple[int, int]]:
+    """First and last position in text where pre-tokenization always splits.
+
+    A cut is a space following a non-space character, or a non-space
+    character following a newline. No cl100k_base pre-tokenizer piece
+    spans such a position and the pieces on either side do not depend on
+    what lies across it, so token counts add up there in any context.
+
+    Returns:
+        (first, last) cut positions, or None if text has no cut.
+    """
+    first = _CUT.search(text)
+    if first is None:
+        return None
+    last = _CUT_REVERSED.search(text[::-1])
+    return first.start(), len(text) - 1 - last.start()
@@ -0,0 +1,195 @@
+"""
+Process pool for Docling conversion.
+Each worker process keeps a warm DocumentConverter so layout/OCR models
+load once per process instead of once per document, and CPU-heavy
+conversion never contends for the API process's GIL.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from app.core.logging_config import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+PageRange = Tuple[int, int]  # 1-based, inclusive
+
+
+class ConversionTimeoutError(Exception):
+    """Raised when a conversion exceeds its time limit."""
+
+    pass
+
+
+# Per-process converter, created by the pool initializer
+_worker_converter = None
+
+
+def _init_worker(memory_limit_mb: int) -> None:
+    """Pool initializer: apply resource limits and preload Docling.
+
+    Args:
+        memory_limit_mb: Address-space limit for the worker (0 = none)
+    """
+    global _worker_converter
+
+    if memory_limit_mb > 0:
+        try:
+            import resource
+
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            # Not supported on this platform (e.g. Windows)
+            pass
+
+    from docling.document_converter import DocumentConverter
+
+    _worker_converter = DocumentConverter()
+
+
+def _warm_up() -> bool:
+    """No-op job that forces a worker to start and run its initializer."""
+    return _worker_converter is not None
+
+
+def _convert_in_worker(
+    file_path: str, page_range: Optional[PageRange] = None
+) -> Tuple[str, Optional[str]]:
+    """Convert a file with the worker's warm converter.
+
+    Args:
+        file_path: Path to file to convert.
+        page_range: Only convert these pages (None = whole document).
+
+    Returns:
+        Tuple of (markdown_content, title).
+    """
+    from app.services.document_processor import convert_with_docling
+
+    return convert_with_docling(_worker_converter, file_path, page_range)
+
+
+class ConversionPool:
+    """Pool of worker processes holding warm Docling converters.
+
+    Jobs are bounded by timeout_seconds; a job that overruns (or a worker
+    killed by the memory limit) breaks the pool, which is then replaced
+    with fresh workers so later documents are unaffected. Jobs that were
+    running in a pool broken by another job are retried once.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout_seconds: int = 300,
+        memory_limit_mb: int = 0,
+        max_jobs_per_worker: Optional[int] = None,
+    ) -> None:
+        """Initialize conversion pool (processes start on first use).
+
+        Args:
+            workers: Number of worker processes
+            timeout_seconds: Per-job conversion time limit
+            memory_limit_mb: Per-worker address-space limit (0 = none)
+            max_jobs_per_worker: Recycle a worker after this many jobs
+                to cap memory growth (None = never)
+        """
+        self.workers = max(1, workers)
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the current executor, creating it if needed."""
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs threads and an event
+                # loop is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_mb,),
+                    max_tasks_per_child=self.max_jobs_per_worker,
+                )
+            return self._executor
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        """Kill a broken or stalled executor's workers and drop it."""
+        with self._lock:
+            if self._executor is not broken:
+                return  # Already replaced by another job
+            self._executor = None
+
+        # ProcessPoolExecutor has no public API to kill a stuck worker
+        for process in list(getattr(broken, "_processes", {}).values()):
+            process.terminate()
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Conversion pool restarted", workers=self.workers)
+
+    def start(self) -> None:
+        """Spawn workers and preload their converters without waiting."""
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_warm_up)
+        logger.info(
+            "Conversion pool starting",
+            workers=self.workers,
+            timeout_seconds=self.timeout_seconds,
+            memory_limit_mb=self.memory_limit_mb,
+        )
+
+    async def convert(
+        self, file_path: str, page_range: Optional[PageRange] = None
+    ) -> Tuple[str, Optional[str]]:
+        """Convert a file (or a page range of it) in a worker process.
+
+        Args:
+            file_path: Path to file to convert.
+            page_range: Only convert these pages (None = whole document).
+
+        Returns:
+            Tuple of (markdown_content, title).
+
+        Raises:
+            ConversionTimeoutError: If the job exceeds timeout_seconds.
+            BrokenProcessPool: If the job itself killed its worker twice.
+            Exception: Any error raised by Docling in the worker.
+        """
+        try:
+            return await self._run(file_path, page_range)
+        except BrokenProcessPool:
+            logger.warning("Conversion worker died, retrying", file_path=file_path)
+            return await self._run(file_path, page_range)
+
+    async def _run(
+        self, file_path: str, page_range: Optional[PageRange]
+    ) -> Tuple[str, Optional[str]]:
+        """Run one conversion, replacing the pool if it stalls or breaks."""
+        executor = self._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(
+            executor, _convert_in_worker, file_path, page_range
+        )
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._replace_executor(executor)
+            raise ConversionTimeoutError(f"Conversion exceeded {self.timeout_seconds}s")
+        except BrokenProcessPool:
+            self._replace_executor(executor)
+            raise
+
+    def shutdown(self) -> None:
+        """Stop all worker processes."""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
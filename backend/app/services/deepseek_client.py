@@ -217,3 +217,7 @@ class DeepSeekClient:
         raise DeepSeekAPIError(
             "AI service temporarily unavailable. Please try again."
         ) from last_error
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
@@ -6,14 +6,22 @@ Supports PDF, DOCX, TXT, MD, HTML, and URL content.
 import asyncio
 import os
 import tempfile
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import httpx
 from docling.document_converter import DocumentConverter
 
 from app.core.logging_config import StructuredLogger
+from app.services.conversion_pool import (
+    ConversionPool,
+    ConversionTimeoutError,
+    PageRange,
+)
+from app.services import fast_converters
+from app.services.fast_converters import FastConversion, title_from_markdown
 
 logger = StructuredLogger(__name__)
 
@@ -24,6 +32,60 @@ class ProcessingError(Exception):
     pass
 
 
+def convert_with_docling(
+    converter, file_path: str, page_range: Optional[PageRange] = None
+) -> tuple[str, Optional[str]]:
+    """Synchronous Docling conversion.
+
+    Shared by the in-process fallback and ConversionPool workers.
+
+    Args:
+        converter: Docling DocumentConverter.
+        file_path: Path to file to convert.
+        page_range: Only convert these pages (None = whole document).
+
+    Returns:
+        Tuple of (markdown_content, title).
+    """
+    if page_range is None:
+        result = converter.convert(file_path)
+    else:
+        result = converter.convert(file_path, page_range=page_range)
+    markdown = result.document.export_to_markdown()
+
+    title = None
+    try:
+        if hasattr(result.document, "metadata") and result.document.metadata:
+            title = result.document.metadata.get("title")
+    except Exception:
+        pass
+    if title is None:
+        title = title_from_markdown(markdown)
+    return markdown, title
+
+
+def count_pdf_pages(file_path: str) -> Optional[int]:
+    """Count PDF pages without parsing content (None if unreadable)."""
+    try:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(file_path)
+    except Exception:
+        return None
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def split_page_ranges(page_count: int, batch_size: int) -> List[PageRange]:
+    """Split pages 1..page_count into consecutive 1-based inclusive ranges."""
+    return [
+        (start, min(start + batch_size - 1, page_count))
+        for start in range(1, page_count + 1, batch_size)
+    ]
+
+
 @dataclass
 class ProcessingResult:
     """Result of document processing."""
@@ -31,6 +93,8 @@ class ProcessingResult:
     markdown: str
     title: Optional[str]
     detected_language: str = "en"
+    # Conversion tier, timings (ms) and escalation reason, for doc_metadata
+    conversion: Dict[str, Any] = field(default_factory=dict)
 
 
 class DocumentProcessor:
@@ -38,37 +102,202 @@ class DocumentProcessor:
 
     Supports PDF, DOCX, TXT, MD, HTML, and URL content.
 
+    Conversion is tiered: PDF, DOCX and HTML first go through a cheap
+    extractor (see fast_converters) and only escalate to Docling when its
+    quality checks fail.
+
+    Large PDFs (split_min_pages or more) converted through a
+    ConversionPool are split into page batches that convert in parallel
+    across the pool's workers and are merged back in page order.
+
     IMPORTANT: Docling conversion is CPU-bound and synchronous.
-    All Docling calls are wrapped in asyncio.to_thread() to prevent
-    blocking the event loop.
+    With a ConversionPool, conversions run in worker processes that keep
+    a warm converter. Without one, a converter is created lazily and
+    calls are wrapped in asyncio.to_thread() to prevent blocking the
+    event loop.
     """
 
     URL_TIMEOUT = 30  # seconds
 
-    def __init__(self) -> None:
-        """Initialize Docling converter."""
-        self._converter = DocumentConverter()
+    def __init__(
+        self,
+        conversion_pool: Optional[ConversionPool] = None,
+        enable_fast_path: bool = True,
+        split_min_pages: int = 100,
+        page_batch_size: int = 40,
+    ) -> None:
+        """Initialize document processor.
 
-    def _sync_convert(self, file_path: str) -> tuple[str, Optional[str]]:
+        Args:
+            conversion_pool: Shared ConversionPool (None = convert in-process).
+            enable_fast_path: Try cheap extractors before Docling.
+            split_min_pages: Split PDFs with at least this many pages
+                into parallel page batches (pool only; 0 = never).
+            page_batch_size: Pages per batch when splitting.
+        """
+        self._conversion_pool = conversion_pool
+        self.enable_fast_path = enable_fast_path
+        self.split_min_pages = split_min_pages
+        self.page_batch_size = max(1, page_batch_size)
+        self._converter: Optional[DocumentConverter] = None
+
+    def _sync_convert(
+        self, file_path: str, page_range: Optional[PageRange] = None
+    ) -> tuple[str, Optional[str]]:
         """Synchronous Docling conversion (runs in thread pool).
 
         Args:
             file_path: Path to file to convert.
+            page_range: Only convert these pages (None = whole document).
 
         Returns:
             Tuple of (markdown_content, title).
         """
-        result = self._converter.convert(file_path)
-        markdown = result.document.export_to_markdown()
-        title = self._extract_docling_title(result)
-        return markdown, title
+        if self._converter is None:
+            self._converter = DocumentConverter()
+        return convert_with_docling(self._converter, file_path, page_range)
+
+    async def _convert(
+        self, file_path: str, page_range: Optional[PageRange] = None
+    ) -> tuple[str, Optional[str]]:
+        """Convert with Docling off the event loop.
 
-    async def process_file(self, file_path: str, file_type: str) -> ProcessingResult:
+        Raises:
+            ProcessingError: If the conversion times out in the pool.
+        """
+        if self._conversion_pool is None:
+            return await asyncio.to_thread(self._sync_convert, file_path, page_range)
+        try:
+            return await self._conversion_pool.convert(file_path, page_range)
+        except ConversionTimeoutError:
+            raise ProcessingError(
+                "This document took too long to process. "
+                "It may be too large or complex."
+            )
+
+    async def _convert_page_batches(
+        self,
+        file_path: str,
+        page_count: int,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> tuple[str, Optional[str], int]:
+        """Convert a PDF as parallel page batches and merge them in order.
+
+        Each batch is a separate pool job, so it also gets its own
+        timeout. If any batch fails the others are cancelled.
+
+        Args:
+            file_path: Path to the PDF.
+            page_count: Number of pages in the PDF.
+            on_progress: Called with (pages_done, page_count) per batch.
+
+        Returns:
+            Tuple of (markdown_content, title, batch_count).
+        """
+        ranges = split_page_ranges(page_count, self.page_batch_size)
+        pages_done = 0
+
+        async def convert_range(page_range: PageRange) -> tuple[str, Optional[str]]:
+            nonlocal pages_done
+            converted = await self._convert(file_path, page_range)
+            pages_done += page_range[1] - page_range[0] + 1
+            if on_progress is not None:
+                on_progress(pages_done, page_count)
+            return converted
+
+        tasks = [asyncio.create_task(convert_range(r)) for r in ranges]
+        try:
+            parts = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        markdown = "\n\n".join(part for part, _ in parts if part.strip())
+        title = next((t for _, t in parts if t), None)
+        return markdown, title, len(ranges)
+
+    async def _convert_tiered(
+        self,
+        file_path: str,
+        file_type: str,
+        html: Optional[str] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> ProcessingResult:
+        """Convert with the fast path first, escalating to Docling if needed.
+
+        Args:
+            file_path: Path to the file (used by Docling).
+            file_type: One of 'pdf', 'docx', 'html'.
+            html: Already-fetched HTML, to skip re-reading the file.
+            on_progress: Page-batch progress callback for split PDFs.
+
+        Returns:
+            ProcessingResult whose conversion dict records the tier used,
+            per-tier timings and any escalation reason.
+        """
+        conversion: Dict[str, Any] = {}
+        if self.enable_fast_path:
+            started = time.perf_counter()
+            fast: Optional[FastConversion]
+            try:
+                if html is not None:
+                    fast = await asyncio.to_thread(fast_converters.convert_html, html)
+                else:
+                    fast = await asyncio.to_thread(
+                        fast_converters.convert_file, file_path, file_type
+                    )
+            except Exception as e:
+                # Malformed input for the cheap parser; Docling may cope
+                fast = None
+                conversion["escalation_reason"] = (
+                    f"fast path failed: {type(e).__name__}"
+                )
+            conversion["fast_path_ms"] = round(
+                (time.perf_counter() - started) * 1000, 1
+            )
+
+            if fast is not None and fast.accepted:
+                conversion["tier"] = fast.tier
+                return ProcessingResult(
+                    markdown=fast.markdown, title=fast.title, conversion=conversion
+                )
+            if fast is not None:
+                conversion["escalation_reason"] = fast.escalation_reason
+
+        page_count = None
+        if (
+            file_type == "pdf"
+            and self._conversion_pool is not None
+            and self.split_min_pages > 0
+        ):
+            page_count = await asyncio.to_thread(count_pdf_pages, file_path)
+
+        started = time.perf_counter()
+        if page_count is not None and page_count >= self.split_min_pages:
+            markdown, title, batches = await self._convert_page_batches(
+                file_path, page_count, on_progress
+            )
+            conversion["page_batches"] = batches
+        else:
+            markdown, title = await self._convert(file_path)
+        conversion["docling_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        conversion["tier"] = "docling"
+        return ProcessingResult(markdown=markdown, title=title, conversion=conversion)
+
+    async def process_file(
+        self,
+        file_path: str,
+        file_type: str,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> ProcessingResult:
         """Process an uploaded file to Markdown.
 
         Args:
             file_path: Path to the uploaded file.
             file_type: One of 'pdf', 'docx', 'txt', 'md', 'html'.
+            on_progress: Called with (pages_done, total_pages) as page
+                batches of a large PDF finish.
 
         Returns:
             ProcessingResult with markdown content and metadata.
@@ -86,12 +315,15 @@ class DocumentProcessor:
                 # Direct read for plain text (fast, no thread needed)
                 markdown = path.read_text(encoding="utf-8")
                 title = self._extract_title_from_markdown(markdown)
-                return ProcessingResult(markdown=markdown, title=title)
+                return ProcessingResult(
+                    markdown=markdown, title=title, conversion={"tier": "plain_text"}
+                )
 
             elif file_type in ("pdf", "docx", "html"):
-                # Use Docling for conversion - CPU-bound, run in thread pool
-                markdown, title = await asyncio.to_thread(self._sync_convert, str(path))
-                return ProcessingResult(markdown=markdown, title=title)
+                # Fast path, then Docling - CPU-bound, run off the event loop
+                return await self._convert_tiered(
+                    str(path), file_type, on_progress=on_progress
+                )
 
             else:
                 raise ProcessingError("Could not process this file format.")
@@ -146,14 +378,14 @@ class DocumentProcessor:
                 f.write(html_content)
                 temp_path = f.name
 
-            # Convert with Docling in thread pool
-            markdown, title = await asyncio.to_thread(self._sync_convert, temp_path)
+            # Fast path, then Docling - off the event loop
+            result = await self._convert_tiered(temp_path, "html", html=html_content)
 
             # Cleanup temp file on success
             os.unlink(temp_path)
             temp_path = None
 
-            return ProcessingResult(markdown=markdown, title=title)
+            return result
 
         except httpx.TimeoutException:
             raise ProcessingError(
@@ -192,19 +424,4 @@ class DocumentProcessor:
 
     def _extract_title_from_markdown(self, markdown: str) -> Optional[str]:
         """Extract title from first H1 heading."""
-        for line in markdown.split("\n"):
-            line = line.strip()
-            if line.startswith("# "):
-                return line[2:].strip()
-        return None
-
-    def _extract_docling_title(self, result) -> Optional[str]:
-        """Extract title from Docling result metadata."""
-        try:
-            if hasattr(result.document, "metadata") and result.document.metadata:
-                return result.document.metadata.get("title")
-        except Exception:
-            pass
-        # Fallback to markdown extraction
-        markdown = result.document.export_to_markdown()
-        return self._extract_title_from_markdown(markdown)
+        return title_from_markdown(markdown)
@@ -5,9 +5,11 @@ with embeddings for efficient multi-document retrieval.
 """
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
+import threading
 import numpy as np
+from sqlalchemy import text
 
 from app.core.logging_config import StructuredLogger
 
@@ -24,6 +26,104 @@ class DocumentSummary:
     created_at: str
 
 
+class SummaryIndex:
+    """In-memory matrix of summary embeddings for document routing.
+
+    Holds every summary embedding as one L2-normalized float32 matrix so
+    selecting documents is a single matrix-vector product plus
+    argpartition. Shared across requests (see ServiceManager) and
+    invalidated whenever a summary is written.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty, unloaded index."""
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._snapshot: Optional[Tuple[List[str], np.ndarray]] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the matrix reflects the current summaries."""
+        return self._snapshot is not None
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation."""
+        return self._generation
+
+    def __len__(self) -> int:
+        snapshot = self._snapshot
+        return len(snapshot[0]) if snapshot else 0
+
+    def invalidate(self) -> None:
+        """Drop the matrix so the next lookup reloads it."""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def build(
+        self,
+        document_ids: List[str],
+        embeddings: List[np.ndarray],
+        generation: Optional[int] = None,
+    ) -> None:
+        """Replace the matrix with the given embeddings.
+
+        Args:
+            document_ids: Document UUIDs, one per embedding
+            embeddings: Summary embedding vectors
+            generation: Generation observed before loading; the build is
+                discarded if the index was invalidated in the meantime
+        """
+        matrix = np.zeros((0, 0), dtype=np.float32)
+        if embeddings:
+            dimensions = len(embeddings[0])
+            keep = [i for i, e in enumerate(embeddings) if len(e) == dimensions]
+            if len(keep) != len(embeddings):
+                logger.warning(
+                    "Skipping summaries with mismatched embedding dimensions",
+                    expected=dimensions,
+                    skipped=len(embeddings) - len(keep),
+                )
+            document_ids = [document_ids[i] for i in keep]
+            matrix = np.stack([embeddings[i] for i in keep]).astype(np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._snapshot = (list(document_ids), matrix)
+
+    def top_k(self, query_embedding: List[float], k: int) -> List[str]:
+        """Return the k document IDs whose summaries best match the query.
+
+        Args:
+            query_embedding: Query embedding vector
+            k: Number of documents to select
+
+        Returns:
+            Document IDs sorted by descending cosine similarity
+        """
+        snapshot = self._snapshot
+        if not snapshot or not snapshot[0] or k <= 0:
+            return []
+        document_ids, matrix = snapshot
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = matrix @ (query / norm if norm else query)
+
+        k = min(k, len(document_ids))
+        if k < len(document_ids):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(document_ids))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [document_ids[i] for i in top]
+
+
 class DocumentSummaryService:
     """Service for generating and managing document summaries.
 
@@ -31,17 +131,25 @@ class DocumentSummaryService:
     relevant documents before searching chunks.
     """
 
-    def __init__(self, deepseek_client, embedding_service, db_session):
+    def __init__(
+        self,
+        deepseek_client,
+        embedding_service,
+        db_session,
+        summary_index: Optional[SummaryIndex] = None,
+    ):
         """Initialize document summary service.
 
         Args:
             deepseek_client: DeepSeekClient instance for summary generation
             embedding_service: EmbeddingService instance for embeddings
             db_session: Database session for storage
+            summary_index: Shared SummaryIndex (a private one if omitted)
         """
         self.deepseek_client = deepseek_client
         self.embedding_service = embedding_service
         self.db = db_session
+        self.summary_index = summary_index or SummaryIndex()
 
     async def generate_summary(
         self, document_id: str, document_content: str, document_title: str
@@ -146,6 +254,28 @@ class DocumentSummaryService:
 
         return summaries
 
+    async def get_summary_index(self) -> SummaryIndex:
+        """Get the summary embedding matrix, loading it if invalidated.
+
+        Returns:
+            Loaded SummaryIndex
+        """
+        if self.summary_index.is_loaded:
+            return self.summary_index
+
+        generation = self.summary_index.generation
+        result = await self.db.execute(
+            text("SELECT document_id, summary_embedding FROM document_summaries")
+        )
+        rows = result.fetchall()
+
+        self.summary_index.build(
+            [row[0] for row in rows],
+            [np.frombuffer(row[1], dtype=np.float32) for row in rows],
+            generation=generation,
+        )
+        return self.summary_index
+
     async def _store_summary(
         self, document_id: str, summary_text: str, embedding: List[float]
     ):
@@ -166,3 +296,4 @@ class DocumentSummaryService:
             (document_id, summary_text, embedding_bytes, datetime.now().isoformat()),
         )
         await self.db.commit()
+        self.summary_index.invalidate()
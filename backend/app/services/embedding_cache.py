@@ -0,0 +1,270 @@
+"""
+Bounded embedding cache for EmbeddingService.
+
+Keeps float32 embedding vectors in a byte-budgeted LRU and optionally
+backs them with an SQLite file so repeated queries and re-ingested
+documents skip Voyage AI across restarts.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.logging_config import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+
+class EmbeddingCache:
+    """Byte-budgeted LRU of embedding vectors with optional disk backing.
+
+    Uses OrderedDict for O(1) access and LRU eviction. Vectors are stored
+    as float32 arrays (4 bytes per dimension) rather than Python float
+    lists, and the memory tier is bounded by max_bytes.
+
+    When persist_path is set, every new embedding is written through to
+    an SQLite table; memory misses fall back to it and promote the vector
+    back into memory. The disk tier is pruned to max_disk_entries by
+    least-recent use. Its I/O is synchronous, so async callers should run
+    get_many()/put_many() in a thread when persistent is True.
+    """
+
+    PRUNE_BATCH_FRACTION = 0.1  # Extra rows removed per prune to amortize it
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        persist_path: Optional[str] = None,
+        max_disk_entries: int = 200000,
+    ) -> None:
+        """Initialize embedding cache.
+
+        Args:
+            max_bytes: Memory budget for cached vectors (default 256 MB)
+            persist_path: SQLite file for the disk tier (None = memory only)
+            max_disk_entries: Maximum vectors kept on disk (default 200000)
+        """
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._size_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0}
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0
+        if persist_path:
+            self._open_disk(persist_path)
+
+    def _open_disk(self, persist_path: str) -> None:
+        """Open (or create) the SQLite disk tier.
+
+        Failures are logged and the cache continues memory-only.
+        """
+        try:
+            directory = os.path.dirname(os.path.abspath(persist_path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(persist_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used "
+                "ON embeddings(last_used)"
+            )
+            conn.commit()
+            self._disk_entries = conn.execute(
+                "SELECT COUNT(*) FROM embeddings"
+            ).fetchone()[0]
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.error(
+                "Embedding cache disk tier unavailable, using memory only",
+                persist_path=persist_path,
+                error_type=type(e).__name__,
+                error_message=str(e),
+            )
+
+    @property
+    def persistent(self) -> bool:
+        """Whether lookups and writes may touch the SQLite disk tier."""
+        return self._conn is not None
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up several keys at once.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dict of key -> float32 vector for every key that was found
+        """
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+                else:
+                    missing.append(key)
+
+            if missing and self._conn is not None:
+                from_disk = self._load_from_disk(missing)
+                self._stats["disk_hits"] += len(from_disk)
+                for key, vector in from_disk.items():
+                    self._put_memory(key, vector)
+                found.update(from_disk)
+
+            hits = sum(1 for key in keys if key in found)
+            self._stats["hits"] += hits
+            self._stats["misses"] += len(keys) - hits
+
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store vectors in memory and write them through to disk.
+
+        Args:
+            items: Dict of key -> embedding vector
+        """
+        if not items:
+            return
+
+        vectors = {
+            key: np.asarray(vector, dtype=np.float32) for key, vector in items.items()
+        }
+        with self._lock:
+            for key, vector in vectors.items():
+                self._put_memory(key, vector)
+            if self._conn is not None:
+                self._store_on_disk(vectors)
+
+    def _put_memory(self, key: str, vector: np.ndarray) -> None:
+        """Insert into the memory tier, evicting LRU entries over budget."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size_bytes -= previous.nbytes
+        if vector.nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = vector
+        self._size_bytes += vector.nbytes
+        while self._size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size_bytes -= evicted.nbytes
+            self._stats["evictions"] += 1
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Fetch vectors from SQLite and refresh their last-used time."""
+        found: Dict[str, np.ndarray] = {}
+        try:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).copy()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(
+                "Embedding cache disk read failed",
+                error_type=type(e).__name__,
+                error_message=str(e),
+            )
+        return found
+
+    def _store_on_disk(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Write vectors to SQLite and prune the disk tier if over budget."""
+        try:
+            now = time.time()
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) "
+                "VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in vectors.items()],
+            )
+            # Replaced rows count as changes too, so this may overestimate
+            self._disk_entries += self._conn.total_changes - before
+
+            if self._disk_entries > self.max_disk_entries:
+                target = int(self.max_disk_entries * (1 - self.PRUNE_BATCH_FRACTION))
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_used DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (target,),
+                )
+                self._disk_entries = self._conn.execute(
+                    "SELECT COUNT(*) FROM embeddings"
+                ).fetchone()[0]
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(
+                "Embedding cache disk write failed",
+                error_type=type(e).__name__,
+                error_message=str(e),
+            )
+
+    def clear(self) -> int:
+        """Clear both tiers.
+
+        Returns:
+            Number of in-memory entries cleared
+        """
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._size_bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+                self._disk_entries = 0
+        logger.info("Embedding cache cleared", entries_removed=count)
+        return count
+
+    def get_stats(self) -> dict:
+        """Get cache statistics.
+
+        Returns:
+            Dict with hits, misses, evictions, disk_hits, hit_rate,
+            entries, size_bytes, max_bytes and disk_entries
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_entries": self._disk_entries,
+            }
+
+    def close(self) -> None:
+        """Close the disk tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
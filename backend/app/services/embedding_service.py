@@ -5,15 +5,20 @@ Handles batching, rate limiting, retry logic, and caching.
 
 import asyncio
 import hashlib
+import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional
+from typing import Any, Callable, List, Optional, TypeVar
 
+import numpy as np
 import voyageai
 
 from app.core.logging_config import StructuredLogger
+from app.services.embedding_cache import EmbeddingCache
 
 logger = StructuredLogger(__name__)
 
+T = TypeVar("T")
+
 
 class EmbeddingError(Exception):
     """Custom exception for embedding operations."""
@@ -24,27 +29,51 @@ class EmbeddingError(Exception):
 class EmbeddingService:
     """Service for generating embeddings via Voyage AI.
 
-    Uses voyage-4-lite model (1024 dimensions, 200M free tokens).
+    Uses voyage-4-lite model (1024 dimensions by default, 200M free tokens).
     Handles batching, rate limiting, retry logic, and caching.
 
+    Document batches are packed greedily in input order up to both an item
+    limit and a token budget, using the chunk token counts from
+    ChunkService (or a character-based estimate when none are given).
+
     Uses a dedicated ThreadPoolExecutor to prevent starving other
-    async operations under heavy embedding load.
+    async operations under heavy embedding load. Document batches are
+    dispatched concurrently; the concurrency limit is halved on every
+    rate-limit response and grows back by one after a run of successful
+    batches.
     """
 
     MODEL = "voyage-4-lite"
     DIMENSIONS = 1024
     MAX_BATCH_SIZE = 128  # Voyage API limit
+    MAX_BATCH_TOKENS = 100000  # Stay below the per-request token cap
+    CHARS_PER_TOKEN_ESTIMATE = 4  # Fallback when token counts are unknown
     MAX_RETRIES = 3
     RATE_LIMIT_WAIT = 60  # seconds
     SERVER_ERROR_WAIT = 5  # seconds (base for exponential backoff)
     EXECUTOR_WORKERS = 4  # Dedicated thread pool size
-
-    def __init__(self, api_key: str, enable_cache: bool = True) -> None:
+    MAX_CONCURRENT_BATCHES = EXECUTOR_WORKERS  # Upper bound for in-flight batches
+    CONCURRENCY_RECOVERY_BATCHES = 8  # Successes before concurrency grows by one
+
+    def __init__(
+        self,
+        api_key: str,
+        enable_cache: bool = True,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        dimensions: Optional[int] = None,
+    ) -> None:
         """Initialize Voyage AI client with dedicated thread pool.
 
         Args:
             api_key: Voyage AI API key.
             enable_cache: Whether to cache embeddings by content hash.
+            cache: Shared EmbeddingCache (a private in-memory one if omitted).
+            max_batch_size: Texts per request (default MAX_BATCH_SIZE).
+            max_batch_tokens: Tokens per request (default MAX_BATCH_TOKENS).
+            dimensions: Output dimension requested from Voyage (default
+                DIMENSIONS; voyage-4 models accept 256, 512, 1024, 2048).
 
         Raises:
             ValueError: If api_key is empty.
@@ -57,15 +86,53 @@ class EmbeddingService:
             max_workers=self.EXECUTOR_WORKERS,
             thread_name_prefix="embedding_",
         )
-        # Simple in-memory cache for embedding deduplication
+        # Bounded float32 cache for embedding deduplication
         # Key: SHA-256 hash of (text + input_type), Value: embedding vector
-        self._cache: Optional[Dict[str, List[float]]] = {} if enable_cache else None
+        self._cache: Optional[EmbeddingCache] = None
+        if enable_cache:
+            self._cache = cache if cache is not None else EmbeddingCache()
+        self.max_batch_size = min(
+            max_batch_size or self.MAX_BATCH_SIZE, self.MAX_BATCH_SIZE
+        )
+        self.max_batch_tokens = max_batch_tokens or self.MAX_BATCH_TOKENS
+        self.dimensions = dimensions or self.DIMENSIONS
+        self._batch_stats = {
+            "batches": 0,
+            "texts": 0,
+            "tokens": 0,
+            "latency_ms": 0.0,
+        }
+        # Adaptive batch concurrency, shared by all embed_documents calls
+        self._concurrency = self.MAX_CONCURRENT_BATCHES
+        self._successes_since_rate_limit = 0
+
+    @property
+    def cache(self) -> Optional[EmbeddingCache]:
+        """Embedding cache in use, or None when caching is disabled."""
+        return self._cache
 
     def _get_cache_key(self, text: str, input_type: str) -> str:
-        """Generate cache key from text content hash."""
+        """Generate cache key from text content hash.
+
+        Non-default output dimensions are part of the key so vectors of
+        different widths never collide in a shared cache.
+        """
         content = f"{input_type}:{text}"
+        if self.dimensions != self.DIMENSIONS:
+            content = f"{self.dimensions}:{content}"
         return hashlib.sha256(content.encode()).hexdigest()
 
+    async def _run_cache(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a cache lookup or write, in a thread when it touches disk.
+
+        The SQLite disk tier would otherwise block the event loop; the
+        default executor is used so cache hits never wait behind Voyage
+        requests on self._executor.
+        """
+        if self._cache is not None and self._cache.persistent:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
     def _check_cache(
         self, texts: List[str], input_type: str
     ) -> tuple[List[str], List[int], List[tuple[int, List[float]]]]:
@@ -77,14 +144,16 @@ class EmbeddingService:
         if self._cache is None:
             return texts, list(range(len(texts))), []
 
+        keys = [self._get_cache_key(text, input_type) for text in texts]
+        found = self._cache.get_many(keys)
+
         texts_to_embed: List[str] = []
         indices_to_embed: List[int] = []
         cached_results: List[tuple[int, List[float]]] = []
 
-        for i, text in enumerate(texts):
-            key = self._get_cache_key(text, input_type)
-            if key in self._cache:
-                cached_results.append((i, self._cache[key]))
+        for i, (text, key) in enumerate(zip(texts, keys)):
+            if key in found:
+                cached_results.append((i, found[key].tolist()))
             else:
                 texts_to_embed.append(text)
                 indices_to_embed.append(i)
@@ -93,35 +162,118 @@ class EmbeddingService:
 
     def _update_cache(
         self, texts: List[str], embeddings: List[List[float]], input_type: str
-    ) -> None:
-        """Update cache with new embeddings."""
+    ) -> List[List[float]]:
+        """Update cache with new embeddings.
+
+        Returns:
+            The embeddings as stored, so fresh and cached results are
+            identical (float32 precision) when caching is enabled.
+        """
         if self._cache is None:
-            return
-        for text, embedding in zip(texts, embeddings):
-            key = self._get_cache_key(text, input_type)
-            self._cache[key] = embedding
+            return embeddings
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        self._cache.put_many(
+            {
+                self._get_cache_key(text, input_type): vector
+                for text, vector in zip(texts, vectors)
+            }
+        )
+        return vectors.tolist()
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Rough token count for texts without a ChunkService count."""
+        return len(text) // self.CHARS_PER_TOKEN_ESTIMATE + 1
+
+    def _pack_batches(
+        self, texts: List[str], token_counts: List[int]
+    ) -> List[tuple[int, int]]:
+        """Split texts into consecutive batches within the item/token limits.
+
+        A single text larger than the token budget gets a batch of its own.
 
-    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        Returns:
+            List of (start, end) index ranges into texts.
+        """
+        batches: List[tuple[int, int]] = []
+        start = 0
+        batch_tokens = 0
+        for i, tokens in enumerate(token_counts):
+            if i > start and (
+                i - start >= self.max_batch_size
+                or batch_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append((start, i))
+                start = i
+                batch_tokens = 0
+            batch_tokens += tokens
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    async def embed_documents(
+        self, texts: List[str], token_counts: Optional[List[int]] = None
+    ) -> List[List[float]]:
         """Generate embeddings for document chunks.
 
         Args:
             texts: List of text chunks to embed.
+            token_counts: Token count per text (e.g. Chunk.token_count),
+                used to pack requests up to the token budget.
 
         Returns:
-            List of 1024-dimensional embedding vectors.
+            List of embedding vectors (self.dimensions wide).
 
         Raises:
             EmbeddingError: If embedding fails after retries.
         """
-        all_embeddings: List[List[float]] = []
-
-        # Process in batches
-        for i in range(0, len(texts), self.MAX_BATCH_SIZE):
-            batch = texts[i : i + self.MAX_BATCH_SIZE]
-            embeddings = await self._embed_batch(batch, input_type="document")
-            all_embeddings.extend(embeddings)
-
-        return all_embeddings
+        if token_counts is None or len(token_counts) != len(texts):
+            token_counts = [self._estimate_tokens(text) for text in texts]
+
+        batches = [
+            (texts[start:end], token_counts[start:end])
+            for start, end in self._pack_batches(texts, token_counts)
+        ]
+        if not batches:
+            return []
+        if len(batches) == 1:
+            return await self._embed_batch(
+                batches[0][0], input_type="document", token_counts=batches[0][1]
+            )
+
+        # Bounded-concurrency dispatch; the limit is re-read on every
+        # acquire so rate-limit adjustments apply to queued batches
+        condition = asyncio.Condition()
+        in_flight = 0
+
+        async def embed_with_limit(
+            batch: List[str], batch_token_counts: List[int]
+        ) -> List[List[float]]:
+            nonlocal in_flight
+            async with condition:
+                await condition.wait_for(lambda: in_flight < self._concurrency)
+                in_flight += 1
+            try:
+                return await self._embed_batch(
+                    batch, input_type="document", token_counts=batch_token_counts
+                )
+            finally:
+                async with condition:
+                    in_flight -= 1
+                    condition.notify_all()
+
+        tasks = [
+            asyncio.create_task(embed_with_limit(batch, batch_token_counts))
+            for batch, batch_token_counts in batches
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # gather preserves batch order
+        return [embedding for batch in results for embedding in batch]
 
     async def embed_query(self, text: str) -> List[float]:
         """Generate embedding for a search query.
@@ -130,7 +282,7 @@ class EmbeddingService:
             text: Query text to embed.
 
         Returns:
-            1024-dimensional embedding vector.
+            Embedding vector (self.dimensions wide).
 
         Raises:
             EmbeddingError: If embedding fails after retries.
@@ -139,13 +291,17 @@ class EmbeddingService:
         return embeddings[0]
 
     async def _embed_batch(
-        self, texts: List[str], input_type: str
+        self,
+        texts: List[str],
+        input_type: str,
+        token_counts: Optional[List[int]] = None,
     ) -> List[List[float]]:
         """Embed a batch of texts with retry logic.
 
         Args:
             texts: Texts to embed (max 128).
             input_type: "document" or "query".
+            token_counts: Token count per text, for batch metrics.
 
         Returns:
             List of embedding vectors.
@@ -154,8 +310,8 @@ class EmbeddingService:
             EmbeddingError: If all retries fail.
         """
         # Check cache first
-        texts_to_embed, indices_to_embed, cached_results = self._check_cache(
-            texts, input_type
+        texts_to_embed, indices_to_embed, cached_results = await self._run_cache(
+            self._check_cache, texts, input_type
         )
 
         # If all cached, reconstruct and return
@@ -165,11 +321,16 @@ class EmbeddingService:
                 result[idx] = emb
             return result  # type: ignore
 
+        if token_counts is None:
+            token_counts = [self._estimate_tokens(text) for text in texts]
+        batch_tokens = sum(token_counts[i] for i in indices_to_embed)
+
         last_error: Optional[Exception] = None
 
         for attempt in range(self.MAX_RETRIES):
             try:
                 # Run sync Voyage client in dedicated thread pool
+                started = time.perf_counter()
                 loop = asyncio.get_event_loop()
                 result = await loop.run_in_executor(
                     self._executor,
@@ -177,11 +338,22 @@ class EmbeddingService:
                         texts=texts_to_embed,
                         model=self.MODEL,
                         input_type=input_type,
+                        output_dimension=self.dimensions,
                     ),
                 )
 
+                self._record_batch_success()
+                self._record_batch_metrics(
+                    len(texts_to_embed),
+                    batch_tokens,
+                    (time.perf_counter() - started) * 1000,
+                    input_type,
+                )
+
                 # Update cache
-                self._update_cache(texts_to_embed, result.embeddings, input_type)
+                embeddings = await self._run_cache(
+                    self._update_cache, texts_to_embed, result.embeddings, input_type
+                )
 
                 # Reconstruct full result with cached values
                 if cached_results:
@@ -189,17 +361,19 @@ class EmbeddingService:
                     for idx, emb in cached_results:
                         full_result[idx] = emb
                     for i, idx in enumerate(indices_to_embed):
-                        full_result[idx] = result.embeddings[i]
+                        full_result[idx] = embeddings[i]
                     return full_result  # type: ignore
                 else:
-                    return result.embeddings
+                    return embeddings
 
             except voyageai.error.RateLimitError as e:
+                self._record_rate_limit()
                 logger.warning(
                     "Rate limited, waiting",
                     wait_seconds=self.RATE_LIMIT_WAIT,
                     attempt=attempt + 1,
                     max_retries=self.MAX_RETRIES,
+                    concurrency=self._concurrency,
                 )
                 await asyncio.sleep(self.RATE_LIMIT_WAIT)
                 last_error = e
@@ -227,6 +401,58 @@ class EmbeddingService:
             "Embedding service temporarily unavailable. Please try again later."
         ) from last_error
 
+    def _record_batch_metrics(
+        self, text_count: int, tokens: int, latency_ms: float, input_type: str
+    ) -> None:
+        """Log one successful request and add it to the running totals."""
+        self._batch_stats["batches"] += 1
+        self._batch_stats["texts"] += text_count
+        self._batch_stats["tokens"] += tokens
+        self._batch_stats["latency_ms"] += latency_ms
+        logger.info(
+            "Embedding batch complete",
+            input_type=input_type,
+            texts=text_count,
+            tokens=tokens,
+            latency_ms=round(latency_ms, 1),
+        )
+
+    def get_batch_stats(self) -> dict:
+        """Get embedding request statistics.
+
+        Returns:
+            Dict with batches, texts, tokens, latency_ms (total) and
+            avg_tokens_per_batch / avg_latency_ms
+        """
+        batches = self._batch_stats["batches"]
+        return {
+            **self._batch_stats,
+            "avg_tokens_per_batch": (
+                self._batch_stats["tokens"] / batches if batches else 0.0
+            ),
+            "avg_latency_ms": (
+                self._batch_stats["latency_ms"] / batches if batches else 0.0
+            ),
+        }
+
+    def _record_rate_limit(self) -> None:
+        """Halve batch concurrency after a rate-limit response."""
+        self._successes_since_rate_limit = 0
+        self._concurrency = max(1, self._concurrency // 2)
+
+    def _record_batch_success(self) -> None:
+        """Grow batch concurrency back after enough successful batches."""
+        self._successes_since_rate_limit += 1
+        if (
+            self._concurrency < self.MAX_CONCURRENT_BATCHES
+            and self._successes_since_rate_limit >= self.CONCURRENCY_RECOVERY_BATCHES
+        ):
+            self._concurrency += 1
+            self._successes_since_rate_limit = 0
+
     def shutdown(self) -> None:
-        """Shutdown the thread pool executor."""
+        """Shutdown the thread pool executor and close the cache."""
         self._executor.shutdown(wait=True)
+        if self._cache is not None:
+            logger.info("Embedding cache statistics", **self._cache.get_stats())
+            self._cache.close()
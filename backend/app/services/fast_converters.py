@@ -0,0 +1,370 @@
+"""
+Fast-path converters that avoid the full Docling pipeline.
+Handles born-digital PDFs (text layer), simple DOCX files and plain
+HTML articles, with quality checks that tell the caller when to fall
+back to Docling.
+"""
+
+import re
+import zipfile
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import List, Optional
+from xml.etree import ElementTree
+
+from app.core.logging_config import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+# Quality thresholds
+MIN_TOTAL_CHARS = 200  # Below this the extraction is not trusted
+MIN_PDF_CHARS_PER_PAGE = 200  # Average text per page for a real text layer
+MIN_PDF_TEXT_PAGE_RATIO = 0.9  # Share of pages that must carry text
+MIN_ALNUM_RATIO = 0.6  # Share of non-space chars that are letters/digits
+MAX_GARBLED_RATIO = 0.01  # (cid:N) glyphs / U+FFFD per char
+
+
+@dataclass
+class FastConversion:
+    """Result of a fast-path conversion attempt."""
+
+    tier: str
+    markdown: str = ""
+    title: Optional[str] = None
+    escalation_reason: Optional[str] = None  # None = accepted
+
+    @property
+    def accepted(self) -> bool:
+        """Whether the output is good enough to skip Docling."""
+        return self.escalation_reason is None
+
+
+def title_from_markdown(markdown: str) -> Optional[str]:
+    """Extract title from first H1 heading."""
+    for line in markdown.split("\n"):
+        line = line.strip()
+        if line.startswith("# "):
+            return line[2:].strip()
+    return None
+
+
+def _text_quality_issue(text: str) -> Optional[str]:
+    """Check extracted text for signs of a bad or missing text layer.
+
+    Returns:
+        Reason to escalate, or None if the text looks usable.
+    """
+    if len(text.strip()) < MIN_TOTAL_CHARS:
+        return "too little text"
+    visible = [c for c in text if not c.isspace()]
+    alnum = sum(1 for c in visible if c.isalnum())
+    if alnum / len(visible) < MIN_ALNUM_RATIO:
+        return "low alphanumeric ratio"
+    garbled = text.count("(cid:") + text.count("\ufffd")
+    if garbled / len(text) > MAX_GARBLED_RATIO:
+        return "garbled glyphs"
+    return None
+
+
+# =============================================================================
+# PDF
+# =============================================================================
+
+
+def convert_pdf(file_path: str) -> FastConversion:
+    """Extract the text layer of a born-digital PDF with pypdfium2.
+
+    Pages become paragraphs; scanned or image-only PDFs fail the
+    per-page checks and are escalated to Docling for OCR/layout.
+    """
+    result = FastConversion(tier="pdf_text_layer")
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        result.escalation_reason = "pypdfium2 not installed"
+        return result
+
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        pages: List[str] = []
+        for index in range(len(pdf)):
+            page = pdf[index]
+            text_page = page.get_textpage()
+            try:
+                pages.append(text_page.get_text_range())
+            finally:
+                text_page.close()
+                page.close()
+    finally:
+        pdf.close()
+
+    if not pages:
+        result.escalation_reason = "no pages"
+        return result
+
+    text_pages = sum(1 for p in pages if len(p.strip()) >= 20)
+    if text_pages / len(pages) < MIN_PDF_TEXT_PAGE_RATIO:
+        result.escalation_reason = "pages without text layer"
+        return result
+    if sum(len(p) for p in pages) / len(pages) < MIN_PDF_CHARS_PER_PAGE:
+        result.escalation_reason = "sparse text layer"
+        return result
+
+    markdown = "\n\n".join(_pdf_page_to_markdown(p) for p in pages if p.strip())
+    result.escalation_reason = _text_quality_issue(markdown)
+    result.markdown = markdown
+    result.title = title_from_markdown(markdown)
+    return result
+
+
+def _pdf_page_to_markdown(text: str) -> str:
+    """Reflow one page: join wrapped lines, keep blank-line paragraphs."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    paragraphs = re.split(r"\n\s*\n", text)
+    reflowed = []
+    for paragraph in paragraphs:
+        # De-hyphenate words broken across lines, then join the lines
+        joined = re.sub(r"-\n(?=[a-z])", "", paragraph.strip())
+        joined = re.sub(r"\s*\n\s*", " ", joined)
+        if joined:
+            reflowed.append(joined)
+    return "\n\n".join(reflowed)
+
+
+# =============================================================================
+# DOCX
+# =============================================================================
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def convert_docx(file_path: str) -> FastConversion:
+    """Convert a simple DOCX by reading word/document.xml directly.
+
+    Headings (Title/Heading1-6 styles) and list paragraphs are mapped to
+    markdown. Documents with tables, drawings or equations are escalated,
+    since Docling reconstructs those far better.
+    """
+    result = FastConversion(tier="docx_xml")
+    with zipfile.ZipFile(file_path) as archive:
+        xml = archive.read("word/document.xml")
+
+    root = ElementTree.fromstring(xml)
+    body = root.find(f"{_W}body")
+    if body is None:
+        result.escalation_reason = "missing document body"
+        return result
+
+    for tag, reason in (
+        (f"{_W}tbl", "contains tables"),
+        (f"{_W}drawing", "contains drawings"),
+        (
+            "{http://schemas.openxmlformats.org/officeDocument/2006/math}oMath",
+            "contains equations",
+        ),
+    ):
+        if body.find(f".//{tag}") is not None:
+            result.escalation_reason = reason
+            return result
+
+    blocks: List[str] = []
+    for paragraph in body.iter(f"{_W}p"):
+        text = "".join(
+            (node.text or "") if node.tag == f"{_W}t" else "\t"
+            for node in paragraph.iter()
+            if node.tag in (f"{_W}t", f"{_W}tab")
+        ).strip()
+        if not text:
+            continue
+
+        style = paragraph.find(f"{_W}pPr/{_W}pStyle")
+        style_name = style.get(f"{_W}val", "") if style is not None else ""
+        heading = re.fullmatch(r"Heading([1-6])", style_name)
+        if style_name == "Title":
+            blocks.append(f"# {text}")
+        elif heading:
+            blocks.append(f"{'#' * int(heading.group(1))} {text}")
+        elif paragraph.find(f"{_W}pPr/{_W}numPr") is not None:
+            blocks.append(f"- {text}")
+        else:
+            blocks.append(text)
+
+    markdown = "\n\n".join(blocks)
+    result.escalation_reason = _text_quality_issue(markdown)
+    result.markdown = markdown
+    result.title = title_from_markdown(markdown)
+    return result
+
+
+# =============================================================================
+# HTML
+# =============================================================================
+
+
+class _ArticleExtractor(HTMLParser):
+    """Readability-style HTML to markdown converter.
+
+    Drops boilerplate containers (nav, header, footer, aside, forms,
+    scripts) and keeps headings, paragraphs, list items, code blocks and
+    quotes. Content inside <article>/<main> is collected separately so
+    the caller can prefer it over the whole page.
+    """
+
+    SKIP_TAGS = {
+        "script",
+        "style",
+        "noscript",
+        "nav",
+        "header",
+        "footer",
+        "aside",
+        "form",
+        "iframe",
+        "svg",
+        "button",
+        "template",
+    }
+    BLOCK_PREFIXES = {
+        "h1": "# ",
+        "h2": "## ",
+        "h3": "### ",
+        "h4": "#### ",
+        "h5": "##### ",
+        "h6": "###### ",
+        "li": "- ",
+        "blockquote": "> ",
+        "p": "",
+        "pre": "",
+        "div": "",
+        "section": "",
+        "td": "",
+        "th": "",
+    }
+    VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.page_blocks: List[str] = []
+        self.main_blocks: List[str] = []
+        self.table_count = 0
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+        self._block_tag: Optional[str] = None
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in self.VOID_TAGS:
+            if tag == "br" and not self._skip_depth:
+                self._buffer.append("\n")
+            return
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if tag == "title":
+            self._in_title = True
+        elif tag in ("article", "main"):
+            self._main_depth += 1
+        elif tag == "table":
+            self.table_count += 1
+        if tag in self.BLOCK_PREFIXES:
+            self._flush()
+            self._block_tag = tag
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.VOID_TAGS:
+            return
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if tag == "title":
+            self._in_title = False
+        if tag in self.BLOCK_PREFIXES:
+            self._flush()
+        if tag in ("article", "main"):
+            self._main_depth = max(0, self._main_depth - 1)
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title = (self.title or "") + data.strip()
+            return
+        self._buffer.append(data)
+
+    def _flush(self) -> None:
+        """Emit the buffered text as one markdown block."""
+        raw = "".join(self._buffer)
+        self._buffer = []
+        if self._block_tag == "pre":
+            text = raw.strip("\n")
+            block = f"```\n{text}\n```" if text.strip() else ""
+        else:
+            text = re.sub(r"\s+", " ", raw).strip()
+            prefix = self.BLOCK_PREFIXES.get(self._block_tag or "", "")
+            block = f"{prefix}{text}" if text else ""
+        self._block_tag = None
+        if not block:
+            return
+        self.page_blocks.append(block)
+        if self._main_depth:
+            self.main_blocks.append(block)
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+
+def convert_html(html: str) -> FastConversion:
+    """Convert a plain HTML article to markdown without Docling.
+
+    Prefers <article>/<main> content when it holds most of the text.
+    Pages built around tables are escalated.
+    """
+    result = FastConversion(tier="html_readability")
+    parser = _ArticleExtractor()
+    parser.feed(html)
+    parser.close()
+
+    blocks = parser.page_blocks
+    main_chars = sum(len(b) for b in parser.main_blocks)
+    if main_chars >= MIN_TOTAL_CHARS:
+        blocks = parser.main_blocks
+
+    if parser.table_count:
+        result.escalation_reason = "contains tables"
+        return result
+
+    markdown = "\n\n".join(blocks)
+    if parser.title and not markdown.lstrip().startswith("# "):
+        markdown = f"# {parser.title}\n\n{markdown}"
+
+    result.escalation_reason = _text_quality_issue(markdown)
+    result.markdown = markdown
+    result.title = parser.title or title_from_markdown(markdown)
+    return result
+
+
+def convert_file(file_path: str, file_type: str) -> Optional[FastConversion]:
+    """Run the fast-path converter for a file type.
+
+    Args:
+        file_path: Path to the file.
+        file_type: One of 'pdf', 'docx', 'html'.
+
+    Returns:
+        FastConversion, or None if the type has no fast path.
+    """
+    if file_type == "pdf":
+        return convert_pdf(file_path)
+    if file_type == "docx":
+        return convert_docx(file_path)
+    if file_type == "html":
+        with open(file_path, encoding="utf-8", errors="replace") as f:
+            return convert_html(f.read())
+    return None
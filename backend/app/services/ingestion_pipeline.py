@@ -0,0 +1,527 @@
+"""
+Streaming ingestion pipeline for document chunks.
+Overlaps chunk persistence, embedding and vector store writes using async
+stages joined by bounded queues.
+"""
+
+import asyncio
+import hashlib
+import uuid
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging_config import StructuredLogger
+from app.models.document import Chunk as ChunkRecord
+from app.services.chunk_service import Chunk
+from app.services.task_manager import TaskManager
+
+logger = StructuredLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+@dataclass
+class ChunkBatch:
+    """A group of chunks moving through the pipeline."""
+
+    ids: List[str]
+    texts: List[str]
+    token_counts: List[int]
+    metadatas: List[Dict[str, Any]]
+    embeddings: Optional[List[List[float]]] = None
+
+
+@dataclass
+class IngestionResult:
+    """Outcome of a pipeline run."""
+
+    chunk_count: int = 0
+    embedded_count: int = 0
+    batch_count: int = 0
+    chunk_ids: List[str] = field(default_factory=list)
+    reused_count: int = 0  # Re-ingestion: unchanged chunks kept as-is
+    removed_count: int = 0  # Re-ingestion: stored chunks deleted
+    resumed_count: int = 0  # Stored chunks whose vectors were still missing
+
+
+@dataclass
+class ChunkDiff:
+    """How a document's new chunks relate to its stored chunk rows."""
+
+    kept: List[Tuple[ChunkRecord, Chunk]] = field(default_factory=list)
+    added: List[Chunk] = field(default_factory=list)
+    removed: List[ChunkRecord] = field(default_factory=list)
+
+
+async def _from_iterable(chunks: Iterable[Chunk]) -> AsyncIterator[Chunk]:
+    """Adapt a plain iterable to the async chunk stream _produce() reads."""
+    for chunk in chunks:
+        yield chunk
+
+
+def position_metadata(start_char: int, end_char: int) -> str:
+    """Chunk position JSON, formatted directly instead of via json.dumps."""
+    return f'{{"start_char": {start_char}, "end_char": {end_char}}}'
+
+
+async def insert_chunk_rows(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Insert chunk rows with a single executemany INSERT.
+
+    Bypasses the ORM unit of work: no Chunk objects are created or
+    tracked, and ids are generated by the caller so nothing needs to be
+    read back. The caller commits.
+
+    Args:
+        db: Database session
+        rows: Column values keyed by chunks table column name
+    """
+    if rows:
+        await db.execute(insert(ChunkRecord.__table__), rows)
+
+
+async def mark_vectors_stored(db: AsyncSession, chunk_ids: List[str]) -> None:
+    """Checkpoint chunk rows whose vectors are in the vector store.
+
+    The caller commits.
+
+    Args:
+        db: Database session
+        chunk_ids: Chunk row ids written to the vector store
+    """
+    if chunk_ids:
+        await db.execute(
+            update(ChunkRecord.__table__)
+            .where(ChunkRecord.id.in_(chunk_ids))
+            .values(vector_stored=True)
+        )
+
+
+def vector_metadata(document_id: str, chunk: Chunk) -> Dict[str, Any]:
+    """Metadata stored with a chunk's vector."""
+    return {
+        "document_id": document_id,
+        "chunk_index": chunk.index,
+        "start_char": chunk.start_char,
+        "end_char": chunk.end_char,
+    }
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest identifying a chunk's content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def diff_chunks(stored: List[ChunkRecord], chunks: List[Chunk]) -> ChunkDiff:
+    """Match new chunks to stored rows by content hash.
+
+    Each stored row matches at most one new chunk; repeated content is
+    matched in chunk order. Unmatched new chunks are added, unmatched
+    rows are removed.
+
+    Args:
+        stored: Existing chunk rows of the document
+        chunks: New chunks in index order
+
+    Returns:
+        ChunkDiff with kept (row, chunk) pairs, added chunks and removed rows
+    """
+    by_hash: Dict[str, List[ChunkRecord]] = {}
+    for row in sorted(stored, key=lambda r: r.chunk_index):
+        by_hash.setdefault(content_hash(row.content), []).append(row)
+
+    diff = ChunkDiff()
+    for chunk in chunks:
+        rows = by_hash.get(content_hash(chunk.content))
+        if rows:
+            diff.kept.append((rows.pop(0), chunk))
+        else:
+            diff.added.append(chunk)
+    diff.removed = [row for rows in by_hash.values() for row in rows]
+    return diff
+
+
+class IngestionPipeline:
+    """Chunk → persist → embed → vector-write pipeline.
+
+    Stages run concurrently and hand batches over through bounded
+    asyncio queues, so the first chunks become searchable while later
+    ones are still being embedded and at most QUEUE_SIZE batches per
+    stage are held in memory. Progress is reported to TaskManager after
+    every vector write.
+
+    Vectors are written with idempotent upserts, and each written batch
+    is checkpointed by setting vector_stored on its chunk rows. A failed
+    or interrupted ingestion therefore resumes (via reingest()) from the
+    last stored batch instead of re-embedding the whole document.
+
+    The embed stage hands several queued batches to embed_documents at
+    once (up to embed_group_size chunks), so the embedding service packs
+    full-size requests and dispatches them concurrently under its
+    adaptive limit. Batches are still written and checkpointed one by
+    one, in order.
+
+    The producer (row inserts) and writer (checkpoints) share one
+    AsyncSession, which must not be used concurrently, so both take
+    _db_lock around each statement-and-commit.
+    """
+
+    BATCH_SIZE = 64  # Chunks per pipeline batch
+    QUEUE_SIZE = 2  # Batches buffered between stages
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        task_manager: TaskManager,
+        embedding_service=None,
+        vector_store=None,
+        batch_size: Optional[int] = None,
+        embed_group_size: Optional[int] = None,
+    ) -> None:
+        """Initialize ingestion pipeline.
+
+        Args:
+            db: Database session for chunk persistence
+            task_manager: TaskManager for progress reporting
+            embedding_service: EmbeddingService (None = persist chunks only)
+            vector_store: VectorStoreInterface for embedded chunks
+            batch_size: Chunks per batch (default BATCH_SIZE)
+            embed_group_size: Most chunks per embed_documents call (default
+                enough to fill the embedding service's concurrent requests)
+        """
+        self.db = db
+        self.task_manager = task_manager
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.batch_size = batch_size or self.BATCH_SIZE
+        if embed_group_size is None and embedding_service is not None:
+            embed_group_size = (
+                embedding_service.max_batch_size
+                * embedding_service.MAX_CONCURRENT_BATCHES
+            )
+        self.embed_group_size = max(embed_group_size or 0, self.batch_size)
+        self._db_lock = asyncio.Lock()
+
+    async def run(
+        self,
+        task_id: str,
+        document_id: str,
+        chunks: Union[Iterable[Chunk], AsyncIterable[Chunk]],
+        total_chunks: Optional[int] = None,
+        unstored: Sequence[Tuple[str, Chunk]] = (),
+    ) -> IngestionResult:
+        """Stream chunks through persistence, embedding and vector writes.
+
+        Args:
+            task_id: Task identifier for progress updates
+            document_id: Document the chunks belong to
+            chunks: Chunks in index order (list, generator or async
+                iterator such as ChunkService.aiter_chunks())
+            total_chunks: Total chunk count if known, for progress messages
+            unstored: (row id, chunk) pairs already in SQLite but without
+                vectors; embedded and written before the new chunks
+
+        Returns:
+            IngestionResult with counts and the stored chunk IDs
+
+        Raises:
+            Exception: The first error raised by any stage; the other
+                stages are cancelled.
+        """
+        result = IngestionResult()
+        embed_enabled = (
+            self.embedding_service is not None and self.vector_store is not None
+        )
+        # Room for a full embedding group, so the embed stage finds one queued
+        embed_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=max(self.QUEUE_SIZE, self.embed_group_size // self.batch_size)
+        )
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+
+        stages = [
+            self._produce(
+                document_id, chunks, unstored, embed_queue, result, embed_enabled
+            )
+        ]
+        if embed_enabled:
+            stages.append(self._embed(embed_queue, write_queue))
+            stages.append(self._write(task_id, write_queue, result, total_chunks))
+
+        tasks = [asyncio.create_task(stage) for stage in stages]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Cancelling a stage inside a statement would invalidate the
+            # shared session's connection, so let it finish first
+            async with self._db_lock:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        logger.info(
+            "Ingestion pipeline complete",
+            document_id=document_id,
+            chunks=result.chunk_count,
+            embedded=result.embedded_count,
+            batches=result.batch_count,
+        )
+        return result
+
+    async def reingest(
+        self, task_id: str, document_id: str, chunks: List[Chunk]
+    ) -> IngestionResult:
+        """Update a document's stored chunks to match a new chunking.
+
+        Chunks whose content is unchanged keep their rows and vectors,
+        with chunk_index and offsets updated in place (and in the vector
+        metadata when they changed). Removed chunks are
+        deleted from SQLite and the vector store, and only new or changed
+        chunks go through run() to be embedded, together with kept rows
+        whose vectors were never stored (an interrupted ingestion).
+
+        Args:
+            task_id: Task identifier for progress updates
+            document_id: Document being re-ingested
+            chunks: The document's new chunks in index order
+
+        Returns:
+            IngestionResult for the added chunks, plus reused/removed counts
+        """
+        rows_result = await self.db.execute(
+            select(ChunkRecord).where(ChunkRecord.document_id == document_id)
+        )
+        diff = diff_chunks(list(rows_result.scalars().all()), chunks)
+        embed_enabled = (
+            self.embedding_service is not None and self.vector_store is not None
+        )
+
+        if diff.removed:
+            if embed_enabled:
+                await self.vector_store.adelete([row.id for row in diff.removed])
+            for row in diff.removed:
+                await self.db.delete(row)
+            await self.db.flush()
+
+        # Renumber in two steps so (document_id, chunk_index) stays unique
+        moved = [
+            (row, chunk) for row, chunk in diff.kept if row.chunk_index != chunk.index
+        ]
+        unstored = [
+            (row.id, chunk) for row, chunk in diff.kept if not row.vector_stored
+        ]
+        changed = [
+            (row, chunk)
+            for row, chunk in diff.kept
+            if row.vector_stored
+            and (row.chunk_index, row.start_char, row.end_char)
+            != (chunk.index, chunk.start_char, chunk.end_char)
+        ]
+        for row, chunk in moved:
+            row.chunk_index = -1 - chunk.index
+        await self.db.flush()
+        for row, chunk in diff.kept:
+            row.chunk_index = chunk.index
+            row.start_char = chunk.start_char
+            row.end_char = chunk.end_char
+            row.chunk_metadata = position_metadata(chunk.start_char, chunk.end_char)
+        await self.db.commit()
+
+        if embed_enabled and changed:
+            await self.vector_store.aupdate_metadatas(
+                ids=[row.id for row, _ in changed],
+                metadatas=[vector_metadata(document_id, chunk) for _, chunk in changed],
+            )
+
+        if not embed_enabled:
+            unstored = []
+        result = await self.run(
+            task_id,
+            document_id,
+            diff.added,
+            total_chunks=len(diff.added) + len(unstored),
+            unstored=unstored,
+        )
+        result.reused_count = len(diff.kept) - len(unstored)
+        result.removed_count = len(diff.removed)
+
+        logger.info(
+            "Incremental re-ingestion complete",
+            document_id=document_id,
+            reused=result.reused_count,
+            added=result.chunk_count,
+            removed=result.removed_count,
+            resumed=result.resumed_count,
+            renumbered=len(moved),
+        )
+        return result
+
+    async def _produce(
+        self,
+        document_id: str,
+        chunks: Union[Iterable[Chunk], AsyncIterable[Chunk]],
+        unstored: Sequence[Tuple[str, Chunk]],
+        out_queue: asyncio.Queue,
+        result: IngestionResult,
+        forward: bool,
+    ) -> None:
+        """Group chunks into batches, persist them and pass them on.
+
+        Already persisted chunks in unstored are only forwarded.
+        """
+        if forward:
+            for start in range(0, len(unstored), self.batch_size):
+                pairs = unstored[start : start + self.batch_size]
+                await out_queue.put(
+                    self._make_batch(
+                        document_id,
+                        [chunk_id for chunk_id, _ in pairs],
+                        [chunk for _, chunk in pairs],
+                    )
+                )
+                result.resumed_count += len(pairs)
+
+        if not hasattr(chunks, "__aiter__"):
+            chunks = _from_iterable(chunks)
+        batch: List[Chunk] = []
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    await self._persist_and_forward(
+                        document_id, batch, out_queue, result, forward
+                    )
+                    batch = []
+        if batch:
+            await self._persist_and_forward(
+                document_id, batch, out_queue, result, forward
+            )
+        if forward:
+            await out_queue.put(_DONE)
+
+    async def _persist_and_forward(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        out_queue: asyncio.Queue,
+        result: IngestionResult,
+        forward: bool,
+    ) -> None:
+        """Store one batch of chunk rows and queue it for embedding."""
+        ids = [str(uuid.uuid4()) for _ in chunks]
+        async with self._db_lock:
+            await insert_chunk_rows(
+                self.db,
+                [
+                    {
+                        "id": chunk_id,
+                        "document_id": document_id,
+                        "chunk_index": chunk.index,
+                        "content": chunk.content,
+                        "token_count": chunk.token_count,
+                        "start_char": chunk.start_char,
+                        "end_char": chunk.end_char,
+                        "chunk_metadata": position_metadata(
+                            chunk.start_char, chunk.end_char
+                        ),
+                        "vector_stored": False,
+                    }
+                    for chunk_id, chunk in zip(ids, chunks)
+                ],
+            )
+            await self.db.commit()
+
+        result.chunk_count += len(chunks)
+        result.chunk_ids.extend(ids)
+
+        if forward:
+            await out_queue.put(self._make_batch(document_id, ids, chunks))
+
+    @staticmethod
+    def _make_batch(
+        document_id: str, ids: List[str], chunks: List[Chunk]
+    ) -> ChunkBatch:
+        """Build the embedding batch for chunks stored under ids."""
+        return ChunkBatch(
+            ids=ids,
+            texts=[c.content for c in chunks],
+            token_counts=[c.token_count for c in chunks],
+            metadatas=[vector_metadata(document_id, c) for c in chunks],
+        )
+
+    async def _embed(self, in_queue: asyncio.Queue, out_queue: asyncio.Queue) -> None:
+        """Embed batches as they arrive, grouping those already queued.
+
+        Waits for one batch, then adds whatever is queued behind it up to
+        embed_group_size chunks, so the first batch is never held back.
+        """
+        done = False
+        while not done:
+            batch = await in_queue.get()
+            if batch is _DONE:
+                break
+            group = [batch]
+            size = len(batch.ids)
+            while size + self.batch_size <= self.embed_group_size:
+                try:
+                    batch = in_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if batch is _DONE:
+                    done = True
+                    break
+                group.append(batch)
+                size += len(batch.ids)
+
+            embeddings = await self.embedding_service.embed_documents(
+                [text for batch in group for text in batch.texts],
+                token_counts=[count for batch in group for count in batch.token_counts],
+            )
+            start = 0
+            for batch in group:
+                batch.embeddings = embeddings[start : start + len(batch.ids)]
+                start += len(batch.ids)
+                await out_queue.put(batch)
+        await out_queue.put(_DONE)
+
+    async def _write(
+        self,
+        task_id: str,
+        in_queue: asyncio.Queue,
+        result: IngestionResult,
+        total_chunks: Optional[int],
+    ) -> None:
+        """Upsert embedded batches, checkpoint them and report progress."""
+        while True:
+            batch = await in_queue.get()
+            if batch is _DONE:
+                return
+            await self.vector_store.aupsert(
+                ids=batch.ids,
+                embeddings=batch.embeddings,
+                metadatas=batch.metadatas,
+                documents=batch.texts,
+            )
+            async with self._db_lock:
+                await mark_vectors_stored(self.db, batch.ids)
+                await self.db.commit()
+            result.embedded_count += len(batch.ids)
+            result.batch_count += 1
+            self.task_manager.update_embedding_progress(
+                task_id, result.embedded_count, total_chunks
+            )
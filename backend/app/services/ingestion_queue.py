@@ -0,0 +1,196 @@
+"""
+Prioritized worker queue for document ingestion.
+Caps concurrent conversions/embedding jobs and reports queue positions.
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.logging_config import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+
+@dataclass
+class IngestionJob:
+    """A document waiting to be converted, chunked and embedded."""
+
+    task_id: str
+    source: str  # File path, or URL for file_type "url"
+    file_type: str  # pdf, docx, txt, md, url
+    file_size: Optional[int] = None
+    sequence: int = 0  # Arrival order, assigned by IngestionQueue.submit
+    enqueued_at: float = 0.0  # time.monotonic() at submit
+    clone_from: Optional[str] = None  # Completed document with identical content
+    reingest: bool = False  # Update an existing document's chunks incrementally
+    resume: bool = False  # Finish an interrupted ingestion from stored markdown
+
+    # Cheap formats first; Docling-heavy formats last
+    TYPE_TIERS = {"txt": 0, "md": 0, "url": 1, "docx": 1, "pdf": 2}
+    CLONE_TIER = -1  # Duplicates only copy rows, so they never wait
+
+    # Seconds of later arrivals allowed to overtake a job, per format tier
+    # and per MB; after that it ranks ahead of anything submitted later
+    TIER_DELAY = 60.0
+    SIZE_DELAY_PER_MB = 6.0
+    MAX_DELAY = 300.0
+
+    @property
+    def sort_key(self) -> Tuple[int, float, int]:
+        """Ordering key: enqueue time plus a format/size delay, then arrival.
+
+        Cheaper jobs get a smaller delay and so overtake expensive ones
+        submitted shortly before them, but never one that has waited
+        longer than its (capped) delay.
+        """
+        if self.clone_from:
+            return (self.CLONE_TIER, self.enqueued_at, self.sequence)
+        tier = self.TYPE_TIERS.get(self.file_type, 1)
+        size_mb = (self.file_size or 0) / (1024 * 1024)
+        delay = min(
+            tier * self.TIER_DELAY + size_mb * self.SIZE_DELAY_PER_MB, self.MAX_DELAY
+        )
+        return (0, self.enqueued_at + delay, self.sequence)
+
+
+class IngestionQueue:
+    """Priority queue drained by a fixed pool of ingestion workers.
+
+    At most worker_count jobs run at once; the rest wait ordered by
+    IngestionJob.sort_key, so small text files overtake large PDFs, but
+    only for a bounded time: a steady stream of small uploads cannot
+    starve a large one.
+    Workers are started lazily on the first submit so the queue works
+    without application startup hooks (e.g. TestClient without lifespan).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[IngestionJob], Awaitable[None]],
+        worker_count: int = 2,
+    ) -> None:
+        """Initialize ingestion queue.
+
+        Args:
+            handler: Coroutine function that processes one job
+            worker_count: Number of concurrent workers (default 2)
+        """
+        self.handler = handler
+        self.worker_count = max(1, worker_count)
+        self._sequence = itertools.count()
+        self._pending: Dict[str, Tuple[int, float, int]] = {}
+        self._active: Dict[str, IngestionJob] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def submit(self, job: IngestionJob) -> int:
+        """Queue a job for processing.
+
+        Must be called from within the running event loop.
+
+        Args:
+            job: Job to enqueue
+
+        Returns:
+            1-based queue position of the job
+        """
+        self._ensure_started()
+        job.sequence = next(self._sequence)
+        job.enqueued_at = time.monotonic()
+        key = job.sort_key
+        self._pending[job.task_id] = key
+        self._queue.put_nowait((key, job))
+        position = self.position(job.task_id)
+        logger.info(
+            "Ingestion job queued",
+            task_id=job.task_id,
+            file_type=job.file_type,
+            queue_position=position,
+            active_jobs=len(self._active),
+        )
+        return position
+
+    def position(self, task_id: str) -> Optional[int]:
+        """Get the 1-based position of a waiting job.
+
+        Args:
+            task_id: Task identifier
+
+        Returns:
+            Position among waiting jobs, or None if not waiting
+        """
+        key = self._pending.get(task_id)
+        if key is None:
+            return None
+        return 1 + sum(1 for other in self._pending.values() if other < key)
+
+    def get_stats(self) -> dict:
+        """Get queue statistics.
+
+        Returns:
+            Dict with pending, active and workers
+        """
+        return {
+            "pending": len(self._pending),
+            "active": len(self._active),
+            "workers": self.worker_count,
+        }
+
+    def _ensure_started(self) -> None:
+        """Create the queue and workers on the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._queue is not None:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._pending.clear()
+        self._active.clear()
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+
+    async def _worker(self, worker_id: int) -> None:
+        """Process jobs until cancelled."""
+        queue = self._queue
+        while True:
+            _, job = await queue.get()
+            self._pending.pop(job.task_id, None)
+            self._active[job.task_id] = job
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Handlers report their own failures; this is a last resort
+                logger.error(
+                    "Ingestion worker failed",
+                    worker_id=worker_id,
+                    task_id=job.task_id,
+                    error_type=type(e).__name__,
+                    error_message=str(e),
+                )
+            finally:
+                self._active.pop(job.task_id, None)
+                queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        """Cancel workers; queued jobs are dropped."""
+        workers = self._workers
+        self._workers = []
+        self._queue = None
+        self._loop = None
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._pending.clear()
+        self._active.clear()
@@ -0,0 +1,893 @@
+"""
+In-process NumPy vector store implementing VectorStoreInterface.
+Keeps all vectors as one L2-normalized float32 matrix for vectorized
+cosine top-k, with optional IVF partitioning for larger corpora and
+optional quantized or reduced-dimension search with full-precision
+rescoring.
+"""
+
+import io
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.logging_config import StructuredLogger
+from app.services.vector_store import (
+    DocumentVectors,
+    QueryResult,
+    VectorStoreError,
+    VectorStoreInterface,
+    truncate_embeddings,
+)
+
+logger = StructuredLogger(__name__)
+
+
+class NumpyVectorStore(VectorStoreInterface):
+    """Memory-resident flat/IVF vector index.
+
+    Vectors live in a single (n, d) float32 matrix whose rows are
+    normalized on insert, so cosine similarity is a matrix-vector product
+    and top-k is an argpartition. Each document's rows are tracked as
+    contiguous row ranges so document filters never scan metadata.
+
+    Persistence: vectors.npy is memory-mapped and grows in place. An add
+    writes only its new rows and bumps the row count in the .npy header,
+    which NumPy pads for exactly that. Ids and metadatas are appended to
+    rows.jsonl, where a repeated id replaces that row's metadata, so
+    writes cost O(batch) rather than O(corpus). Deletes compact both
+    files. Chunk text is not stored (SQLite holds it): queries return ""
+    and callers hydrate content by id.
+
+    IVF: when ivf_lists > 0 and the store holds at least ivf_min_rows
+    vectors, rows are clustered with spherical k-means and unfiltered (or
+    very broad) queries only scan the ivf_probes closest lists. Training
+    runs in a background thread without the store lock; until it
+    finishes, queries use brute force (or the previous lists).
+
+    Quantization: with quantization="int8" (per-row scaled codes, 4x
+    smaller) or "float16" (2x smaller), only the codes are kept in memory
+    and searched. The top n_results * rescore_factor candidates are then
+    rescored against the full-precision rows, which stay memory-mapped
+    from vectors.npy and are only paged in for those candidates, so the
+    returned ranking and distances are exact within the shortlist.
+
+    Reduced dimensions: with search_dimensions > 0 the first pass runs on
+    each row's leading search_dimensions components (re-normalized, and
+    quantized if configured) and the shortlist is rescored the same way.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    ROWS_FILE = "rows.jsonl"
+    LEGACY_INDEX_FILE = "index.json"  # Pre-rows.jsonl sidecar, migrated on load
+    KMEANS_ITERATIONS = 10
+    KMEANS_SAMPLE_SIZE = 50000
+    QUANTIZATIONS = ("none", "float16", "int8")
+    store_documents = False  # Chunk text is hydrated from SQLite
+    SCORE_BLOCK_ROWS = 512  # Dequantized rows per cache-resident float32 block
+
+    def __init__(
+        self,
+        persist_path: str,
+        ivf_lists: int = 0,
+        ivf_probes: int = 8,
+        ivf_min_rows: int = 20000,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        search_dimensions: int = 0,
+    ) -> None:
+        """Open (or create) a NumPy vector index.
+
+        Args:
+            persist_path: Directory for vectors.npy and rows.jsonl.
+                         Will be converted to absolute path if relative.
+            ivf_lists: Number of IVF partitions (0 disables IVF).
+            ivf_probes: Partitions scanned per IVF query.
+            ivf_min_rows: Minimum vector count before IVF is used.
+            quantization: "none", "float16" or "int8" search codes.
+            rescore_factor: First-pass candidates per requested result
+                that are rescored at full precision.
+            search_dimensions: Leading dimensions used for the first pass
+                (0 searches all dimensions).
+
+        Raises:
+            VectorStoreError: If the persisted index cannot be loaded or
+                the quantization mode is unknown.
+        """
+        if quantization not in self.QUANTIZATIONS:
+            raise VectorStoreError(f"Unknown quantization: {quantization}")
+        self._persist_path = os.path.abspath(persist_path)
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self.ivf_min_rows = ivf_min_rows
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.search_dimensions = search_dimensions
+
+        self._lock = threading.RLock()
+        self._vectors: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._doc_ranges: Dict[str, List[Tuple[int, int]]] = {}
+
+        # First-pass search codes (rebuilt on load, not persisted)
+        self._codes: Optional[np.ndarray] = None
+        self._code_scales: Optional[np.ndarray] = None
+
+        # IVF state (trained in the background, not persisted)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._ivf_trained_rows = 0
+        self._ivf_thread: Optional[threading.Thread] = None
+        self._row_generation = 0  # Bumped whenever existing rows move
+
+        try:
+            os.makedirs(self._persist_path, exist_ok=True)
+            self._load()
+        except Exception as e:
+            raise VectorStoreError(f"Failed to initialize vector store: {e}") from e
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self._persist_path, self.VECTORS_FILE)
+
+    @property
+    def _rows_path(self) -> str:
+        return os.path.join(self._persist_path, self.ROWS_FILE)
+
+    def _load(self) -> None:
+        """Load persisted vectors (memory-mapped) and replay rows.jsonl."""
+        self._recover_rewrite()
+        if not os.path.exists(self._rows_path):
+            legacy_path = os.path.join(self._persist_path, self.LEGACY_INDEX_FILE)
+            if os.path.exists(legacy_path):
+                self._migrate_legacy_index(legacy_path)
+            return
+
+        ids: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        rows: Dict[str, int] = {}
+        torn = False
+        with open(self._rows_path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        for number, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                if number < len(lines) - 1:
+                    raise
+                torn = True  # Append interrupted mid-line
+                break
+            row = rows.get(record["id"])
+            if row is None:
+                rows[record["id"]] = len(ids)
+                ids.append(record["id"])
+                metadatas.append(record["metadata"])
+            else:
+                metadatas[row] = record["metadata"]
+
+        vectors = np.zeros((0, 0), dtype=np.float32)
+        if ids and os.path.exists(self._vectors_path):
+            vectors = np.load(self._vectors_path, mmap_mode="r")
+        count = min(len(ids), len(vectors))
+        self._ids = ids[:count]
+        self._metadatas = metadatas[:count]
+        self._vectors = vectors[:count] if count else np.zeros((0, 0), np.float32)
+        self._rebuild_lookups()
+        if torn or len(ids) != len(vectors):
+            # Drop rows whose vector or metadata write did not complete
+            logger.warning(
+                "Repairing interrupted NumPy index write",
+                vectors=len(vectors),
+                rows=len(ids),
+                kept=count,
+            )
+            self._rewrite()
+        if self._two_stage and self._ids:
+            self._codes, self._code_scales = self._encode(self._vectors)
+
+    def _migrate_legacy_index(self, legacy_path: str) -> None:
+        """Convert an index.json sidecar to rows.jsonl, dropping chunk text."""
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+        self._ids = index["ids"]
+        self._metadatas = index["metadatas"]
+        if self._ids:
+            self._vectors = np.load(self._vectors_path, mmap_mode="r")
+        self._rebuild_lookups()
+        self._rewrite()
+        os.remove(legacy_path)
+        logger.info("Migrated NumPy index sidecar", vectors=len(self._ids))
+        if self._two_stage and self._ids:
+            self._codes, self._code_scales = self._encode(self._vectors)
+
+    def _reload(self) -> None:
+        """Discard in-memory state and reload the persisted index."""
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids = []
+        self._metadatas = []
+        self._rebuild_lookups()
+        self._codes = None
+        self._code_scales = None
+        self._centroids = None
+        self._assignments = None
+        self._ivf_trained_rows = 0
+        self._row_generation += 1
+        self._load()
+
+    def _append(
+        self, vectors: np.ndarray, ids: List[str], metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Persist new rows after the current ones, then re-map vectors.npy.
+
+        Vectors are written first: rows only count once their rows.jsonl
+        line exists, so a failure in between leaves unreferenced vectors
+        that the next append overwrites or the next load drops.
+        """
+        start = len(self._ids)
+        if start == 0 or not self._append_vectors_in_place(start, vectors):
+            combined = vectors
+            if start:
+                combined = np.concatenate([np.asarray(self._vectors), vectors])
+            tmp_vectors = self._vectors_path + ".tmp"
+            self._save_vectors(tmp_vectors, combined)
+            os.replace(tmp_vectors, self._vectors_path)
+        with open(self._rows_path, "a", encoding="utf-8") as f:
+            f.write(self._row_lines(ids, metadatas))
+        self._vectors = np.load(self._vectors_path, mmap_mode="r")
+
+    def _append_vectors_in_place(self, start: int, vectors: np.ndarray) -> bool:
+        """Write vectors after row start of vectors.npy and bump its header.
+
+        Returns:
+            False if the file must be rewritten instead (missing, or a
+            header that cannot be updated without changing its length)
+        """
+        if not os.path.exists(self._vectors_path):
+            return False
+        with open(self._vectors_path, "r+b") as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(f)
+                write_header = np.lib.format.write_array_header_1_0
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(f)
+                write_header = np.lib.format.write_array_header_2_0
+            data_offset = f.tell()
+            if shape[0] < start or shape[1] != vectors.shape[1]:
+                return False
+
+            header = io.BytesIO()
+            write_header(
+                header,
+                {
+                    "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                    "fortran_order": False,
+                    "shape": (start + len(vectors), vectors.shape[1]),
+                },
+            )
+            if len(header.getvalue()) != data_offset:
+                return False
+
+            f.seek(data_offset + start * vectors.shape[1] * 4)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.truncate()
+            f.seek(0)
+            f.write(header.getvalue())
+        return True
+
+    def _append_metadata_updates(
+        self, ids: List[str], metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Record replaced metadatas; replaying rows.jsonl applies them."""
+        with open(self._rows_path, "a", encoding="utf-8") as f:
+            f.write(self._row_lines(ids, metadatas))
+
+    def _rewrite(self) -> None:
+        """Replace vectors.npy and rows.jsonl with the current rows.
+
+        Both files are fully written to .tmp siblings before either is
+        swapped in, vectors first; _recover_rewrite() completes a swap
+        interrupted between the two renames.
+        """
+        tmp_vectors = self._vectors_path + ".tmp"
+        tmp_rows = self._rows_path + ".tmp"
+
+        vectors = self._vectors if self._ids else np.zeros((0, 0), np.float32)
+        self._save_vectors(tmp_vectors, vectors)
+        with open(tmp_rows, "w", encoding="utf-8") as f:
+            f.write(self._row_lines(self._ids, self._metadatas))
+
+        os.replace(tmp_vectors, self._vectors_path)
+        os.replace(tmp_rows, self._rows_path)
+
+        if self._ids:
+            self._vectors = np.load(self._vectors_path, mmap_mode="r")
+        else:
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def _recover_rewrite(self) -> None:
+        """Finish or discard a _rewrite() interrupted by a crash."""
+        tmp_vectors = self._vectors_path + ".tmp"
+        tmp_rows = self._rows_path + ".tmp"
+        if os.path.exists(tmp_rows) and not os.path.exists(tmp_vectors):
+            # vectors.npy was already swapped in; rows.jsonl must follow
+            os.replace(tmp_rows, self._rows_path)
+        for path in (tmp_vectors, tmp_rows):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _save_vectors(path: str, vectors: np.ndarray) -> None:
+        """Write vectors as a float32 .npy file."""
+        with open(path, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+
+    @staticmethod
+    def _row_lines(ids: List[str], metadatas: List[Dict[str, Any]]) -> str:
+        """Serialize rows as rows.jsonl lines."""
+        return "".join(
+            json.dumps({"id": chunk_id, "metadata": metadata}) + "\n"
+            for chunk_id, metadata in zip(ids, metadatas)
+        )
+
+    def _rebuild_lookups(self, start: int = 0) -> None:
+        """Recompute id → row and document → row-range maps.
+
+        With start > 0 only rows from start on are indexed, for appends.
+        """
+        if start == 0:
+            self._id_to_row = {}
+            self._doc_ranges = {}
+        for row in range(start, len(self._ids)):
+            self._id_to_row[self._ids[row]] = row
+            doc_id = self._metadatas[row].get("document_id")
+            if doc_id is None:
+                continue
+            ranges = self._doc_ranges.setdefault(doc_id, [])
+            if ranges and ranges[-1][1] == row:
+                ranges[-1] = (ranges[-1][0], row + 1)
+            else:
+                ranges.append((row, row + 1))
+
+    # -------------------------------------------------------------------------
+    # VectorStoreInterface
+    # -------------------------------------------------------------------------
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+    ) -> None:
+        """Add vectors with metadata to the store (chunk text is not kept)."""
+        try:
+            self._add_rows(ids, embeddings, metadatas, documents, replace=False)
+        except VectorStoreError:
+            raise
+        except Exception as e:
+            raise VectorStoreError(f"Failed to add vectors: {e}") from e
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+    ) -> None:
+        """Replace existing vectors and append new ones.
+
+        The store has no batch limit, so the whole input is one batch.
+        Ids that are new are only appended; replacing existing ids
+        compacts the index like a delete.
+        """
+        try:
+            self._add_rows(ids, embeddings, metadatas, documents, replace=True)
+        except VectorStoreError:
+            raise
+        except Exception as e:
+            raise VectorStoreError(f"Failed to upsert vectors: {e}") from e
+
+    def _add_rows(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+        replace: bool,
+    ) -> None:
+        """Validate a batch and append it, replacing existing ids if asked."""
+        if not (len(ids) == len(embeddings) == len(metadatas) == len(documents)):
+            raise ValueError("ids, embeddings, metadatas, documents differ in length")
+        if not ids:
+            return
+
+        new_vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        if new_vectors.ndim != 2:
+            raise ValueError("embeddings must be a 2-D list of floats")
+
+        with self._lock:
+            if self._vectors.shape[0] and new_vectors.shape[1] != self.dimensions:
+                raise ValueError(
+                    f"expected {self.dimensions}-dimensional embeddings, "
+                    f"got {new_vectors.shape[1]}"
+                )
+            existing = [self._id_to_row[i] for i in ids if i in self._id_to_row]
+            if len(set(ids)) != len(ids) or (existing and not replace):
+                duplicates = [self._ids[row] for row in existing]
+                raise ValueError(f"duplicate ids: {duplicates[:5]}")
+
+            if existing:
+                keep = np.ones(len(self._ids), dtype=bool)
+                keep[existing] = False
+                self._compact(keep)
+                self._rewrite()
+
+            # Group rows by document so each document stays contiguous
+            order = sorted(
+                range(len(ids)),
+                key=lambda i: str(metadatas[i].get("document_id", "")),
+            )
+            new_vectors = new_vectors[order]
+            new_ids = [ids[i] for i in order]
+            new_metadatas = [dict(metadatas[i]) for i in order]
+
+            try:
+                self._append(new_vectors, new_ids, new_metadatas)
+            except Exception:
+                # Drop whatever part of the append reached disk
+                self._reload()
+                raise
+
+            if self._two_stage:
+                codes, scales = self._encode(new_vectors)
+                if self._codes is not None and len(self._codes):
+                    codes = np.concatenate([self._codes, codes])
+                    scales = np.concatenate([self._code_scales, scales])
+                self._codes, self._code_scales = codes, scales
+            start = len(self._ids)
+            self._ids = self._ids + new_ids
+            self._metadatas = self._metadatas + new_metadatas
+            self._rebuild_lookups(start)
+            self._assign_new_rows(len(ids))
+            self._ensure_ivf_training()
+
+    def query(
+        self,
+        embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True,
+    ) -> QueryResult:
+        """Query for similar vectors."""
+        try:
+            with self._lock:
+                vectors = self._vectors
+                codes = self._codes
+                code_scales = self._code_scales
+                ids = self._ids
+                metadatas = self._metadatas
+                candidates = self._filter_rows(where)
+                candidates = self._ivf_candidates(embedding, candidates)
+
+            if not ids or n_results <= 0:
+                return QueryResult(ids=[], distances=[], documents=[], metadatas=[])
+
+            query_vector = self._normalize(np.asarray(embedding, dtype=np.float32))
+            if candidates is not None and len(candidates) == 0:
+                return QueryResult(ids=[], distances=[], documents=[], metadatas=[])
+
+            if codes is not None:
+                result_rows, scores = self._two_stage_top_k(
+                    vectors, codes, code_scales, query_vector, candidates, n_results
+                )
+            else:
+                if candidates is None:
+                    scores = vectors @ query_vector
+                else:
+                    scores = vectors[candidates] @ query_vector
+                top = self._top_k(scores, n_results)
+                scores = scores[top]
+                result_rows = top if candidates is None else candidates[top]
+
+            return QueryResult(
+                ids=[ids[r] for r in result_rows],
+                distances=[float(1.0 - score) for score in scores],
+                documents=[""] * len(result_rows) if include_content else [],
+                metadatas=(
+                    [metadatas[r] for r in result_rows] if include_content else []
+                ),
+            )
+        except VectorStoreError:
+            raise
+        except Exception as e:
+            raise VectorStoreError(f"Failed to query vectors: {e}") from e
+
+    def delete_by_document(self, document_id: str) -> None:
+        """Delete all vectors for a document."""
+        try:
+            with self._lock:
+                ranges = self._doc_ranges.get(document_id)
+                if not ranges:
+                    return
+                keep = np.ones(len(self._ids), dtype=bool)
+                for start, end in ranges:
+                    keep[start:end] = False
+                self._compact(keep)
+                self._rewrite()
+        except Exception as e:
+            raise VectorStoreError(f"Failed to delete vectors: {e}") from e
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete vectors by chunk ID."""
+        try:
+            with self._lock:
+                rows = [self._id_to_row[i] for i in ids if i in self._id_to_row]
+                if not rows:
+                    return
+                keep = np.ones(len(self._ids), dtype=bool)
+                keep[rows] = False
+                self._compact(keep)
+                self._rewrite()
+        except Exception as e:
+            raise VectorStoreError(f"Failed to delete vectors: {e}") from e
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of existing vectors."""
+        try:
+            with self._lock:
+                unknown = [i for i in ids if i not in self._id_to_row]
+                if unknown:
+                    raise ValueError(f"unknown ids: {unknown[:5]}")
+                if not ids:
+                    return
+                metadatas = [dict(metadata) for metadata in metadatas]
+                self._append_metadata_updates(ids, metadatas)
+                updated = list(self._metadatas)
+                for chunk_id, metadata in zip(ids, metadatas):
+                    updated[self._id_to_row[chunk_id]] = metadata
+                self._metadatas = updated
+                self._rebuild_lookups()
+        except Exception as e:
+            raise VectorStoreError(f"Failed to update vectors: {e}") from e
+
+    def count(self) -> int:
+        """Return total number of vectors in the store."""
+        return len(self._ids)
+
+    def health_check(self) -> bool:
+        """Check if the vector store is operational."""
+        return os.path.isdir(self._persist_path) and os.access(
+            self._persist_path, os.W_OK
+        )
+
+    def get_all_document_ids(self) -> List[str]:
+        """Return the distinct document IDs that have stored vectors."""
+        with self._lock:
+            return sorted(self._doc_ranges)
+
+    def get_document_vectors(self, document_id: str) -> DocumentVectors:
+        """Return every stored vector of a document, ordered by chunk_index.
+
+        Vectors come back L2-normalized, as stored.
+        """
+        with self._lock:
+            rows = self._rows_for_documents([document_id])
+            rows = sorted(
+                rows.tolist(),
+                key=lambda r: self._metadatas[r].get("chunk_index", 0),
+            )
+            return DocumentVectors(
+                ids=[self._ids[r] for r in rows],
+                embeddings=np.asarray(self._vectors[rows]).tolist() if rows else [],
+                metadatas=[dict(self._metadatas[r]) for r in rows],
+                documents=[""] * len(rows),
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            if self._codes is not None:
+                memory_bytes = self._codes.nbytes + self._code_scales.nbytes
+            else:
+                memory_bytes = self._vectors.nbytes
+            return {
+                "vectors": len(self._ids),
+                "dimensions": self.dimensions,
+                "documents": len(self._doc_ranges),
+                "memory_bytes": int(memory_bytes),
+                "full_precision_bytes": int(self._vectors.nbytes),
+                "quantization": self.quantization,
+                "search_dimensions": self.search_dimensions,
+                "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+            }
+
+    # -------------------------------------------------------------------------
+    # Helpers
+    # -------------------------------------------------------------------------
+
+    @property
+    def dimensions(self) -> int:
+        """Embedding dimensionality (0 while the store is empty)."""
+        return int(self._vectors.shape[1]) if self._vectors.shape[0] else 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize a vector or each row of a matrix."""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32, copy=False)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, sorted descending."""
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def _rows_for_documents(self, document_ids: List[str]) -> np.ndarray:
+        """Row indices covered by the given documents' row ranges."""
+        parts = [
+            np.arange(start, end)
+            for doc_id in document_ids
+            for start, end in self._doc_ranges.get(doc_id, [])
+        ]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def _filter_rows(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Resolve a metadata filter to candidate rows (None = all rows).
+
+        Supports equality and $in conditions; document_id conditions use
+        the per-document row ranges, other keys fall back to a scan.
+        """
+        if not where:
+            return None
+
+        candidates: Optional[np.ndarray] = None
+        for key, condition in where.items():
+            if isinstance(condition, dict):
+                if set(condition) != {"$in"}:
+                    raise VectorStoreError(f"Unsupported filter operator: {condition}")
+                values = list(condition["$in"])
+            else:
+                values = [condition]
+
+            if key == "document_id":
+                rows = self._rows_for_documents(values)
+            else:
+                allowed = set(values)
+                rows = np.array(
+                    [
+                        row
+                        for row, metadata in enumerate(self._metadatas)
+                        if metadata.get(key) in allowed
+                    ],
+                    dtype=np.int64,
+                )
+
+            candidates = (
+                rows if candidates is None else np.intersect1d(candidates, rows)
+            )
+        return candidates
+
+    def _compact(self, keep: np.ndarray) -> None:
+        """Drop rows where keep is False and rebuild lookups."""
+        kept_rows = np.flatnonzero(keep)
+        self._vectors = np.ascontiguousarray(self._vectors[kept_rows])
+        self._ids = [self._ids[r] for r in kept_rows]
+        self._metadatas = [self._metadatas[r] for r in kept_rows]
+        if self._codes is not None:
+            self._codes = self._codes[kept_rows]
+            self._code_scales = self._code_scales[kept_rows]
+        if self._assignments is not None:
+            self._assignments = self._assignments[kept_rows]
+        self._row_generation += 1
+        self._rebuild_lookups()
+
+    # -------------------------------------------------------------------------
+    # Two-stage (quantized / reduced-dimension) search
+    # -------------------------------------------------------------------------
+
+    @property
+    def _two_stage(self) -> bool:
+        return self.quantization != "none" or self.search_dimensions > 0
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode normalized rows as first-pass codes and per-row scales.
+
+        Rows are first truncated to search_dimensions (if set). int8 codes
+        use a symmetric per-row scale (row max magnitude maps to 127), so
+        appending rows never requires re-encoding old ones.
+        """
+        if self.search_dimensions > 0:
+            vectors = truncate_embeddings(vectors, self.search_dimensions)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.quantization == "none":
+            return vectors.copy(), np.ones(len(vectors), np.float32)
+        if self.quantization == "float16":
+            return vectors.astype(np.float16), np.ones(len(vectors), np.float32)
+
+        max_abs = np.abs(vectors).max(axis=1)
+        max_abs[max_abs == 0] = 1.0
+        scales = (max_abs / 127.0).astype(np.float32)
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales
+
+    def _two_stage_top_k(
+        self,
+        vectors: np.ndarray,
+        codes: np.ndarray,
+        code_scales: np.ndarray,
+        query_vector: np.ndarray,
+        candidates: Optional[np.ndarray],
+        n_results: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Shortlist on the first-pass codes, then rank at full precision.
+
+        Returns:
+            (rows, scores) of the top n_results, sorted by exact score
+        """
+        search_query = query_vector
+        if self.search_dimensions > 0:
+            search_query = truncate_embeddings(query_vector, self.search_dimensions)
+        total = len(codes) if candidates is None else len(candidates)
+        approx = np.empty(total, dtype=np.float32)
+        buffer = np.empty((self.SCORE_BLOCK_ROWS, codes.shape[1]), dtype=np.float32)
+        for start in range(0, total, self.SCORE_BLOCK_ROWS):
+            end = min(start + self.SCORE_BLOCK_ROWS, total)
+            if candidates is None:
+                rows = slice(start, end)
+            else:
+                rows = candidates[start:end]
+            block = buffer[: end - start]
+            np.copyto(block, codes[rows], casting="unsafe")
+            approx[start:end] = (block @ search_query) * code_scales[rows]
+
+        if candidates is None:
+            candidates = np.arange(total)
+        shortlist = candidates[self._top_k(approx, n_results * self.rescore_factor)]
+        shortlist.sort()  # Sequential reads from the memory-mapped rows
+        exact = np.asarray(vectors[shortlist], dtype=np.float32) @ query_vector
+        top = self._top_k(exact, n_results)
+        return shortlist[top], exact[top]
+
+    # -------------------------------------------------------------------------
+    # IVF partitioning
+    # -------------------------------------------------------------------------
+
+    def _ivf_enabled(self) -> bool:
+        return self.ivf_lists > 0 and len(self._ids) >= max(self.ivf_min_rows, 1)
+
+    def _ivf_candidates(
+        self, embedding: List[float], candidates: Optional[np.ndarray]
+    ) -> Optional[np.ndarray]:
+        """Narrow candidates to the closest IVF lists for broad queries.
+
+        Small filtered candidate sets (e.g. one document) are scanned
+        exactly; IVF only kicks in when brute force would touch at least
+        ivf_min_rows vectors.
+        """
+        if not self._ivf_enabled():
+            return candidates
+        if candidates is not None and len(candidates) < self.ivf_min_rows:
+            return candidates
+
+        self._ensure_ivf_training()
+        if self._centroids is None:
+            return candidates  # Brute force until the first training finishes
+
+        query_vector = self._normalize(np.asarray(embedding, dtype=np.float32))
+        probes = min(self.ivf_probes, len(self._centroids))
+        nearest = self._top_k(self._centroids @ query_vector, probes)
+        ivf_rows = np.flatnonzero(np.isin(self._assignments, nearest))
+        if candidates is None:
+            return ivf_rows
+        return np.intersect1d(candidates, ivf_rows)
+
+    def _ensure_ivf_training(self) -> None:
+        """Start background IVF training if it is due and not running.
+
+        Called with the lock held. Training is due once the store reaches
+        ivf_min_rows and again whenever it has doubled since.
+        """
+        if not self._ivf_enabled():
+            return
+        if self._centroids is not None and len(self._ids) < 2 * self._ivf_trained_rows:
+            return
+        if self._ivf_thread is not None and self._ivf_thread.is_alive():
+            return
+        self._ivf_thread = threading.Thread(
+            target=self._train_ivf, name="numpy_ivf_training", daemon=True
+        )
+        self._ivf_thread.start()
+
+    def wait_for_ivf(self, timeout: Optional[float] = None) -> None:
+        """Block until background IVF training (if any) has finished."""
+        thread = self._ivf_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _train_ivf(self) -> None:
+        """Cluster a snapshot of the rows and install the IVF lists.
+
+        Runs in a background thread. k-means and the assignment of every
+        row happen outside the lock; rows appended meanwhile are assigned
+        when the lists are installed, and if rows were deleted or moved
+        meanwhile the assignment is redone on a fresh snapshot.
+        """
+        try:
+            with self._lock:
+                vectors, generation = self._vectors, self._row_generation
+            centroids = self._kmeans(np.asarray(vectors))
+
+            while True:
+                assignments = self._nearest_lists(vectors, centroids)
+                with self._lock:
+                    if generation == self._row_generation:
+                        appended = self._vectors[len(assignments) :]
+                        self._centroids = centroids
+                        self._assignments = np.concatenate(
+                            [assignments, self._nearest_lists(appended, centroids)]
+                        )
+                        self._ivf_trained_rows = len(self._assignments)
+                        break
+                    vectors, generation = self._vectors, self._row_generation
+
+            logger.info(
+                "IVF index trained",
+                vectors=self._ivf_trained_rows,
+                lists=len(centroids),
+            )
+        except Exception as e:
+            logger.error(
+                "IVF training failed, queries stay brute force",
+                error_type=type(e).__name__,
+                error_message=str(e),
+            )
+
+    def _kmeans(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means centroids for up to ivf_lists lists."""
+        n_lists = min(self.ivf_lists, len(vectors))
+        rng = np.random.default_rng(0)
+
+        sample_size = min(len(vectors), self.KMEANS_SAMPLE_SIZE)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(self.KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(n_lists):
+                members = sample[labels == list_id]
+                if len(members):
+                    centroids[list_id] = members.mean(axis=0)
+            centroids = self._normalize(centroids)
+        return centroids
+
+    @staticmethod
+    def _nearest_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """IVF list of each row (empty for no rows)."""
+        if not len(vectors):
+            return np.zeros(0, dtype=np.int32)
+        return np.argmax(np.asarray(vectors) @ centroids.T, axis=1).astype(np.int32)
+
+    def _assign_new_rows(self, count: int) -> None:
+        """Assign freshly appended rows to their nearest IVF list."""
+        if self._centroids is None:
+            return
+        new_assignments = self._nearest_lists(self._vectors[-count:], self._centroids)
+        self._assignments = np.concatenate([self._assignments, new_assignments])
@@ -5,13 +5,14 @@ coordinating document summary matching, vector search, and LLM generation.
 """
 
 from dataclasses import dataclass
-from typing import List, Optional, AsyncGenerator
+from typing import Dict, List, Optional, AsyncGenerator, Tuple
+import json
 import time
 import asyncio
-import numpy as np
 
 from app.core.logging_config import StructuredLogger
 from app.core.prompts import RAG_SYSTEM_PROMPT
+from app.services.vector_store import document_filter
 
 logger = StructuredLogger(__name__)
 
@@ -69,6 +70,9 @@ class RAGService:
         response_cache,
         document_summary_service,
         similarity_threshold: float = 0.7,
+        chunk_offset_index=None,
+        db_session=None,
+        lazy_hydration: bool = False,
     ):
         """Initialize RAG service.
 
@@ -79,6 +83,12 @@ class RAGService:
             response_cache: ResponseCache instance
             document_summary_service: DocumentSummaryService instance
             similarity_threshold: Minimum similarity for chunk retrieval
+            chunk_offset_index: ChunkOffsetIndex for resolving the focused
+                chunk (None = focus only boosts retrieved chunks)
+            db_session: Database session for chunk lookups
+            lazy_hydration: Search for ids and distances only and read the
+                content and metadata of kept chunks from SQLite (requires
+                db_session)
         """
         self.embedding_service = embedding_service
         self.vector_store = vector_store
@@ -86,6 +96,9 @@ class RAGService:
         self.response_cache = response_cache
         self.document_summary_service = document_summary_service
         self.similarity_threshold = similarity_threshold
+        self.chunk_offset_index = chunk_offset_index
+        self.db_session = db_session
+        self.lazy_hydration = lazy_hydration and db_session is not None
 
     async def retrieve_context(
         self,
@@ -122,14 +135,16 @@ class RAGService:
                 query_embedding, top_k=3
             )
 
-        # Search for chunks within selected documents
+        # Search all selected documents in one query; the store merges top-k
         search_start = time.time()
         all_chunks = []
-        for doc_id in selected_documents:
-            results = self.vector_store.query(
+        where = document_filter(selected_documents)
+        if where is not None:
+            results = await self.vector_store.aquery(
                 embedding=query_embedding,
                 n_results=n_results,
-                where={"document_id": doc_id},
+                where=where,
+                include_content=not self.lazy_hydration,
             )
 
             # Convert results to RetrievedChunk objects
@@ -138,16 +153,23 @@ class RAGService:
                     1.0 - results.distances[i]
                 )  # Convert distance to similarity
                 if similarity >= self.similarity_threshold:
+                    metadata = results.metadatas[i] if results.metadatas else {}
                     all_chunks.append(
                         RetrievedChunk(
                             chunk_id=results.ids[i],
-                            document_id=doc_id,
-                            content=results.documents[i],
+                            document_id=metadata.get(
+                                "document_id", selected_documents[0]
+                            ),
+                            content=results.documents[i] if results.documents else "",
                             similarity=similarity,
-                            metadata=results.metadatas[i],
+                            metadata=metadata,
                         )
                     )
 
+            # Only hits above the threshold are read back from SQLite
+            if self.lazy_hydration:
+                all_chunks = await self._hydrate(all_chunks)
+
         # Apply focus context boost if provided
         if focus_context:
             all_chunks = self._apply_focus_boost(all_chunks, focus_context)
@@ -156,6 +178,12 @@ class RAGService:
         all_chunks.sort(key=lambda c: c.similarity, reverse=True)
         top_chunks = all_chunks[:n_results]
 
+        # The chunk under the focus caret is always part of the context
+        if focus_context:
+            top_chunks = await self._include_focus_chunk(
+                top_chunks, focus_context, n_results
+            )
+
         # Enforce token budget (8000 tokens max)
         final_chunks = self._enforce_token_budget(top_chunks, max_tokens=8000)
 
@@ -195,24 +223,16 @@ class RAGService:
         Returns:
             List of document IDs
         """
-        summaries = await self.document_summary_service.get_all_summaries()
+        summary_index = await self.document_summary_service.get_summary_index()
 
         # Fallback: if no summaries exist, search all documents
-        if not summaries:
+        if not len(summary_index):
             logger.warning("No document summaries found, searching all documents")
             # Get all document IDs from vector store
-            all_docs = await self.vector_store.get_all_document_ids()
+            all_docs = await self.vector_store.aget_all_document_ids()
             return all_docs[:top_k] if all_docs else []
 
-        similarities = []
-        for summary in summaries:
-            # Compute cosine similarity
-            similarity = self._cosine_similarity(query_embedding, summary.embedding)
-            similarities.append((summary.document_id, similarity))
-
-        # Sort by similarity and take top K
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return [doc_id for doc_id, _ in similarities[:top_k]]
+        return summary_index.top_k(query_embedding, top_k)
 
     def _apply_focus_boost(
         self, chunks: List[RetrievedChunk], focus_context: dict
@@ -241,6 +261,116 @@ class RAGService:
 
         return chunks
 
+    async def _include_focus_chunk(
+        self, chunks: List[RetrievedChunk], focus_context: dict, n_results: int
+    ) -> List[RetrievedChunk]:
+        """Put the chunk under the focus caret first if it was not retrieved.
+
+        The chunk is resolved through the chunk offset index and read from
+        SQLite, so no extra vector query is needed.
+
+        Args:
+            chunks: Top retrieved chunks, sorted by similarity
+            focus_context: Focus caret context with document_id and start_char
+            n_results: Maximum number of chunks to return
+
+        Returns:
+            Chunks with the focused chunk first
+        """
+        if self.chunk_offset_index is None or self.db_session is None:
+            return chunks
+
+        document_id = focus_context.get("document_id")
+        position = focus_context.get("start_char")
+        if not document_id or position is None:
+            return chunks
+
+        chunk_id = await self.chunk_offset_index.locate(
+            self.db_session, document_id, position
+        )
+        if chunk_id is None or any(c.chunk_id == chunk_id for c in chunks):
+            return chunks
+
+        stored = await self._load_chunks([chunk_id])
+        if chunk_id not in stored:
+            return chunks
+        content, metadata = stored[chunk_id]
+        focused = RetrievedChunk(
+            chunk_id=chunk_id,
+            document_id=metadata["document_id"],
+            content=content,
+            similarity=self.similarity_threshold,
+            metadata=metadata,
+        )
+        return [focused] + chunks[: max(n_results - 1, 0)]
+
+    async def _hydrate(self, chunks: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        """Fill in content and metadata of id-only search hits from SQLite.
+
+        Args:
+            chunks: Chunks with ids and similarities only
+
+        Returns:
+            The chunks that still exist, with content and full metadata
+        """
+        stored = await self._load_chunks([c.chunk_id for c in chunks])
+        hydrated = []
+        for chunk in chunks:
+            if chunk.chunk_id not in stored:
+                continue  # Deleted since it was indexed
+            chunk.content, chunk.metadata = stored[chunk.chunk_id]
+            chunk.document_id = chunk.metadata["document_id"]
+            hydrated.append(chunk)
+        return hydrated
+
+    async def _load_chunks(self, chunk_ids: List[str]) -> Dict[str, Tuple[str, dict]]:
+        """Read chunks and their document titles in one query.
+
+        Args:
+            chunk_ids: Chunk UUIDs
+
+        Returns:
+            (content, metadata) per found chunk ID; metadata holds
+            document_id, document_title, chunk_index, token_count and offsets
+        """
+        if not chunk_ids:
+            return {}
+        from sqlalchemy import select
+
+        from app.models.document import Chunk, Document
+
+        result = await self.db_session.execute(
+            select(
+                Chunk.id,
+                Chunk.content,
+                Chunk.document_id,
+                Chunk.chunk_index,
+                Chunk.token_count,
+                Chunk.start_char,
+                Chunk.end_char,
+                Document.original_name,
+                Document.doc_metadata,
+            )
+            .join(Document, Document.id == Chunk.document_id)
+            .where(Chunk.id.in_(chunk_ids))
+        )
+
+        stored = {}
+        for row in result:
+            doc_metadata = json.loads(row.doc_metadata) if row.doc_metadata else {}
+            stored[row.id] = (
+                row.content,
+                {
+                    "document_id": row.document_id,
+                    "document_title": doc_metadata.get("title") or row.original_name,
+                    "chunk_index": row.chunk_index,
+                    "token_count": row.token_count,
+                    "start_char": row.start_char,
+                    "end_char": row.end_char,
+                },
+            )
+        return stored
+
     def _enforce_token_budget(
         self, chunks: List[RetrievedChunk], max_tokens: int
     ) -> List[RetrievedChunk]:
@@ -266,23 +396,6 @@ class RAGService:
 
         return result
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Compute cosine similarity between two vectors.
-
-        Args:
-            vec1: First vector
-            vec2: Second vector
-
-        Returns:
-            Cosine similarity (0-1, higher = more similar)
-        """
-        vec1_np = np.array(vec1)
-        vec2_np = np.array(vec2)
-        return float(
-            np.dot(vec1_np, vec2_np)
-            / (np.linalg.norm(vec1_np) * np.linalg.norm(vec2_np))
-        )
-
     async def _log_retrieval_metrics(
         self,
         embed_time_ms: float,
@@ -330,7 +443,7 @@ class RAGService:
 
         # Check cache first
         cache_key = self.response_cache.compute_key(
-            query, context.selected_documents, focus_context
+            query, context.selected_documents, focus_context, message_history
         )
         cached_response = self.response_cache.get(cache_key)
 
@@ -375,7 +488,11 @@ class RAGService:
 
                     # Cache the response
                     self.response_cache.set(
-                        cache_key, response_text, context.chunks, token_count
+                        cache_key,
+                        response_text,
+                        context.chunks,
+                        token_count,
+                        document_ids=context.selected_documents,
                     )
 
                     # Send source attribution
@@ -6,11 +6,12 @@ to reduce costs and improve response times for repeated queries.
 """
 
 from collections import OrderedDict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Dict, Optional, List, Set
 import hashlib
 import asyncio
+import json
 
 from app.core.logging_config import StructuredLogger
 
@@ -26,13 +27,15 @@ class CachedResponse:
     token_count: int
     created_at: datetime
     hit_count: int
+    document_ids: List[str] = field(default_factory=list)
 
 
 class ResponseCache:
     """LRU cache for RAG responses.
 
     Uses OrderedDict for O(1) access and LRU eviction.
-    Configurable size and TTL.
+    Configurable size and TTL. Entries are indexed by document ID so
+    deleting or re-ingesting a document drops its cached answers.
     """
 
     def __init__(self, max_size: int = 500, ttl_hours: int = 24):
@@ -45,10 +48,15 @@ class ResponseCache:
         self.max_size = max_size
         self.ttl = timedelta(hours=ttl_hours)
         self._cache: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._document_keys: Dict[str, Set[str]] = {}
         self._stats = {"hits": 0, "misses": 0, "total_queries": 0}
 
     def compute_key(
-        self, query: str, document_ids: List[str], focus_context: Optional[dict]
+        self,
+        query: str,
+        document_ids: List[str],
+        focus_context: Optional[dict],
+        message_history: Optional[List[dict]] = None,
     ) -> str:
         """Compute cache key from query components.
 
@@ -56,6 +64,8 @@ class ResponseCache:
             query: User's query text
             document_ids: List of document IDs involved in query
             focus_context: Optional focus caret context
+            message_history: Optional previous messages in the session, so
+                the same question in a different conversation misses
 
         Returns:
             SHA256 hash of query components
@@ -66,9 +76,15 @@ class ResponseCache:
                 f":{focus_context.get('start_char')}:{focus_context.get('end_char')}"
             )
 
+        history_hash = ""
+        if message_history:
+            history_hash = ":" + json.dumps(
+                [[msg.get("role"), msg.get("content")] for msg in message_history]
+            )
+
         # Normalize document list: remove duplicates and sort
         normalized_docs = sorted(set(document_ids))
-        content = f"{query}:{','.join(normalized_docs)}{focus_hash}"
+        content = f"{query}:{','.join(normalized_docs)}{focus_hash}{history_hash}"
         return hashlib.sha256(content.encode()).hexdigest()
 
     def get(self, key: str) -> Optional[CachedResponse]:
@@ -90,7 +106,7 @@ class ResponseCache:
 
         # Check expiration
         if datetime.now() - cached.created_at > self.ttl:
-            del self._cache[key]
+            self._remove(key)
             self._stats["misses"] += 1
             return None
 
@@ -116,7 +132,12 @@ class ResponseCache:
         return cached
 
     def set(
-        self, key: str, response_text: str, source_chunks: List, token_count: int
+        self,
+        key: str,
+        response_text: str,
+        source_chunks: List,
+        token_count: int,
+        document_ids: Optional[List[str]] = None,
     ) -> None:
         """Store response in cache.
 
@@ -125,21 +146,49 @@ class ResponseCache:
             response_text: Complete response text
             source_chunks: List of source chunks used
             token_count: Total tokens in response
+            document_ids: Documents the response was built from; the
+                source chunks' documents are always included
         """
+        if key in self._cache:
+            self._remove(key)
+
         # Evict oldest if at capacity
         if len(self._cache) >= self.max_size:
-            self._cache.popitem(last=False)  # Remove oldest (FIFO)
+            self._remove(next(iter(self._cache)))  # Remove oldest (FIFO)
+
+        chunks = [
+            chunk.__dict__ if hasattr(chunk, "__dict__") else chunk
+            for chunk in source_chunks
+        ]
+        referenced = set(document_ids or [])
+        referenced.update(
+            chunk["document_id"] for chunk in chunks if chunk.get("document_id")
+        )
 
         self._cache[key] = CachedResponse(
             response_text=response_text,
-            source_chunks=[
-                chunk.__dict__ if hasattr(chunk, "__dict__") else chunk
-                for chunk in source_chunks
-            ],
+            source_chunks=chunks,
             token_count=token_count,
             created_at=datetime.now(),
             hit_count=0,
+            document_ids=sorted(referenced),
         )
+        for document_id in referenced:
+            self._document_keys.setdefault(document_id, set()).add(key)
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry and drop it from the document index.
+
+        Args:
+            key: Cache key to remove
+        """
+        cached = self._cache.pop(key)
+        for document_id in cached.document_ids:
+            keys = self._document_keys.get(document_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._document_keys[document_id]
 
     def clear(self) -> int:
         """Clear all cached responses.
@@ -149,6 +198,7 @@ class ResponseCache:
         """
         count = len(self._cache)
         self._cache.clear()
+        self._document_keys.clear()
         logger.info("Response cache cleared", entries_removed=count)
         return count
 
@@ -161,17 +211,9 @@ class ResponseCache:
         Returns:
             Number of entries invalidated
         """
-        # Find and remove all entries containing this document_id
-        keys_to_remove = []
-        for key, cached in self._cache.items():
-            # Check if any source chunk references this document
-            for chunk in cached.source_chunks:
-                if chunk.get("document_id") == document_id:
-                    keys_to_remove.append(key)
-                    break
-
+        keys_to_remove = list(self._document_keys.get(document_id, ()))
         for key in keys_to_remove:
-            del self._cache[key]
+            self._remove(key)
 
         if keys_to_remove:
             logger.info(
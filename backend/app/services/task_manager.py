@@ -129,19 +129,36 @@ class TaskManager:
             if status == ProcessingStatus.ERROR and error:
                 task.progress = f"Failed: {error}"
 
-    def update_embedding_progress(self, task_id: str, current: int, total: int) -> None:
+    def update_embedding_progress(
+        self, task_id: str, current: int, total: Optional[int] = None
+    ) -> None:
         """Update embedding progress with chunk count.
 
         Args:
             task_id: Task identifier.
-            current: Current chunk being processed.
-            total: Total chunks to process.
+            current: Number of chunks embedded and stored so far.
+            total: Total chunks to process (None while still streaming).
+        """
+        if total is None:
+            progress = f"Generating embeddings... ({current} chunks stored)"
+        else:
+            progress = f"Generating embeddings... (chunk {current} of {total})"
+        self.update_status(task_id, ProcessingStatus.EMBEDDING, progress=progress)
+
+    def update_conversion_progress(
+        self, task_id: str, pages_done: int, total_pages: int
+    ) -> None:
+        """Update conversion progress for documents converted in page batches.
+
+        Args:
+            task_id: Task identifier.
+            pages_done: Pages converted so far.
+            total_pages: Total pages in the document.
         """
-        self.update_status(
-            task_id,
-            ProcessingStatus.EMBEDDING,
-            progress=f"Generating embeddings... (chunk {current} of {total})",
+        progress = (
+            f"Converting document to text... (page {pages_done} of {total_pages})"
         )
+        self.update_status(task_id, ProcessingStatus.CONVERTING, progress=progress)
 
     def delete_task(self, task_id: str) -> None:
         """Remove task from tracking."""
@@ -3,14 +3,24 @@ Vector store abstraction and ChromaDB implementation.
 Enables future migration to other vector stores without changing service layer.
 """
 
+import asyncio
 import os
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
 
+from app.core.logging_config import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+T = TypeVar("T")
+
 
 @dataclass
 class QueryResult:
@@ -22,12 +32,135 @@ class QueryResult:
     metadatas: List[Dict[str, Any]]
 
 
+@dataclass
+class DocumentVectors:
+    """All stored vectors of one document, in chunk order."""
+
+    ids: List[str]
+    embeddings: List[List[float]]
+    metadatas: List[Dict[str, Any]]
+    documents: List[str]
+
+
 class VectorStoreError(Exception):
     """Custom exception for vector store operations."""
 
     pass
 
 
+class BoundedExecutor:
+    """Dedicated thread pool for blocking vector store calls.
+
+    Caps the number of concurrent backend operations at max_workers and
+    tracks how many calls are queued behind them, so a slow HNSW query or
+    a large add never runs on (or starves) the event loop.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str) -> None:
+        """Create the executor.
+
+        Args:
+            max_workers: Maximum number of concurrent backend calls.
+            thread_name_prefix: Prefix for worker thread names.
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=thread_name_prefix,
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "queued": 0,
+            "active": 0,
+            "completed": 0,
+            "failed": 0,
+            "max_queue_depth": 0,
+        }
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking callable on the executor and await its result."""
+        with self._lock:
+            self._stats["queued"] += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._stats["queued"]
+            )
+
+        def _tracked() -> T:
+            with self._lock:
+                self._stats["queued"] -= 1
+                self._stats["active"] += 1
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self._stats["failed"] += 1
+                raise
+            finally:
+                with self._lock:
+                    self._stats["active"] -= 1
+            with self._lock:
+                self._stats["completed"] += 1
+            return result
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _tracked)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get executor statistics.
+
+        Returns:
+            Dict with max_workers, queued, active, completed, failed,
+            max_queue_depth.
+        """
+        with self._lock:
+            return {"max_workers": self.max_workers, **self._stats}
+
+    def shutdown(self) -> None:
+        """Shutdown the thread pool, waiting for in-flight calls."""
+        self._executor.shutdown(wait=True)
+
+
+def document_filter(document_ids: List[str]) -> Optional[Dict[str, Any]]:
+    """Build a metadata filter restricting a query to the given documents.
+
+    A single document uses an equality filter; several documents use one
+    ``$in`` filter so the store can merge top-k globally in a single search.
+
+    Args:
+        document_ids: Document UUIDs to search within.
+
+    Returns:
+        Metadata filter dict, or None if no documents were given.
+    """
+    unique_ids = list(dict.fromkeys(document_ids))
+    if not unique_ids:
+        return None
+    if len(unique_ids) == 1:
+        return {"document_id": unique_ids[0]}
+    return {"document_id": {"$in": unique_ids}}
+
+
+def truncate_embeddings(embeddings: Any, dimensions: int) -> np.ndarray:
+    """Reduce embeddings to their leading dimensions and re-normalize.
+
+    Voyage embeddings are Matryoshka-trained, so the first 256/512
+    components of a full vector, L2-normalized, match what the API returns
+    for that output dimension. This keeps both representations from one
+    embedding call.
+
+    Args:
+        embeddings: One vector or a matrix of row vectors.
+        dimensions: Leading components to keep.
+
+    Returns:
+        float32 array of the same rank with at most `dimensions` columns.
+    """
+    reduced = np.asarray(embeddings, dtype=np.float32)[..., :dimensions]
+    norms = np.linalg.norm(reduced, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (reduced / norms).astype(np.float32, copy=False)
+
+
 class VectorStoreInterface(ABC):
     """Abstract interface for vector storage backends.
 
@@ -35,6 +168,11 @@ class VectorStoreInterface(ABC):
     without changing service layer code.
     """
 
+    # Largest number of vectors one backend write accepts (None = no limit)
+    max_batch_size: Optional[int] = None
+    # Whether query() returns chunk text (else it is hydrated from SQLite)
+    store_documents: bool = True
+
     @abstractmethod
     def add(
         self,
@@ -47,9 +185,10 @@ class VectorStoreInterface(ABC):
 
         Args:
             ids: Unique identifiers for each vector (chunk IDs).
-            embeddings: 1024-dimensional float vectors from Voyage AI.
+            embeddings: Full-dimension float vectors from Voyage AI.
             metadatas: Metadata dicts with document_id, chunk_index.
-            documents: Original text content for each chunk.
+            documents: Original text content for each chunk (dropped by
+                backends configured not to store chunk text).
 
         Raises:
             VectorStoreError: If add operation fails.
@@ -62,13 +201,19 @@ class VectorStoreInterface(ABC):
         embedding: List[float],
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True,
     ) -> QueryResult:
         """Query for similar vectors.
 
         Args:
-            embedding: 1024-dimensional query vector.
+            embedding: Full-dimension query vector.
             n_results: Maximum number of results to return.
-            where: Optional metadata filter (e.g., {"document_id": "uuid"}).
+            where: Optional metadata filter (e.g., {"document_id": "uuid"}
+                or {"document_id": {"$in": ["uuid1", "uuid2"]}}).
+            include_content: Return documents and metadatas. With False
+                only ids and distances are filled in (documents and
+                metadatas are empty) and callers hydrate the hits they
+                keep from SQLite.
 
         Returns:
             QueryResult with ids, distances, documents, metadatas
@@ -91,6 +236,31 @@ class VectorStoreInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Delete vectors by chunk ID (unknown IDs are ignored).
+
+        Args:
+            ids: Chunk UUIDs to delete.
+
+        Raises:
+            VectorStoreError: If delete operation fails.
+        """
+        pass
+
+    @abstractmethod
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of existing vectors, keeping embeddings.
+
+        Args:
+            ids: Chunk UUIDs to update.
+            metadatas: New metadata dict for each ID.
+
+        Raises:
+            VectorStoreError: If an ID is unknown or the update fails.
+        """
+        pass
+
     @abstractmethod
     def count(self) -> int:
         """Return total number of vectors in the store."""
@@ -105,26 +275,218 @@ class VectorStoreInterface(ABC):
         """
         pass
 
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+    ) -> None:
+        """Insert vectors, replacing any already stored under the same IDs.
+
+        Input is split into batches of at most max_batch_size, written in
+        order. Re-sending a batch is harmless, so a retried ingestion can
+        replay batches that may already have been stored. If a batch
+        fails, earlier batches stay written.
+
+        Args:
+            ids: Unique identifiers for each vector (chunk IDs).
+            embeddings: Full-dimension float vectors from Voyage AI.
+            metadatas: Metadata dicts with document_id, chunk_index.
+            documents: Original text content for each chunk.
+
+        Raises:
+            VectorStoreError: If a batch cannot be written.
+        """
+        batch_size = self.max_batch_size or max(len(ids), 1)
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self._upsert_batch(
+                ids[start:end],
+                embeddings[start:end],
+                metadatas[start:end],
+                documents[start:end],
+            )
+
+    def _upsert_batch(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+    ) -> None:
+        """Write one upsert batch; the default deletes then re-adds."""
+        self.delete(ids)
+        self.add(ids, embeddings, metadatas, documents)
+
+    def get_all_document_ids(self) -> List[str]:
+        """Return the distinct document IDs that have stored vectors.
+
+        Backends override this; the default reports no documents.
+        """
+        return []
+
+    def get_document_vectors(self, document_id: str) -> DocumentVectors:
+        """Return every stored vector of a document, ordered by chunk_index.
+
+        Used to clone a document's embeddings without re-embedding.
+        Backends override this; the default reports no vectors.
+
+        Args:
+            document_id: UUID of the document.
+
+        Raises:
+            VectorStoreError: If the read fails.
+        """
+        return DocumentVectors(ids=[], embeddings=[], metadatas=[], documents=[])
+
+    async def _run_blocking(
+        self, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Run a blocking backend call without blocking the event loop.
+
+        Backends with their own executor override this; the default uses
+        the shared asyncio thread pool.
+        """
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def aadd(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+    ) -> None:
+        """Async variant of add(), executed off the event loop."""
+        await self._run_blocking(self.add, ids, embeddings, metadatas, documents)
+
+    async def aupsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+    ) -> None:
+        """Async variant of upsert(), executed off the event loop."""
+        await self._run_blocking(self.upsert, ids, embeddings, metadatas, documents)
+
+    async def aquery(
+        self,
+        embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True,
+    ) -> QueryResult:
+        """Async variant of query(), executed off the event loop."""
+        return await self._run_blocking(
+            self.query, embedding, n_results, where, include_content
+        )
+
+    async def adelete_by_document(self, document_id: str) -> None:
+        """Async variant of delete_by_document(), executed off the event loop."""
+        await self._run_blocking(self.delete_by_document, document_id)
+
+    async def adelete(self, ids: List[str]) -> None:
+        """Async variant of delete(), executed off the event loop."""
+        await self._run_blocking(self.delete, ids)
+
+    async def aupdate_metadatas(
+        self, ids: List[str], metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Async variant of update_metadatas(), executed off the event loop."""
+        await self._run_blocking(self.update_metadatas, ids, metadatas)
+
+    async def acount(self) -> int:
+        """Async variant of count(), executed off the event loop."""
+        return await self._run_blocking(self.count)
+
+    async def ahealth_check(self) -> bool:
+        """Async variant of health_check(), executed off the event loop."""
+        return await self._run_blocking(self.health_check)
+
+    async def aget_all_document_ids(self) -> List[str]:
+        """Async variant of get_all_document_ids(), executed off the event loop."""
+        return await self._run_blocking(self.get_all_document_ids)
+
+    async def aget_document_vectors(self, document_id: str) -> DocumentVectors:
+        """Async variant of get_document_vectors(), executed off the event loop."""
+        return await self._run_blocking(self.get_document_vectors, document_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend statistics (executor load, queue depth).
+
+        Returns:
+            Dict of backend-specific statistics; empty by default.
+        """
+        return {}
+
+    def close(self) -> None:
+        """Release resources held by the backend (executors, handles)."""
+        pass
+
 
 class ChromaVectorStore(VectorStoreInterface):
     """ChromaDB implementation of VectorStoreInterface.
 
     Uses persistent storage with cosine similarity.
     Does NOT use ChromaDB's embedding function - we provide pre-computed
-    1024-dimensional Voyage AI embeddings.
+    Voyage AI embeddings.
+
+    Async methods (aquery, aadd, ...) run on a dedicated bounded executor
+    so ChromaDB's blocking calls never stall SSE streams on the event loop.
+
+    With store_documents=False chunk text is not written to ChromaDB
+    (SQLite already holds it), roughly halving the collection size;
+    queries must then use include_content=False and hydrate from SQLite.
+
+    Two-stage retrieval: with search_dimensions > 0 a second collection
+    holds each vector truncated to its leading search_dimensions
+    components. Queries traverse that smaller HNSW graph for
+    n_results * rescore_factor candidates, whose full vectors are then
+    fetched by id and rescored, so distances stay full-dimension cosine.
+
+    HNSW tuning: hnsw_m and hnsw_construction_ef only apply when a
+    collection is created; hnsw_search_ef is also pushed to existing
+    collections on open.
 
     IMPORTANT: persist_path should be an absolute path derived from
     configuration to avoid issues in containerized deployments.
     """
 
     COLLECTION_NAME = "iubar_documents"
-
-    def __init__(self, persist_path: str) -> None:
+    BACKFILL_BATCH_SIZE = 1000  # Rows copied per page when rebuilding
+    HNSW_CONFIGURATION_KEYS = {  # chromadb 1.x configuration -> hnsw:* name
+        "space": "space",
+        "max_neighbors": "M",
+        "ef_construction": "construction_ef",
+        "ef_search": "search_ef",
+    }
+
+    def __init__(
+        self,
+        persist_path: str,
+        max_workers: int = 4,
+        store_documents: bool = True,
+        search_dimensions: int = 0,
+        rescore_factor: int = 4,
+        hnsw_m: Optional[int] = None,
+        hnsw_construction_ef: Optional[int] = None,
+        hnsw_search_ef: Optional[int] = None,
+    ) -> None:
         """Initialize ChromaDB with persistent storage.
 
         Args:
             persist_path: Directory path for ChromaDB persistence.
                          Will be converted to absolute path if relative.
+            max_workers: Maximum concurrent ChromaDB calls from async callers.
+            store_documents: Also store chunk text alongside each vector.
+            search_dimensions: Leading dimensions indexed for the first
+                search pass (0 searches the full vectors directly).
+            rescore_factor: First-pass candidates per requested result
+                that are rescored at full dimension.
+            hnsw_m: HNSW graph degree (None = Chroma default).
+            hnsw_construction_ef: HNSW build beam width (None = default).
+            hnsw_search_ef: HNSW query beam width (None = default).
 
         Raises:
             VectorStoreError: If initialization fails.
@@ -137,17 +499,136 @@ class ChromaVectorStore(VectorStoreInterface):
             os.makedirs(absolute_path, exist_ok=True)
 
             self._persist_path = absolute_path
+            self.store_documents = store_documents
+            self.hnsw_m = hnsw_m
+            self.hnsw_construction_ef = hnsw_construction_ef
+            self.hnsw_search_ef = hnsw_search_ef
             self._client = chromadb.PersistentClient(
                 path=absolute_path,
                 settings=ChromaSettings(anonymized_telemetry=False),
             )
-            self._collection = self._client.get_or_create_collection(
-                name=self.COLLECTION_NAME,
-                metadata={"hnsw:space": "cosine"},
-            )
+            self._collection = self._get_collection(self.COLLECTION_NAME)
+            self.max_batch_size = self._backend_max_batch_size()
+            self.search_dimensions = search_dimensions
+            self.rescore_factor = max(1, rescore_factor)
+            self._search_collection = None
+            if search_dimensions > 0:
+                self._search_collection = self._open_search_collection()
         except Exception as e:
             raise VectorStoreError(f"Failed to initialize vector store: {e}") from e
 
+        self._executor = BoundedExecutor(
+            max_workers=max_workers, thread_name_prefix="vector_store_"
+        )
+
+    async def _run_blocking(
+        self, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Run a blocking ChromaDB call on the dedicated executor."""
+        return await self._executor.run(func, *args, **kwargs)
+
+    def _collection_metadata(self) -> Dict[str, Any]:
+        """HNSW configuration for newly created collections."""
+        metadata: Dict[str, Any] = {"hnsw:space": "cosine"}
+        if self.hnsw_m is not None:
+            metadata["hnsw:M"] = self.hnsw_m
+        if self.hnsw_construction_ef is not None:
+            metadata["hnsw:construction_ef"] = self.hnsw_construction_ef
+        if self.hnsw_search_ef is not None:
+            metadata["hnsw:search_ef"] = self.hnsw_search_ef
+        return metadata
+
+    def _get_collection(self, name: str) -> Any:
+        """Open or create a collection, applying the configured search_ef.
+
+        hnsw:* metadata only configures new collections, so search_ef is
+        pushed to an existing one through its configuration (chromadb
+        1.x; older clients keep the search_ef it was created with).
+        """
+        collection = self._client.get_or_create_collection(
+            name=name, metadata=self._collection_metadata()
+        )
+        configuration = getattr(collection, "configuration_json", None)
+        if self.hnsw_search_ef is None or configuration is None:
+            return collection
+        if (configuration.get("hnsw") or {}).get("ef_search") != self.hnsw_search_ef:
+            try:
+                collection.modify(
+                    configuration={"hnsw": {"ef_search": self.hnsw_search_ef}}
+                )
+            except Exception as e:
+                logger.warning(
+                    "Could not update HNSW search_ef",
+                    collection=name,
+                    error_type=type(e).__name__,
+                    error_message=str(e),
+                )
+        return collection
+
+    def _hnsw_parameters(self) -> Dict[str, Any]:
+        """Effective HNSW parameters of the main collection."""
+        configuration = getattr(self._collection, "configuration_json", None)
+        hnsw = (configuration or {}).get("hnsw")
+        if hnsw:
+            return {
+                name: hnsw[key]
+                for key, name in self.HNSW_CONFIGURATION_KEYS.items()
+                if key in hnsw
+            }
+        return {
+            key.split(":", 1)[1]: value
+            for key, value in (self._collection.metadata or {}).items()
+            if key.startswith("hnsw:")
+        }
+
+    def _backend_max_batch_size(self) -> Optional[int]:
+        """Largest batch the ChromaDB client accepts, if it reports one."""
+        try:
+            if hasattr(self._client, "get_max_batch_size"):
+                return int(self._client.get_max_batch_size())
+            return int(self._client.max_batch_size)
+        except Exception:
+            return None
+
+    def _open_search_collection(self) -> Any:
+        """Open the reduced-dimension collection, backfilling it if stale.
+
+        The collection is rebuilt from the full vectors whenever its size
+        disagrees with the main collection (first enable, or a crash
+        between the two writes of an add).
+        """
+        name = f"{self.COLLECTION_NAME}_{self.search_dimensions}d"
+        collection = self._get_collection(name)
+        total = self._collection.count()
+        if collection.count() == total:
+            return collection
+
+        self._client.delete_collection(name)
+        collection = self._client.create_collection(
+            name=name, metadata=self._collection_metadata()
+        )
+        for offset in range(0, total, self.BACKFILL_BATCH_SIZE):
+            page = self._collection.get(
+                include=["embeddings", "metadatas"],
+                limit=self.BACKFILL_BATCH_SIZE,
+                offset=offset,
+            )
+            if not page["ids"]:
+                break
+            collection.add(
+                ids=page["ids"],
+                embeddings=truncate_embeddings(
+                    page["embeddings"], self.search_dimensions
+                ).tolist(),
+                metadatas=page["metadatas"],
+            )
+        logger.info(
+            "Reduced-dimension collection rebuilt",
+            vectors=total,
+            dimensions=self.search_dimensions,
+        )
+        return collection
+
     def add(
         self,
         ids: List[str],
@@ -161,30 +642,130 @@ class ChromaVectorStore(VectorStoreInterface):
                 ids=ids,
                 embeddings=embeddings,
                 metadatas=metadatas,
-                documents=documents,
+                documents=documents if self.store_documents else None,
             )
+            if self._search_collection is not None:
+                self._search_collection.add(
+                    ids=ids,
+                    embeddings=truncate_embeddings(
+                        embeddings, self.search_dimensions
+                    ).tolist(),
+                    metadatas=metadatas,
+                )
         except Exception as e:
             raise VectorStoreError(f"Failed to add vectors: {e}") from e
 
+    def _upsert_batch(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: List[str],
+    ) -> None:
+        """Upsert one batch with ChromaDB's native upsert."""
+        try:
+            self._collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                documents=documents if self.store_documents else None,
+            )
+            if self._search_collection is not None:
+                self._search_collection.upsert(
+                    ids=ids,
+                    embeddings=truncate_embeddings(
+                        embeddings, self.search_dimensions
+                    ).tolist(),
+                    metadatas=metadatas,
+                )
+        except Exception as e:
+            raise VectorStoreError(f"Failed to upsert vectors: {e}") from e
+
     def query(
         self,
         embedding: List[float],
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
+        include_content: bool = True,
     ) -> QueryResult:
         """Query for similar vectors."""
+        if self._search_collection is not None:
+            return self._two_stage_query(embedding, n_results, where, include_content)
+
+        include = ["distances"]
+        if include_content:
+            include += ["documents", "metadatas"]
         try:
             results = self._collection.query(
                 query_embeddings=[embedding],
                 n_results=n_results,
                 where=where,
-                include=["documents", "metadatas", "distances"],
+                include=include,
             )
             return QueryResult(
                 ids=results["ids"][0] if results["ids"] else [],
                 distances=results["distances"][0] if results["distances"] else [],
-                documents=results["documents"][0] if results["documents"] else [],
-                metadatas=results["metadatas"][0] if results["metadatas"] else [],
+                documents=(
+                    results["documents"][0]
+                    if include_content and results["documents"]
+                    else []
+                ),
+                metadatas=(
+                    results["metadatas"][0]
+                    if include_content and results["metadatas"]
+                    else []
+                ),
+            )
+        except Exception as e:
+            raise VectorStoreError(f"Failed to query vectors: {e}") from e
+
+    def _two_stage_query(
+        self,
+        embedding: List[float],
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+        include_content: bool,
+    ) -> QueryResult:
+        """Shortlist on the reduced collection, then rescore full vectors."""
+        include = ["embeddings"]
+        if include_content:
+            include += ["documents", "metadatas"]
+        try:
+            shortlist = self._search_collection.query(
+                query_embeddings=[
+                    truncate_embeddings(embedding, self.search_dimensions).tolist()
+                ],
+                n_results=n_results * self.rescore_factor,
+                where=where,
+                include=["distances"],
+            )
+            candidate_ids = shortlist["ids"][0] if shortlist["ids"] else []
+            if not candidate_ids:
+                return QueryResult(ids=[], distances=[], documents=[], metadatas=[])
+
+            full = self._collection.get(ids=candidate_ids, include=include)
+            vectors = np.asarray(full["embeddings"], dtype=np.float32)
+            query_vector = np.asarray(embedding, dtype=np.float32)
+            scores = (vectors @ query_vector) / (
+                np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+                + 1e-12
+            )
+            top = np.argsort(-scores, kind="stable")[:n_results]
+            documents = full.get("documents") or []
+            metadatas = full.get("metadatas") or []
+            return QueryResult(
+                ids=[full["ids"][i] for i in top],
+                distances=[float(1.0 - scores[i]) for i in top],
+                documents=(
+                    [documents[i] for i in top]
+                    if include_content and documents
+                    else []
+                ),
+                metadatas=(
+                    [metadatas[i] for i in top]
+                    if include_content and metadatas
+                    else []
+                ),
             )
         except Exception as e:
             raise VectorStoreError(f"Failed to query vectors: {e}") from e
@@ -193,13 +774,76 @@ class ChromaVectorStore(VectorStoreInterface):
         """Delete all vectors for a document."""
         try:
             self._collection.delete(where={"document_id": document_id})
+            if self._search_collection is not None:
+                self._search_collection.delete(where={"document_id": document_id})
+        except Exception as e:
+            raise VectorStoreError(f"Failed to delete vectors: {e}") from e
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete vectors by chunk ID."""
+        if not ids:
+            return
+        try:
+            self._collection.delete(ids=ids)
+            if self._search_collection is not None:
+                self._search_collection.delete(ids=ids)
         except Exception as e:
             raise VectorStoreError(f"Failed to delete vectors: {e}") from e
 
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of existing vectors."""
+        if not ids:
+            return
+        try:
+            self._collection.update(ids=ids, metadatas=metadatas)
+            if self._search_collection is not None:
+                self._search_collection.update(ids=ids, metadatas=metadatas)
+        except Exception as e:
+            raise VectorStoreError(f"Failed to update vectors: {e}") from e
+
     def count(self) -> int:
         """Return total number of vectors in the store."""
         return self._collection.count()
 
+    def get_all_document_ids(self) -> List[str]:
+        """Return the distinct document IDs that have stored vectors."""
+        try:
+            results = self._collection.get(include=["metadatas"])
+        except Exception as e:
+            raise VectorStoreError(f"Failed to list documents: {e}") from e
+        document_ids = {
+            metadata["document_id"]
+            for metadata in results.get("metadatas") or []
+            if metadata and "document_id" in metadata
+        }
+        return sorted(document_ids)
+
+    def get_document_vectors(self, document_id: str) -> DocumentVectors:
+        """Return every stored vector of a document, ordered by chunk_index."""
+        try:
+            results = self._collection.get(
+                where={"document_id": document_id},
+                include=["embeddings", "metadatas", "documents"],
+            )
+        except Exception as e:
+            raise VectorStoreError(f"Failed to read vectors: {e}") from e
+        ids = results.get("ids") or []
+        embeddings = results.get("embeddings")
+        embeddings = [] if embeddings is None else embeddings
+        metadatas = results.get("metadatas") or []
+        documents = results.get("documents") or []
+        if not self.store_documents or len(documents) != len(ids):
+            documents = [""] * len(ids)
+        order = sorted(
+            range(len(ids)), key=lambda i: (metadatas[i] or {}).get("chunk_index", 0)
+        )
+        return DocumentVectors(
+            ids=[ids[i] for i in order],
+            embeddings=[list(map(float, embeddings[i])) for i in order],
+            metadatas=[metadatas[i] for i in order],
+            documents=[documents[i] for i in order],
+        )
+
     def health_check(self) -> bool:
         """Check if the vector store is operational."""
         try:
@@ -207,3 +851,15 @@ class ChromaVectorStore(VectorStoreInterface):
             return True
         except Exception:
             return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics (concurrency and queue depth)."""
+        return {
+            **self._executor.get_stats(),
+            "search_dimensions": self.search_dimensions,
+            "hnsw": self._hnsw_parameters(),
+        }
+
+    def close(self) -> None:
+        """Shutdown the dedicated executor."""
+        self._executor.shutdown()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Recall / latency / throughput benchmark for VectorStoreInterface backends.
+
+Loads a synthetic clustered corpus (or an exported .npy matrix, such as
+the NumPy store's vectors.npy) into each configured backend and reports
+recall@k against an exact float32 brute-force ranking, p50/p95/p99 query
+latency, insert throughput and index memory.
+
+List-valued options are swept: every combination becomes one row, so a
+single run compares e.g. several HNSW search_ef values or quantization
+modes.
+
+Usage:
+    python benchmark_vector_store.py --vectors 20000 --dimensions 1024
+    python benchmark_vector_store.py --backend chroma --hnsw-search-ef 10 50 100
+    python benchmark_vector_store.py --backend numpy --quantization none int8
+    python benchmark_vector_store.py --corpus data/numpy_index/vectors.npy
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services.vector_store import ChromaVectorStore, VectorStoreInterface
+
+ADD_BATCH_SIZE = 1000
+
+
+def make_corpus(
+    count: int, queries: int, dimensions: int, clusters: int, seed: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Clustered, L2-normalized float32 vectors resembling chunk embeddings.
+
+    Returns:
+        (corpus, queries) drawn from the same clusters
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count + queries)
+    noise = rng.normal(scale=0.6, size=(count + queries, dimensions))
+    vectors = centers[labels] + noise.astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[:count], vectors[count:]
+
+
+def load_corpus(path: str, queries: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Load an exported (n, d) matrix; queries are perturbed corpus rows."""
+    corpus = np.asarray(np.load(path, mmap_mode="r"), dtype=np.float32)
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(corpus), min(queries, len(corpus)), replace=False)
+    picked = corpus[rows]
+    noisy = picked + rng.normal(scale=0.02, size=picked.shape).astype(np.float32)
+    return corpus, noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def chunk_id(row: int) -> str:
+    """Id of a corpus row, grouped into one document per ADD_BATCH_SIZE rows."""
+    return f"doc_{row // ADD_BATCH_SIZE}_{row % ADD_BATCH_SIZE}"
+
+
+def insert(store: VectorStoreInterface, corpus: np.ndarray) -> float:
+    """Insert the corpus in ADD_BATCH_SIZE batches.
+
+    Returns:
+        Insert throughput in vectors per second
+    """
+    started = time.perf_counter()
+    for start in range(0, len(corpus), ADD_BATCH_SIZE):
+        batch = corpus[start : start + ADD_BATCH_SIZE]
+        document_id = f"doc_{start // ADD_BATCH_SIZE}"
+        store.add(
+            ids=[chunk_id(start + i) for i in range(len(batch))],
+            embeddings=batch.tolist(),
+            metadatas=[
+                {"document_id": document_id, "chunk_index": i}
+                for i in range(len(batch))
+            ],
+            documents=[""] * len(batch),
+        )
+    return len(corpus) / (time.perf_counter() - started)
+
+
+def search(
+    store: VectorStoreInterface, queries: np.ndarray, truth: List[set], k: int
+) -> Dict[str, float]:
+    """Recall@k and latency percentiles over all queries."""
+    hits = 0
+    latencies = []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        result = store.query(
+            embedding=query.tolist(), n_results=k, include_content=False
+        )
+        latencies.append(time.perf_counter() - started)
+        hits += len(expected.intersection(result.ids))
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        "recall": hits / (k * len(queries)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def index_bytes(store: VectorStoreInterface, path: str) -> int:
+    """Resident index size reported by the store, else its on-disk size.
+
+    Chroma loads its HNSW segment files whole, so their size is a close
+    proxy for the memory the index occupies.
+    """
+    reported = store.get_stats().get("memory_bytes")
+    if reported is not None:
+        return int(reported)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def backend_configs(
+    args: argparse.Namespace,
+) -> List[Tuple[str, Callable[..., VectorStoreInterface]]]:
+    """Expand the CLI sweep into (label, factory) pairs.
+
+    Each factory takes persist_path and returns an empty store.
+    """
+    configs: List[Tuple[str, Callable[..., VectorStoreInterface]]] = []
+    for search_dimensions in args.search_dimensions:
+        suffix = f" d={search_dimensions}" if search_dimensions else ""
+        common = {
+            "search_dimensions": search_dimensions,
+            "rescore_factor": args.rescore_factor,
+        }
+        if "chroma" in args.backend:
+            for m, construction_ef, search_ef in itertools.product(
+                args.hnsw_m, args.hnsw_construction_ef, args.hnsw_search_ef
+            ):
+                label = "chroma" + "".join(
+                    f" {name}={value}"
+                    for name, value in (
+                        ("M", m), ("cef", construction_ef), ("ef", search_ef)
+                    )
+                    if value is not None
+                )
+                factory = partial(
+                    ChromaVectorStore,
+                    store_documents=False,
+                    hnsw_m=m,
+                    hnsw_construction_ef=construction_ef,
+                    hnsw_search_ef=search_ef,
+                    **common,
+                )
+                configs.append((label + suffix, factory))
+        if "numpy" in args.backend:
+            for quantization, ivf_lists in itertools.product(
+                args.quantization, args.ivf_lists
+            ):
+                label = f"numpy {quantization}"
+                if ivf_lists:
+                    label += f" ivf={ivf_lists}/{args.ivf_probes}"
+                factory = partial(
+                    NumpyVectorStore,
+                    quantization=quantization,
+                    ivf_lists=ivf_lists,
+                    ivf_probes=args.ivf_probes,
+                    ivf_min_rows=0,
+                    **common,
+                )
+                configs.append((label + suffix, factory))
+    return configs
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse benchmark options (list-valued options are swept)."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--backend",
+        nargs="+",
+        choices=["chroma", "numpy"],
+        default=["chroma", "numpy"],
+    )
+    parser.add_argument("--corpus", help="Exported (n, d) .npy matrix to load")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    # HNSW options default to ChromaDB's own values
+    parser.add_argument("--hnsw-m", type=int, nargs="+", default=[None])
+    parser.add_argument("--hnsw-construction-ef", type=int, nargs="+", default=[None])
+    parser.add_argument("--hnsw-search-ef", type=int, nargs="+", default=[None])
+    parser.add_argument(
+        "--quantization",
+        nargs="+",
+        choices=NumpyVectorStore.QUANTIZATIONS,
+        default=["none"],
+    )
+    parser.add_argument("--ivf-lists", type=int, nargs="+", default=[0])
+    parser.add_argument("--ivf-probes", type=int, default=8)
+    parser.add_argument("--search-dimensions", type=int, nargs="+", default=[0])
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Run the benchmark sweep and print one result row per configuration."""
+    args = parse_args(argv)
+
+    if args.corpus:
+        corpus, queries = load_corpus(args.corpus, args.queries, args.seed)
+    else:
+        corpus, queries = make_corpus(
+            args.vectors, args.queries, args.dimensions, args.clusters, args.seed
+        )
+    k = min(args.k, len(corpus))
+    exact = queries @ corpus.T
+    truth = [
+        {chunk_id(int(row)) for row in np.argpartition(-scores, k - 1)[:k]}
+        for scores in exact
+    ]
+
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for index, (label, factory) in enumerate(backend_configs(args)):
+            path = str(Path(workdir) / f"store_{index}")
+            store = factory(persist_path=path)
+            try:
+                throughput = insert(store, corpus)
+                if isinstance(store, NumpyVectorStore):
+                    store.wait_for_ivf()  # Lists train in the background
+                stats = search(store, queries, truth, k)
+                memory = index_bytes(store, path)
+            finally:
+                store.close()
+            rows.append(
+                {
+                    "backend": label,
+                    "insert_per_s": throughput,
+                    "memory_bytes": memory,
+                    **stats,
+                }
+            )
+
+    print(
+        f"{len(corpus)} vectors x {corpus.shape[1]} dims, "
+        f"{len(queries)} queries, k={k}"
+    )
+    width = max([len("backend")] + [len(row["backend"]) for row in rows]) + 2
+    print(
+        f"{'backend':<{width}}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'insert/s':>11}{'memory MB':>11}"
+    )
+    for row in rows:
+        print(
+            f"{row['backend']:<{width}}{row['recall']:>10.4f}"
+            f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+            f"{row['insert_per_s']:>11.0f}{row['memory_bytes'] / 1024 ** 2:>11.1f}"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,15 @@ from fastapi.responses import JSONResponse
 
 from app.config import settings
 from app.core.exceptions import IubarError, NotFoundError, ValidationError
-from app.api.documents import router as documents_router
+from app.api.documents import (
+    ingestion_queue,
+    oversized_upload,
+    resume_interrupted_ingestion,
+    router as documents_router,
+)
 from app.api.chat import router as chat_router
 from app.core.database import init_db
+from app.core.service_manager import service_manager
 
 # Import models to register them with SQLAlchemy
 from app.models import ChatSession, ChatMessage, DocumentSummary, Document, Chunk
@@ -31,6 +37,20 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+
+# Reject oversized uploads from Content-Length; registered before CORS so
+# the 413 still carries CORS headers
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Answer 413 before receiving an upload declared larger than the limit."""
+    error = oversized_upload(request)
+    if error is not None:
+        return JSONResponse(
+            status_code=error.status_code, content={"detail": error.detail}
+        )
+    return await call_next(request)
+
+
 # Configure CORS for development
 app.add_middleware(
     CORSMiddleware,
@@ -47,28 +67,29 @@ app.include_router(chat_router)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on application startup."""
+    """Initialize database and shared services on application startup."""
     await init_db()
     logger.info("Database initialized successfully")
+    await service_manager.startup()
+    try:
+        resumed = await resume_interrupted_ingestion()
+        if resumed:
+            logger.info(f"Resumed {resumed} interrupted ingestion job(s)")
+    except Exception as e:
+        logger.error(f"Failed to resume interrupted ingestion: {e}")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup resources on application shutdown.
 
-    Note: This is a temporary solution. Full implementation requires:
-    - Singleton pattern for EmbeddingService with ThreadPoolExecutor.shutdown()
-    - Cancellation of background cleanup tasks (SessionManager, RateLimiter)
-    - Proper dependency injection for service lifecycle management
-
-    See .kiro/documentation/project-docs/future-tasks.md for complete solution.
+    Stops the ingestion workers, then shuts down the shared services
+    (embedding executor, DeepSeek HTTP pool, vector store handle) owned by
+    the application-scoped ServiceManager.
     """
     logger.info("Application shutting down...")
-    logger.warning(
-        "Shutdown handler is incomplete - ThreadPoolExecutor and background tasks "
-        "are not being cleaned up. Server may hang on exit. "
-        "See future-tasks.md for full implementation."
-    )
+    await ingestion_queue.stop()
+    await service_manager.shutdown()
 
 
 @app.get("/")
@@ -102,7 +123,6 @@ async def system_status():
     import os
     from sqlalchemy import text
     from app.core.database import async_session
-    from app.services.vector_store import ChromaVectorStore
 
     status_code = 200
     result = {
@@ -126,13 +146,22 @@ async def system_status():
 
     # Check vector store connectivity
     try:
-        vector_store = ChromaVectorStore(settings.chroma_path)
-        if vector_store.health_check():
-            result["vector_store"] = {
-                "status": "connected",
-                "path": settings.chroma_path,
-                "collection": "iubar_documents",
-            }
+        vector_store = service_manager.get_vector_store()
+        if await vector_store.ahealth_check():
+            if settings.vector_store_backend == "numpy":
+                result["vector_store"] = {
+                    "status": "connected",
+                    "backend": "numpy",
+                    "path": settings.numpy_index_path,
+                    "index": vector_store.get_stats(),
+                }
+            else:
+                result["vector_store"] = {
+                    "status": "connected",
+                    "path": settings.chroma_path,
+                    "collection": "iubar_documents",
+                    "executor": vector_store.get_stats(),
+                }
         else:
             status_code = 503
     except Exception:
@@ -0,0 +1,31 @@
+"""
+Tests for the vector store benchmark harness.
+
+Runs a tiny NumPy-only sweep and checks the reported recall, latency and
+throughput figures.
+"""
+
+import benchmark_vector_store
+
+
+def test_sweep_reports_every_configuration(capsys):
+    """Each swept configuration yields one row; flat search is exact."""
+    rows = benchmark_vector_store.main(
+        [
+            "--backend", "numpy",
+            "--vectors", "300",
+            "--dimensions", "32",
+            "--clusters", "10",
+            "--queries", "20",
+            "--k", "5",
+            "--quantization", "none", "int8",
+        ]
+    )
+
+    assert [row["backend"] for row in rows] == ["numpy none", "numpy int8"]
+    assert rows[0]["recall"] == 1.0
+    assert rows[1]["memory_bytes"] < rows[0]["memory_bytes"]
+    for row in rows:
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+        assert row["insert_per_s"] > 0
+    assert "recall@k" in capsys.readouterr().out
@@ -7,6 +7,7 @@ Integration test for response caching.
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
+from app.services.document_summary import SummaryIndex
 from app.services.rag_service import RAGService, RetrievedChunk
 from app.services.response_cache import ResponseCache
 
@@ -27,7 +28,7 @@ def mock_services_for_cache():
     mock_result.metadatas = [
         {"document_id": "doc1", "chunk_index": 0, "token_count": 50}
     ]
-    vector_store.query = MagicMock(return_value=mock_result)
+    vector_store.aquery = AsyncMock(return_value=mock_result)
 
     # Mock DeepSeek client with call tracking
     deepseek_client = MagicMock()
@@ -53,7 +54,7 @@ def mock_services_for_cache():
 
     # Mock document summary service
     doc_summary_service = MagicMock()
-    doc_summary_service.get_all_summaries = AsyncMock(return_value=[])
+    doc_summary_service.get_summary_index = AsyncMock(return_value=SummaryIndex())
 
     return {
         "embedding_service": embedding_service,
@@ -0,0 +1,199 @@
+"""
+Tests for chunk position columns and the focus chunk offset index.
+
+Uses an in-memory SQLite database to verify bisection lookups, cache
+invalidation, the offset backfill for old databases, that RAG
+retrieval always includes the chunk under the focus caret, and that
+id-only search hits are hydrated from SQLite.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base, _add_missing_columns
+from app.models.document import Chunk, Document
+from app.services.chunk_offset_index import ChunkOffsetIndex
+from app.services.rag_service import RAGService
+
+
+@pytest_asyncio.fixture
+async def session():
+    """Async session with one document split into three overlapping chunks."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        db.add(
+            Document(
+                id="doc-1",
+                filename="doc.md",
+                original_name="doc.md",
+                file_type="md",
+                upload_time="2026-01-01T00:00:00+00:00",
+            )
+        )
+        for i, (start, end) in enumerate([(0, 120), (100, 220), (200, 300)]):
+            db.add(
+                Chunk(
+                    id=f"c{i}",
+                    document_id="doc-1",
+                    chunk_index=i,
+                    content=f"chunk {i}",
+                    token_count=30,
+                    start_char=start,
+                    end_char=end,
+                )
+            )
+        await db.commit()
+        yield db
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_locate_bisects_to_covering_chunk(session):
+    """Positions resolve to the chunk starting closest before them."""
+    index = ChunkOffsetIndex()
+
+    assert await index.locate(session, "doc-1", 0) == "c0"
+    assert await index.locate(session, "doc-1", 110) == "c1"
+    assert await index.locate(session, "doc-1", 299) == "c2"
+    assert await index.locate(session, "doc-1", 300) is None
+    assert await index.locate(session, "other", 10) is None
+
+
+@pytest.mark.asyncio
+async def test_offsets_are_cached_until_invalidated(session):
+    """Loaded offsets are reused; invalidate() forces a reload."""
+    index = ChunkOffsetIndex()
+    first = await index.get(session, "doc-1")
+    assert await index.get(session, "doc-1") is first
+
+    index.invalidate("doc-1")
+
+    assert await index.get(session, "doc-1") is not first
+
+
+def test_least_recently_used_documents_are_evicted():
+    """Only max_documents documents stay in memory."""
+    index = ChunkOffsetIndex(max_documents=2)
+    for doc_id in ["a", "b", "c"]:
+        index.build(doc_id, [(f"{doc_id}0", 0, 10)])
+
+    assert len(index) == 2
+
+
+def test_stale_build_is_not_cached():
+    """A load that raced with an invalidation is not kept."""
+    index = ChunkOffsetIndex()
+    index.invalidate("doc-1")
+
+    index.build("doc-1", [("c0", 0, 10)], generation=0)
+
+    assert len(index) == 0
+
+
+@pytest.mark.asyncio
+async def test_offsets_are_backfilled_from_chunk_metadata():
+    """Chunk tables created before the offset columns are migrated."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE chunks (id VARCHAR(36) PRIMARY KEY, "
+                "document_id VARCHAR(36) NOT NULL, chunk_index INTEGER NOT NULL, "
+                "content TEXT NOT NULL, token_count INTEGER NOT NULL, "
+                "chunk_metadata TEXT)"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO chunks VALUES ('c0', 'doc-1', 0, 'x', 1, "
+                '\'{"start_char": 5, "end_char": 42}\')'
+            )
+        )
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        row = (
+            await conn.execute(text("SELECT start_char, end_char FROM chunks"))
+        ).one()
+        indexes = await conn.execute(text("PRAGMA index_list(chunks)"))
+        index_names = {r[1] for r in indexes}
+    await engine.dispose()
+
+    assert tuple(row) == (5, 42)
+    assert "ix_chunks_document_start" in index_names
+
+
+@pytest.mark.asyncio
+async def test_rag_includes_focused_chunk_without_vector_query(session):
+    """A focused chunk missing from search results is read from SQLite."""
+    embedding_service = MagicMock()
+    embedding_service.embed_query = AsyncMock(return_value=[0.1] * 4)
+    results = MagicMock()
+    results.ids = ["c0"]
+    results.distances = [0.1]
+    results.documents = ["chunk 0"]
+    results.metadatas = [{"document_id": "doc-1", "chunk_index": 0}]
+    vector_store = MagicMock()
+    vector_store.aquery = AsyncMock(return_value=results)
+    rag_service = RAGService(
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+        deepseek_client=MagicMock(),
+        response_cache=MagicMock(),
+        document_summary_service=MagicMock(),
+        chunk_offset_index=ChunkOffsetIndex(),
+        db_session=session,
+    )
+
+    result = await rag_service.retrieve_context(
+        query="question",
+        document_id="doc-1",
+        focus_context={"document_id": "doc-1", "start_char": 250, "end_char": 260},
+    )
+
+    assert [c.chunk_id for c in result.chunks] == ["c2", "c0"]
+    assert result.chunks[0].content == "chunk 2"
+    assert result.chunks[0].metadata["start_char"] == 200
+    vector_store.aquery.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_rag_hydrates_id_only_results_from_sqlite(session):
+    """Lazy hydration reads content and metadata of kept hits in one query."""
+    embedding_service = MagicMock()
+    embedding_service.embed_query = AsyncMock(return_value=[0.1] * 4)
+    results = MagicMock()
+    results.ids = ["c2", "gone", "c1", "c0"]
+    results.distances = [0.1, 0.2, 0.3, 0.9]  # c0 is below the threshold
+    results.documents = []
+    results.metadatas = []
+    vector_store = MagicMock()
+    vector_store.aquery = AsyncMock(return_value=results)
+    rag_service = RAGService(
+        embedding_service=embedding_service,
+        vector_store=vector_store,
+        deepseek_client=MagicMock(),
+        response_cache=MagicMock(),
+        document_summary_service=MagicMock(),
+        db_session=session,
+        lazy_hydration=True,
+    )
+
+    result = await rag_service.retrieve_context(query="question", document_id="doc-1")
+
+    assert vector_store.aquery.call_args.kwargs["include_content"] is False
+    assert [c.chunk_id for c in result.chunks] == ["c2", "c1"]
+    assert [c.content for c in result.chunks] == ["chunk 2", "chunk 1"]
+    assert result.chunks[1].metadata == {
+        "document_id": "doc-1",
+        "document_title": "doc.md",
+        "chunk_index": 1,
+        "token_count": 30,
+        "start_char": 100,
+        "end_char": 220,
+    }
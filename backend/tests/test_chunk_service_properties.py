@@ -4,6 +4,8 @@ Property-based tests for ChunkService using Hypothesis.
 **Validates: Requirements 4.2, 4.4, 4.7**
 """
 
+import asyncio
+
 import pytest
 from hypothesis import given, strategies as st, settings, HealthCheck, assume
 
@@ -122,3 +124,30 @@ class TestChunkServiceProperties:
 
         with pytest.raises(ChunkingError, match="empty"):
             service.chunk_document("   \n\n  ")
+
+    @given(text=markdown_text())
+    @settings(
+        suppress_health_check=[HealthCheck.too_slow], max_examples=10, deadline=2000
+    )
+    def test_streaming_chunkers_match_chunk_document(self, text):
+        """iter_chunks and aiter_chunks yield the same chunks as chunk_document."""
+        service = ChunkService()
+        assume(len(text.strip()) > 0)
+
+        async def collect():
+            return [chunk async for chunk in service.aiter_chunks(text, buffer_size=1)]
+
+        expected = service.chunk_document(text)
+
+        assert list(service.iter_chunks(text)) == expected
+        assert asyncio.run(collect()) == expected
+
+    def test_aiter_chunks_raises_for_empty_document(self):
+        """Errors raised in the chunking thread reach the consumer."""
+        service = ChunkService()
+
+        async def collect():
+            return [chunk async for chunk in service.aiter_chunks("  ")]
+
+        with pytest.raises(ChunkingError, match="empty"):
+            asyncio.run(collect())
@@ -181,3 +181,113 @@ class TestDocumentProcessorProperties:
         finally:
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
+
+    def test_pdf_conversion_uses_conversion_pool(self, tmp_path):
+        """With a ConversionPool, Docling runs in the pool, not in-process."""
+        from unittest.mock import AsyncMock, MagicMock
+
+        pool = MagicMock()
+        pool.convert = AsyncMock(return_value=("# Pooled\n\nBody", "Pooled"))
+        processor = DocumentProcessor(conversion_pool=pool)
+        pdf_path = tmp_path / "doc.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4")
+
+        import asyncio
+
+        result = asyncio.run(processor.process_file(str(pdf_path), "pdf"))
+
+        pool.convert.assert_awaited_once_with(str(pdf_path), None)
+        assert result.title == "Pooled"
+        assert processor._converter is None, "No in-process converter needed"
+
+    def test_conversion_timeout_raises_processing_error(self, tmp_path):
+        """A pool timeout surfaces as a user-facing ProcessingError."""
+        from unittest.mock import AsyncMock, MagicMock
+
+        from app.services.conversion_pool import ConversionTimeoutError
+        from app.services.document_processor import ProcessingError
+
+        pool = MagicMock()
+        pool.convert = AsyncMock(side_effect=ConversionTimeoutError("slow"))
+        processor = DocumentProcessor(conversion_pool=pool)
+        pdf_path = tmp_path / "slow.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4")
+
+        import asyncio
+
+        with pytest.raises(ProcessingError, match="too long"):
+            asyncio.run(processor.process_file(str(pdf_path), "pdf"))
+
+    def test_split_page_ranges(self):
+        """Page ranges are 1-based, inclusive and cover every page once."""
+        from app.services.document_processor import split_page_ranges
+
+        assert split_page_ranges(95, 40) == [(1, 40), (41, 80), (81, 95)]
+        assert split_page_ranges(40, 40) == [(1, 40)]
+
+    def test_large_pdf_converted_in_parallel_page_batches(self, tmp_path):
+        """Batches run concurrently and merge back in page order."""
+        import asyncio
+        from unittest.mock import MagicMock, patch
+
+        running = 0
+        peak = 0
+
+        async def convert(file_path, page_range):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            # Later batches finish first
+            await asyncio.sleep(0.01 * (10 - page_range[0] // 10))
+            running -= 1
+            title = "Manual" if page_range[0] == 1 else None
+            return f"pages {page_range[0]}-{page_range[1]}", title
+
+        pool = MagicMock()
+        pool.convert = convert
+        progress = []
+        processor = DocumentProcessor(
+            conversion_pool=pool,
+            enable_fast_path=False,
+            split_min_pages=50,
+            page_batch_size=20,
+        )
+        pdf_path = tmp_path / "manual.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4")
+
+        with patch("app.services.document_processor.count_pdf_pages", return_value=70):
+            result = asyncio.run(
+                processor.process_file(
+                    str(pdf_path),
+                    "pdf",
+                    on_progress=lambda done, total: progress.append((done, total)),
+                )
+            )
+
+        assert result.markdown == (
+            "pages 1-20\n\npages 21-40\n\npages 41-60\n\npages 61-70"
+        )
+        assert result.title == "Manual"
+        assert result.conversion["page_batches"] == 4
+        assert peak == 4
+        assert sorted(progress)[-1] == (70, 70)
+        assert len(progress) == 4
+
+    def test_small_pdf_is_not_split(self, tmp_path):
+        """PDFs below split_min_pages convert as a single job."""
+        import asyncio
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        pool = MagicMock()
+        pool.convert = AsyncMock(return_value=("# Short", "Short"))
+        processor = DocumentProcessor(
+            conversion_pool=pool, enable_fast_path=False, split_min_pages=50
+        )
+        pdf_path = tmp_path / "short.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4")
+
+        with patch("app.services.document_processor.count_pdf_pages", return_value=10):
+            result = asyncio.run(processor.process_file(str(pdf_path), "pdf"))
+
+        pool.convert.assert_awaited_once_with(str(pdf_path), None)
+        assert "page_batches" not in result.conversion
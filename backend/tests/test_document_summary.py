@@ -5,8 +5,17 @@ import numpy as np
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
 from hypothesis import given, strategies as st, settings, HealthCheck
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-from app.services.document_summary import DocumentSummaryService, DocumentSummary
+from app.core.database import Base
+from app.models import chat  # noqa: F401  (registers document_summaries)
+
+from app.services.document_summary import (
+    DocumentSummaryService,
+    DocumentSummary,
+    SummaryIndex,
+)
 
 
 # Unit Tests
@@ -392,3 +401,101 @@ async def test_property_summaries_stored_and_retrieved_correctly(summary_text):
     assert result.document_id == document_id
     assert result.summary_text == summary_text
     assert len(result.embedding) == 512
+
+
+# Summary Index Tests
+
+
+def _embedding_rows(vectors):
+    """Build (document_id, BLOB) rows as returned by the database."""
+    return [
+        (f"doc-{i}", np.array(v, dtype=np.float32).tobytes())
+        for i, v in enumerate(vectors)
+    ]
+
+
+def test_summary_index_top_k_orders_by_similarity():
+    """Test top_k returns documents by descending cosine similarity."""
+    index = SummaryIndex()
+    index.build(
+        ["doc-a", "doc-b", "doc-c"],
+        [
+            np.array([1.0, 0.0, 0.0]),
+            np.array([0.0, 1.0, 0.0]),
+            np.array([0.7, 0.7, 0.0]),
+        ],
+    )
+
+    assert index.top_k([1.0, 0.1, 0.0], 2) == ["doc-a", "doc-c"]
+    assert index.top_k([0.0, 5.0, 0.0], 10) == ["doc-b", "doc-c", "doc-a"]
+
+
+def test_summary_index_empty():
+    """Test an empty index selects nothing."""
+    index = SummaryIndex()
+    index.build([], [])
+
+    assert index.is_loaded
+    assert len(index) == 0
+    assert index.top_k([1.0, 0.0], 3) == []
+
+
+def test_summary_index_discards_stale_build():
+    """Test a build started before invalidation is discarded."""
+    index = SummaryIndex()
+    generation = index.generation
+    index.invalidate()
+
+    index.build(["doc-a"], [np.array([1.0, 0.0])], generation=generation)
+
+    assert not index.is_loaded
+
+
+@pytest.mark.asyncio
+async def test_get_summary_index_loads_once(
+    mock_deepseek_client, mock_embedding_service
+):
+    """Test the summary matrix is loaded from SQLite once and reused."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    insert = text(
+        "INSERT INTO document_summaries "
+        "(document_id, summary_text, summary_embedding, created_at) "
+        "VALUES (:id, 'Summary', :embedding, '2026-01-01T00:00:00')"
+    )
+    async with async_sessionmaker(engine)() as db:
+        for document_id, embedding in _embedding_rows([[1.0, 0.0], [0.0, 1.0]]):
+            await db.execute(insert, {"id": document_id, "embedding": embedding})
+        await db.commit()
+        service = DocumentSummaryService(
+            mock_deepseek_client, mock_embedding_service, db
+        )
+
+        first = await service.get_summary_index()
+        await db.execute(insert, {"id": "doc-2", "embedding": b"\0" * 8})
+        second = await service.get_summary_index()
+
+    await engine.dispose()
+    assert first is second
+    assert len(first) == 2
+    assert first.top_k([0.1, 0.9], 1) == ["doc-1"]
+
+
+@pytest.mark.asyncio
+async def test_store_summary_invalidates_shared_index(
+    mock_deepseek_client, mock_embedding_service, mock_db_session
+):
+    """Test writing a summary invalidates the index shared between services."""
+    shared_index = SummaryIndex()
+    shared_index.build(["doc-0"], [np.array([1.0, 0.0])])
+    service = DocumentSummaryService(
+        mock_deepseek_client,
+        mock_embedding_service,
+        mock_db_session,
+        summary_index=shared_index,
+    )
+
+    await service._store_summary("doc-1", "Summary", [0.0, 1.0])
+
+    assert not shared_index.is_loaded
@@ -321,6 +321,7 @@ Applications include image recognition, natural language processing, and recomme
         This test validates the complete RAG pipeline using mocked Voyage AI and DeepSeek services.
         """
         # Import services
+        from app.services.document_summary import SummaryIndex
         from app.services.rag_service import RAGService
         from app.services.response_cache import ResponseCache
 
@@ -366,7 +367,7 @@ Applications include image recognition, natural language processing, and recomme
                 "token_count": 20,
             },
         ]
-        mock_vector_store.query = MagicMock(return_value=mock_result)
+        mock_vector_store.aquery = AsyncMock(return_value=mock_result)
 
         # Create mock DeepSeek client with streaming
         mock_deepseek_client = MagicMock()
@@ -424,7 +425,9 @@ Applications include image recognition, natural language processing, and recomme
 
         # Create mock document summary service
         mock_doc_summary_service = MagicMock()
-        mock_doc_summary_service.get_all_summaries = AsyncMock(return_value=[])
+        mock_doc_summary_service.get_summary_index = AsyncMock(
+            return_value=SummaryIndex()
+        )
 
         # Create RAG service with mocked dependencies
         rag_service = RAGService(
@@ -503,6 +506,7 @@ Applications include image recognition, natural language processing, and recomme
 
         Validates that the system works correctly even without document summaries.
         """
+        from app.services.document_summary import SummaryIndex
         from app.services.rag_service import RAGService
         from app.services.response_cache import ResponseCache
 
@@ -519,7 +523,7 @@ Applications include image recognition, natural language processing, and recomme
         mock_result.metadatas = [
             {"document_id": "test_doc", "chunk_index": 0, "token_count": 10}
         ]
-        mock_vector_store.query = MagicMock(return_value=mock_result)
+        mock_vector_store.aquery = AsyncMock(return_value=mock_result)
 
         # Create mock DeepSeek client
         mock_deepseek_client = MagicMock()
@@ -543,8 +547,8 @@ Applications include image recognition, natural language processing, and recomme
 
         # Create mock document summary service that returns EMPTY summaries (fallback scenario)
         mock_doc_summary_service = MagicMock()
-        mock_doc_summary_service.get_all_summaries = AsyncMock(
-            return_value=[]
+        mock_doc_summary_service.get_summary_index = AsyncMock(
+            return_value=SummaryIndex()
         )  # No summaries available
 
         # Create RAG service
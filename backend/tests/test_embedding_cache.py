@@ -0,0 +1,157 @@
+"""
+Tests for the bounded embedding cache.
+
+Covers LRU eviction under the byte budget, hit/miss/eviction stats,
+and persistence through the SQLite disk tier, which is kept off the
+event loop.
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import EmbeddingService
+
+
+class MockEmbedResult:
+    """Mock result from Voyage AI embed call."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+
+def _vector(value, dimensions=4):
+    """float32 vector of one repeated value (16 bytes at 4 dimensions)."""
+    return np.full(dimensions, value, dtype=np.float32)
+
+
+class TestEmbeddingCache:
+    """Unit tests for EmbeddingCache."""
+
+    def test_stores_float32_vectors(self):
+        """Vectors are stored as float32 regardless of input type."""
+        cache = EmbeddingCache()
+        cache.put_many({"a": [0.1, 0.2, 0.3]})
+
+        found = cache.get_many(["a"])
+
+        assert found["a"].dtype == np.float32
+        assert found["a"].tolist() == np.float32([0.1, 0.2, 0.3]).tolist()
+
+    def test_evicts_least_recently_used_over_budget(self):
+        """The memory tier never exceeds max_bytes and evicts LRU first."""
+        cache = EmbeddingCache(max_bytes=48)  # room for three 16-byte vectors
+        cache.put_many({"a": _vector(1), "b": _vector(2), "c": _vector(3)})
+
+        cache.get_many(["a"])  # "b" becomes least recently used
+        cache.put_many({"d": _vector(4)})
+
+        assert set(cache.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"}
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["size_bytes"] <= 48
+
+    def test_stats_track_hits_and_misses(self):
+        """get_stats reports hits, misses and hit rate."""
+        cache = EmbeddingCache()
+        cache.put_many({"a": _vector(1)})
+
+        cache.get_many(["a", "missing"])
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["entries"] == 1
+
+    def test_persists_across_instances(self, tmp_path):
+        """Vectors written to disk are found by a new cache instance."""
+        path = str(tmp_path / "cache.db")
+        cache = EmbeddingCache(persist_path=path)
+        cache.put_many({"a": _vector(1)})
+        cache.close()
+
+        reopened = EmbeddingCache(persist_path=path)
+        found = reopened.get_many(["a"])
+
+        assert np.array_equal(found["a"], _vector(1))
+        assert reopened.get_stats()["disk_hits"] == 1
+        assert reopened.get_stats()["disk_entries"] == 1
+
+    def test_disk_evicted_memory_falls_back_to_disk(self, tmp_path):
+        """Entries evicted from memory are still served from disk."""
+        cache = EmbeddingCache(max_bytes=16, persist_path=str(tmp_path / "c.db"))
+        cache.put_many({"a": _vector(1)})
+        cache.put_many({"b": _vector(2)})
+
+        assert np.array_equal(cache.get_many(["a"])["a"], _vector(1))
+
+    def test_disk_tier_is_pruned(self, tmp_path):
+        """The disk tier is kept within max_disk_entries."""
+        cache = EmbeddingCache(persist_path=str(tmp_path / "c.db"), max_disk_entries=10)
+        for i in range(25):
+            cache.put_many({f"k{i}": _vector(i)})
+
+        assert cache.get_stats()["disk_entries"] <= 10
+
+    def test_clear_empties_both_tiers(self, tmp_path):
+        """clear() removes memory and disk entries."""
+        cache = EmbeddingCache(persist_path=str(tmp_path / "c.db"))
+        cache.put_many({"a": _vector(1)})
+
+        assert cache.clear() == 1
+        assert cache.get_many(["a"]) == {}
+
+
+def test_shared_cache_skips_api_after_restart(tmp_path):
+    """A new EmbeddingService reuses embeddings persisted by a previous one."""
+    path = str(tmp_path / "cache.db")
+    mock_result = MockEmbedResult(embeddings=[[0.5] * 8])
+
+    first = EmbeddingService(api_key="test_key", cache=EmbeddingCache(persist_path=path))
+    with patch.object(first._client, "embed", return_value=mock_result):
+        original = asyncio.run(first.embed_query("repeated query"))
+    first.shutdown()
+
+    second = EmbeddingService(
+        api_key="test_key", cache=EmbeddingCache(persist_path=path)
+    )
+    with patch.object(second._client, "embed") as mock_embed:
+        cached = asyncio.run(second.embed_query("repeated query"))
+
+    mock_embed.assert_not_called()
+    assert cached == original
+    second.shutdown()
+
+
+def test_disk_tier_runs_off_the_event_loop(tmp_path):
+    """With a disk tier, cache lookups and writes run in worker threads."""
+    cache = EmbeddingCache(persist_path=str(tmp_path / "cache.db"))
+    service = EmbeddingService(api_key="test_key", cache=cache)
+    threads = []
+
+    def record(method):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    async def embed():
+        loop_thread = threading.get_ident()
+        await service.embed_query("disk query")
+        return loop_thread
+
+    with patch.object(
+        service._client, "embed", return_value=MockEmbedResult([[0.5] * 8])
+    ), patch.object(cache, "get_many", record(cache.get_many)), patch.object(
+        cache, "put_many", record(cache.put_many)
+    ):
+        loop_thread = asyncio.run(embed())
+
+    assert len(threads) == 2
+    assert loop_thread not in threads
+    service.shutdown()
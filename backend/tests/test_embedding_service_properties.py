@@ -144,7 +144,7 @@ class TestEmbeddingServiceProperties:
 
         with patch.object(service._client, "embed") as mock_embed:
             # Mock returns appropriate number of embeddings based on batch size
-            def mock_embed_fn(texts, model, input_type):
+            def mock_embed_fn(texts, model, input_type, output_dimension):
                 return MockEmbedResult(embeddings=[[0.1] * 512 for _ in texts])
 
             mock_embed.side_effect = mock_embed_fn
@@ -158,23 +158,120 @@ class TestEmbeddingServiceProperties:
                 mock_embed.call_count == 2
             ), f"Expected 2 API calls for 200 texts, got {mock_embed.call_count}"
 
-            # First call should have 128 texts
-            first_call_args = mock_embed.call_args_list[0]
-            assert (
-                len(first_call_args[1]["texts"]) == 128
-            ), "First batch should have 128 texts"
-
-            # Second call should have 72 texts
-            second_call_args = mock_embed.call_args_list[1]
-            assert (
-                len(second_call_args[1]["texts"]) == 72
-            ), "Second batch should have 72 texts"
+            # Batches are dispatched concurrently, so compare sizes unordered
+            batch_sizes = sorted(
+                len(call[1]["texts"]) for call in mock_embed.call_args_list
+            )
+            assert batch_sizes == [72, 128], "Batches should have 128 and 72 texts"
 
             # Total result should have 200 embeddings
             assert len(result) == 200, f"Expected 200 embeddings, got {len(result)}"
 
         service.shutdown()
 
+    def test_concurrent_batches_preserve_order(self):
+        """Results come back in input order even when batches overlap."""
+        service = EmbeddingService(api_key="test_key", enable_cache=False)
+        texts = [f"Document {i}" for i in range(300)]
+
+        def mock_embed_fn(texts, model, input_type, output_dimension):
+            return MockEmbedResult(
+                embeddings=[[float(t.split()[1])] * 4 for t in texts]
+            )
+
+        with patch.object(service._client, "embed", side_effect=mock_embed_fn):
+            import asyncio
+
+            result = asyncio.run(service.embed_documents(texts))
+
+        assert [e[0] for e in result] == [float(i) for i in range(300)]
+        service.shutdown()
+
+    def test_rate_limit_reduces_concurrency(self):
+        """Rate-limit responses halve concurrency; successes restore it."""
+        service = EmbeddingService(api_key="test_key", enable_cache=False)
+        assert service._concurrency == service.MAX_CONCURRENT_BATCHES
+
+        service._record_rate_limit()
+        assert service._concurrency == service.MAX_CONCURRENT_BATCHES // 2
+
+        for _ in range(service.CONCURRENCY_RECOVERY_BATCHES):
+            service._record_batch_success()
+        assert service._concurrency == service.MAX_CONCURRENT_BATCHES // 2 + 1
+
+        service.shutdown()
+
+    def test_batches_respect_token_budget(self):
+        """Batches are packed up to the token budget using chunk token counts."""
+        service = EmbeddingService(
+            api_key="test_key", enable_cache=False, max_batch_tokens=1000
+        )
+        texts = [f"Chunk {i}" for i in range(10)]
+        token_counts = [400, 400, 400, 100, 100, 100, 100, 1500, 50, 50]
+
+        with patch.object(service._client, "embed") as mock_embed:
+            mock_embed.side_effect = lambda texts, model, input_type, **_: (
+                MockEmbedResult(embeddings=[[0.1] * 4 for _ in texts])
+            )
+            import asyncio
+
+            result = asyncio.run(service.embed_documents(texts, token_counts))
+
+        assert len(result) == 10
+        # 400+400 | 400+100*4 | 1500 (oversized, alone) | 50+50
+        assert sorted(
+            len(call[1]["texts"]) for call in mock_embed.call_args_list
+        ) == [1, 2, 2, 5]
+        stats = service.get_batch_stats()
+        assert stats["batches"] == 4
+        assert stats["tokens"] == sum(token_counts)
+        service.shutdown()
+
+    @given(
+        token_counts=st.lists(st.integers(min_value=1, max_value=1024), max_size=300)
+    )
+    @settings(max_examples=30, deadline=1000)
+    def test_pack_batches_covers_input_within_limits(self, token_counts):
+        """Packed batches are contiguous, ordered and within both limits."""
+        service = EmbeddingService(
+            api_key="test_key", enable_cache=False, max_batch_tokens=4096
+        )
+        texts = ["x"] * len(token_counts)
+
+        batches = service._pack_batches(texts, token_counts)
+
+        assert [i for start, end in batches for i in range(start, end)] == list(
+            range(len(texts))
+        )
+        for start, end in batches:
+            assert end - start <= service.max_batch_size
+            assert end - start == 1 or sum(token_counts[start:end]) <= 4096
+        service.shutdown()
+
+    def test_output_dimension_is_requested_and_keys_the_cache(self):
+        """Reduced output dimensions reach Voyage and get their own cache keys."""
+        full = EmbeddingService(api_key="test_key", enable_cache=False)
+        reduced = EmbeddingService(
+            api_key="test_key", enable_cache=False, dimensions=256
+        )
+        mock_result = MockEmbedResult(embeddings=[[0.1] * 256])
+
+        with patch.object(
+            reduced._client, "embed", return_value=mock_result
+        ) as mock_embed:
+            import asyncio
+
+            result = asyncio.run(reduced.embed_query("Test query"))
+
+        assert len(result) == 256
+        assert mock_embed.call_args[1]["output_dimension"] == 256
+        assert full.dimensions == EmbeddingService.DIMENSIONS
+        assert full._get_cache_key("text", "query") != reduced._get_cache_key(
+            "text", "query"
+        )
+        full.shutdown()
+        reduced.shutdown()
+
     def test_authentication_error_raises_immediately(self):
         """Authentication errors should not be retried."""
         service = EmbeddingService(api_key="test_key", enable_cache=False)
@@ -0,0 +1,166 @@
+"""
+Tests for the fast-path document converters.
+
+Covers DOCX and HTML extraction, the quality checks that escalate to
+Docling, and the tier/timing metadata recorded by DocumentProcessor.
+"""
+
+import asyncio
+import zipfile
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.document_processor import DocumentProcessor
+from app.services.fast_converters import convert_docx, convert_html, convert_file
+
+BODY = (
+    "Retrieval augmented generation grounds model answers in source "
+    "documents, which makes them easier to verify and keeps them current. "
+)
+
+
+def _paragraph(text, style=None, numbered=False):
+    """Build a WordprocessingML paragraph."""
+    props = ""
+    if style:
+        props += f'<w:pStyle w:val="{style}"/>'
+    if numbered:
+        props += '<w:numPr><w:ilvl w:val="0"/><w:numId w:val="1"/></w:numPr>'
+    ppr = f"<w:pPr>{props}</w:pPr>" if props else ""
+    return f"<w:p>{ppr}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _write_docx(path, body_xml):
+    """Write a minimal DOCX containing only word/document.xml."""
+    xml = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+        f'wordprocessingml/2006/main"><w:body>{body_xml}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+
+
+def test_docx_maps_headings_and_lists(tmp_path):
+    """Title/Heading styles and numbered paragraphs become markdown."""
+    path = tmp_path / "simple.docx"
+    _write_docx(
+        path,
+        _paragraph("Field Notes", style="Title")
+        + _paragraph("Background", style="Heading2")
+        + _paragraph(BODY * 2)
+        + _paragraph("First point", numbered=True),
+    )
+
+    result = convert_docx(str(path))
+
+    assert result.accepted, result.escalation_reason
+    assert result.tier == "docx_xml"
+    assert result.title == "Field Notes"
+    assert "## Background" in result.markdown
+    assert "- First point" in result.markdown
+
+
+def test_docx_with_table_escalates(tmp_path):
+    """Tables are left to Docling."""
+    path = tmp_path / "table.docx"
+    _write_docx(
+        path,
+        _paragraph(BODY * 2)
+        + "<w:tbl><w:tr><w:tc>"
+        + _paragraph("x")
+        + "</w:tc></w:tr></w:tbl>",
+    )
+
+    result = convert_docx(str(path))
+
+    assert not result.accepted
+    assert result.escalation_reason == "contains tables"
+
+
+def test_html_prefers_article_content():
+    """Navigation and footer boilerplate are dropped."""
+    html = (
+        "<html><head><title>Grounded Answers</title></head><body>"
+        "<nav><a href='/'>Home</a> <a href='/about'>About</a></nav>"
+        f"<article><h2>Why it works</h2><p>{BODY}</p><p>{BODY}</p>"
+        "<pre>print('hi')</pre></article>"
+        "<footer>Copyright</footer></body></html>"
+    )
+
+    result = convert_html(html)
+
+    assert result.accepted, result.escalation_reason
+    assert result.title == "Grounded Answers"
+    assert result.markdown.startswith("# Grounded Answers")
+    assert "## Why it works" in result.markdown
+    assert "```\nprint('hi')\n```" in result.markdown
+    assert "Home" not in result.markdown
+    assert "Copyright" not in result.markdown
+
+
+def test_html_with_table_escalates():
+    """Table-heavy pages go to Docling."""
+    html = f"<p>{BODY * 3}</p><table><tr><td>1</td></tr></table>"
+
+    assert convert_html(html).escalation_reason == "contains tables"
+
+
+def test_short_text_escalates():
+    """Too little text is not trusted."""
+    assert convert_html("<p>Loading...</p>").escalation_reason == "too little text"
+
+
+def test_unsupported_type_has_no_fast_path(tmp_path):
+    """Types without a fast converter return None."""
+    assert convert_file(str(tmp_path / "notes.txt"), "txt") is None
+
+
+def test_processor_records_fast_tier(tmp_path):
+    """An accepted fast conversion skips Docling and records its tier."""
+    pool = MagicMock()
+    pool.convert = AsyncMock()
+    path = tmp_path / "page.html"
+    path.write_text(f"<h1>Notes</h1><p>{BODY * 2}</p>", encoding="utf-8")
+
+    result = asyncio.run(
+        DocumentProcessor(conversion_pool=pool).process_file(str(path), "html")
+    )
+
+    pool.convert.assert_not_awaited()
+    assert result.title == "Notes"
+    assert result.conversion["tier"] == "html_readability"
+    assert "fast_path_ms" in result.conversion
+    assert "docling_ms" not in result.conversion
+
+
+def test_processor_escalates_to_docling(tmp_path):
+    """A rejected fast conversion falls back to Docling with its reason."""
+    pool = MagicMock()
+    pool.convert = AsyncMock(return_value=("# Table\n\n| a |", "Table"))
+    path = tmp_path / "table.html"
+    path.write_text(f"<p>{BODY * 3}</p><table></table>", encoding="utf-8")
+
+    result = asyncio.run(
+        DocumentProcessor(conversion_pool=pool).process_file(str(path), "html")
+    )
+
+    pool.convert.assert_awaited_once_with(str(path), None)
+    assert result.conversion["tier"] == "docling"
+    assert result.conversion["escalation_reason"] == "contains tables"
+    assert "docling_ms" in result.conversion
+
+
+def test_processor_fast_path_can_be_disabled(tmp_path):
+    """enable_fast_path=False always uses Docling."""
+    pool = MagicMock()
+    pool.convert = AsyncMock(return_value=("# Notes", "Notes"))
+    path = tmp_path / "page.html"
+    path.write_text(f"<h1>Notes</h1><p>{BODY * 2}</p>", encoding="utf-8")
+
+    processor = DocumentProcessor(conversion_pool=pool, enable_fast_path=False)
+    result = asyncio.run(processor.process_file(str(path), "html"))
+
+    pool.convert.assert_awaited_once()
+    assert result.conversion == {
+        "tier": "docling",
+        "docling_ms": result.conversion["docling_ms"],
+    }
@@ -7,6 +7,7 @@ Integration test for focus caret context in RAG queries.
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
+from app.services.document_summary import SummaryIndex
 from app.services.rag_service import RAGService
 from app.services.response_cache import ResponseCache
 
@@ -40,7 +41,7 @@ def mock_services():
             "token_count": 50,
         },
     ]
-    vector_store.query = MagicMock(return_value=mock_result)
+    vector_store.aquery = AsyncMock(return_value=mock_result)
 
     # Mock DeepSeek client
     deepseek_client = MagicMock()
@@ -64,7 +65,7 @@ def mock_services():
 
     # Mock document summary service
     doc_summary_service = MagicMock()
-    doc_summary_service.get_all_summaries = AsyncMock(return_value=[])
+    doc_summary_service.get_summary_index = AsyncMock(return_value=SummaryIndex())
 
     return {
         "embedding_service": embedding_service,
@@ -0,0 +1,383 @@
+"""
+Tests for the streaming ingestion pipeline.
+
+Uses mocked database, embedding service and vector store to verify
+batching, ordering, incremental writes and error propagation.
+"""
+
+import json
+
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.document import Chunk as ChunkRecord
+from app.models.document import Document
+from app.services.chunk_service import Chunk
+from app.services.ingestion_pipeline import IngestionPipeline, diff_chunks
+from app.services.task_manager import TaskManager
+
+
+def _chunks(count):
+    """Build sequential chunks."""
+    return [
+        Chunk(
+            index=i,
+            content=f"chunk {i}",
+            token_count=10,
+            start_char=i * 10,
+            end_char=i * 10 + 9,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def mock_db():
+    """Mock async database session."""
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    return db
+
+
+def _insert_calls(db):
+    """executemany INSERT calls (statement plus rows) on the mocked session."""
+    return [call for call in db.execute.call_args_list if len(call.args) == 2]
+
+
+def _inserted_rows(db):
+    """Chunk rows passed to executemany INSERTs on the mocked session."""
+    return [row for call in _insert_calls(db) for row in call.args[1]]
+
+
+@pytest.fixture
+def mock_embedding_service():
+    """Embedding service returning one vector per text."""
+    service = MagicMock()
+
+    async def embed(texts, token_counts=None):
+        return [[float(t.split()[1])] for t in texts]
+
+    service.embed_documents = AsyncMock(side_effect=embed)
+    service.max_batch_size = 4
+    service.MAX_CONCURRENT_BATCHES = 2
+    return service
+
+
+@pytest.fixture
+def task_manager():
+    """TaskManager with a registered task."""
+    manager = TaskManager()
+    manager.clear_all()
+    manager.create_task("task-1", "doc-1")
+    yield manager
+    manager.clear_all()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_writes_every_batch(
+    mock_db, mock_embedding_service, task_manager
+):
+    """Chunks are persisted, embedded and written in batches, in order."""
+    vector_store = MagicMock()
+    vector_store.aupsert = AsyncMock()
+    pipeline = IngestionPipeline(
+        db=mock_db,
+        task_manager=task_manager,
+        embedding_service=mock_embedding_service,
+        vector_store=vector_store,
+        batch_size=4,
+    )
+
+    result = await pipeline.run("task-1", "doc-1", iter(_chunks(10)), total_chunks=10)
+
+    assert result.chunk_count == 10
+    assert result.embedded_count == 10
+    assert result.batch_count == 3
+    assert len(_insert_calls(mock_db)) == 3  # One INSERT per batch
+    # Each batch commits its rows, then its vector_stored checkpoint
+    assert mock_db.execute.await_count == 6
+    assert mock_db.commit.await_count == 6
+    rows = _inserted_rows(mock_db)
+    assert [row["chunk_index"] for row in rows] == list(range(10))
+    assert json.loads(rows[1]["chunk_metadata"]) == {
+        "start_char": 10,
+        "end_char": 19,
+    }
+
+    written = [
+        meta["chunk_index"]
+        for call in vector_store.aupsert.call_args_list
+        for meta in call.kwargs["metadatas"]
+    ]
+    assert written == list(range(10))
+    embeddings = [
+        e[0]
+        for call in vector_store.aupsert.call_args_list
+        for e in call.kwargs["embeddings"]
+    ]
+    assert embeddings == [float(i) for i in range(10)]
+    ids = [
+        i for call in vector_store.aupsert.call_args_list for i in call.kwargs["ids"]
+    ]
+    assert ids == result.chunk_ids == [row["id"] for row in rows]
+
+    assert "10 of 10" in task_manager.get_task("task-1").progress
+
+
+@pytest.mark.asyncio
+async def test_pipeline_groups_queued_batches_per_embed_call(
+    mock_db, mock_embedding_service, task_manager
+):
+    """Queued batches share an embed call sized for concurrent requests."""
+    vector_store = MagicMock()
+    vector_store.aupsert = AsyncMock()
+    pipeline = IngestionPipeline(
+        db=mock_db,
+        task_manager=task_manager,
+        embedding_service=mock_embedding_service,
+        vector_store=vector_store,
+        batch_size=2,
+    )
+
+    result = await pipeline.run("task-1", "doc-1", _chunks(10))
+
+    calls = mock_embedding_service.embed_documents.call_args_list
+    assert max(len(call.args[0]) for call in calls) == 8  # 4 per request x 2
+    assert len(calls) < 5
+    # Writes stay one per pipeline batch, in chunk order
+    assert result.batch_count == 5
+    written = vector_store.aupsert.call_args_list
+    assert [len(call.kwargs["ids"]) for call in written] == [2] * 5
+    embeddings = [
+        e[0]
+        for call in vector_store.aupsert.call_args_list
+        for e in call.kwargs["embeddings"]
+    ]
+    assert embeddings == [float(i) for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_without_embedding_only_persists(mock_db, task_manager):
+    """Without an embedding service, chunks are only stored in SQLite."""
+    pipeline = IngestionPipeline(db=mock_db, task_manager=task_manager, batch_size=4)
+
+    result = await pipeline.run("task-1", "doc-1", _chunks(5))
+
+    assert result.chunk_count == 5
+    assert result.embedded_count == 0
+    assert len(_inserted_rows(mock_db)) == 5
+
+
+@pytest.mark.asyncio
+async def test_pipeline_accepts_async_chunk_stream(
+    mock_db, mock_embedding_service, task_manager
+):
+    """Chunks from an async iterator are batched like a list."""
+    vector_store = MagicMock()
+    vector_store.aupsert = AsyncMock()
+    pipeline = IngestionPipeline(
+        db=mock_db,
+        task_manager=task_manager,
+        embedding_service=mock_embedding_service,
+        vector_store=vector_store,
+        batch_size=4,
+    )
+
+    async def stream():
+        for chunk in _chunks(6):
+            yield chunk
+
+    result = await pipeline.run("task-1", "doc-1", stream())
+
+    assert result.chunk_count == 6
+    assert result.batch_count == 2
+    assert "6 chunks stored" in task_manager.get_task("task-1").progress
+
+
+@pytest.mark.asyncio
+async def test_pipeline_propagates_stage_errors(
+    mock_db, mock_embedding_service, task_manager
+):
+    """A failing vector write aborts the pipeline with the original error."""
+    vector_store = MagicMock()
+    vector_store.aupsert = AsyncMock(side_effect=RuntimeError("write failed"))
+    pipeline = IngestionPipeline(
+        db=mock_db,
+        task_manager=task_manager,
+        embedding_service=mock_embedding_service,
+        vector_store=vector_store,
+        batch_size=2,
+    )
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        await pipeline.run("task-1", "doc-1", _chunks(20))
+
+    # Bounded queues stop the producer from running far ahead of the writer
+    assert mock_db.commit.await_count < 10
+
+
+@pytest_asyncio.fixture
+async def session():
+    """Async session on a fresh in-memory database with one document."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        db.add(
+            Document(
+                id="doc-1",
+                filename="doc.md",
+                original_name="doc.md",
+                file_type="md",
+                upload_time="2026-01-01T00:00:00+00:00",
+            )
+        )
+        await db.commit()
+        yield db
+    await engine.dispose()
+
+
+def _texts_to_chunks(texts):
+    """Build chunks with sequential indices for the given contents."""
+    return [
+        Chunk(
+            index=i, content=t, token_count=2, start_char=i * 100, end_char=i * 100 + 50
+        )
+        for i, t in enumerate(texts)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reingest_embeds_only_changed_chunks(
+    session, mock_embedding_service, task_manager
+):
+    """Unchanged chunks keep rows and vectors; only new content is embedded."""
+    vector_store = MagicMock()
+    vector_store.aupsert = AsyncMock()
+    vector_store.adelete = AsyncMock()
+    vector_store.aupdate_metadatas = AsyncMock()
+    pipeline = IngestionPipeline(
+        db=session,
+        task_manager=task_manager,
+        embedding_service=mock_embedding_service,
+        vector_store=vector_store,
+    )
+    first = await pipeline.run(
+        "task-1", "doc-1", _texts_to_chunks(["chunk 0", "chunk 1", "chunk 2"])
+    )
+    kept_ids = {first.chunk_ids[0], first.chunk_ids[2]}
+    vector_store.aupsert.reset_mock()
+    mock_embedding_service.embed_documents.reset_mock()
+
+    # "chunk 1" removed, "chunk 9" inserted at the front, the rest shifted
+    result = await pipeline.reingest(
+        "task-1", "doc-1", _texts_to_chunks(["chunk 9", "chunk 0", "chunk 2"])
+    )
+
+    assert result.reused_count == 2
+    assert result.removed_count == 1
+    assert result.embedded_count == 1
+    mock_embedding_service.embed_documents.assert_awaited_once()
+    assert mock_embedding_service.embed_documents.call_args.args[0] == ["chunk 9"]
+    vector_store.adelete.assert_awaited_once_with([first.chunk_ids[1]])
+
+    updated = vector_store.aupdate_metadatas.call_args.kwargs
+    assert dict(zip(updated["ids"], updated["metadatas"])) == {
+        first.chunk_ids[0]: {
+            "document_id": "doc-1",
+            "chunk_index": 1,
+            "start_char": 100,
+            "end_char": 150,
+        }
+    }, "Only chunks whose index or offsets changed are updated"
+
+    rows = (
+        (
+            await session.execute(
+                select(ChunkRecord)
+                .where(ChunkRecord.document_id == "doc-1")
+                .order_by(ChunkRecord.chunk_index)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert [r.content for r in rows] == ["chunk 9", "chunk 0", "chunk 2"]
+    assert kept_ids <= {r.id for r in rows}
+    assert json.loads(rows[1].chunk_metadata) == {"start_char": 100, "end_char": 150}
+    assert (rows[1].start_char, rows[1].end_char) == (100, 150)
+
+
+@pytest.mark.asyncio
+async def test_reingest_resumes_from_last_stored_batch(
+    session, mock_embedding_service, task_manager
+):
+    """After a failed vector write only unstored batches are embedded again."""
+    vector_store = MagicMock()
+    vector_store.aupsert = AsyncMock(
+        side_effect=[None, RuntimeError("store unavailable")]
+    )
+    vector_store.adelete = AsyncMock()
+    vector_store.aupdate_metadatas = AsyncMock()
+    pipeline = IngestionPipeline(
+        db=session,
+        task_manager=task_manager,
+        embedding_service=mock_embedding_service,
+        vector_store=vector_store,
+        batch_size=2,
+    )
+    texts = [f"chunk {i}" for i in range(5)]
+
+    with pytest.raises(RuntimeError, match="store unavailable"):
+        await pipeline.run("task-1", "doc-1", _texts_to_chunks(texts))
+    await session.rollback()
+
+    rows = (
+        (await session.execute(select(ChunkRecord).order_by(ChunkRecord.chunk_index)))
+        .scalars()
+        .all()
+    )
+    assert [bool(r.vector_stored) for r in rows[:2]] == [True, True]
+    assert not any(r.vector_stored for r in rows[2:4])
+
+    vector_store.aupsert = AsyncMock()
+    mock_embedding_service.embed_documents.reset_mock()
+    result = await pipeline.reingest("task-1", "doc-1", _texts_to_chunks(texts))
+
+    embedded = [
+        text
+        for call in mock_embedding_service.embed_documents.call_args_list
+        for text in call.args[0]
+    ]
+    assert "chunk 0" not in embedded and "chunk 1" not in embedded
+    assert set(embedded) == set(texts[2:])
+    assert result.reused_count == 2
+    assert result.embedded_count == 3
+    vector_store.aupdate_metadatas.assert_not_awaited()
+
+    session.expire_all()
+    rows = (await session.execute(select(ChunkRecord))).scalars().all()
+    assert len(rows) == 5
+    assert all(r.vector_stored for r in rows)
+
+
+def test_diff_chunks_matches_repeated_content_in_order():
+    """Duplicate chunk contents each match one stored row."""
+    stored = [
+        ChunkRecord(id=f"r{i}", chunk_index=i, content=text)
+        for i, text in enumerate(["same", "same", "gone"])
+    ]
+
+    diff = diff_chunks(stored, _texts_to_chunks(["same", "new", "same"]))
+
+    assert [(row.id, chunk.index) for row, chunk in diff.kept] == [
+        ("r0", 0),
+        ("r1", 2),
+    ]
+    assert [c.content for c in diff.added] == ["new"]
+    assert [row.id for row in diff.removed] == ["r2"]
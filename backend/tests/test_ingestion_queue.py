@@ -0,0 +1,127 @@
+"""
+Tests for the prioritized ingestion worker queue.
+
+Verifies the concurrency cap, priority ordering and aging, queue
+positions and worker resilience to handler failures.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ingestion_queue import IngestionJob, IngestionQueue
+
+
+@pytest.mark.asyncio
+async def test_worker_count_caps_concurrency():
+    """No more than worker_count jobs run at the same time."""
+    running = 0
+    peak = 0
+
+    async def handler(job):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    queue = IngestionQueue(handler=handler, worker_count=2)
+    for i in range(6):
+        queue.submit(IngestionJob(task_id=f"t{i}", source="x", file_type="txt"))
+
+    await queue.join()
+    await queue.stop()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_small_text_files_run_before_large_pdfs():
+    """Waiting jobs are ordered by format tier, then size."""
+    order = []
+    release = asyncio.Event()
+
+    async def handler(job):
+        if job.task_id == "blocker":
+            await release.wait()
+        order.append(job.task_id)
+
+    queue = IngestionQueue(handler=handler, worker_count=1)
+    queue.submit(IngestionJob(task_id="blocker", source="x", file_type="txt"))
+    await asyncio.sleep(0)  # Let the worker pick up the blocker
+
+    queue.submit(
+        IngestionJob(task_id="big-pdf", source="x", file_type="pdf", file_size=9000)
+    )
+    queue.submit(
+        IngestionJob(task_id="small-pdf", source="x", file_type="pdf", file_size=10)
+    )
+    queue.submit(IngestionJob(task_id="url", source="x", file_type="url"))
+    queue.submit(
+        IngestionJob(task_id="notes", source="x", file_type="md", file_size=500)
+    )
+
+    assert queue.position("notes") == 1
+    assert queue.position("big-pdf") == 4
+    assert queue.position("blocker") is None
+    assert queue.get_stats() == {"pending": 4, "active": 1, "workers": 1}
+
+    release.set()
+    await queue.join()
+    await queue.stop()
+
+    assert order == ["blocker", "notes", "url", "small-pdf", "big-pdf"]
+
+
+def test_duplicates_sort_ahead_of_every_format():
+    """Jobs that clone an existing document skip the queue."""
+    clone = IngestionJob(
+        task_id="dup", source="x", file_type="pdf", file_size=9000, clone_from="d1"
+    )
+    text = IngestionJob(task_id="txt", source="x", file_type="txt", file_size=1)
+
+    assert clone.sort_key < text.sort_key
+
+
+def test_waiting_jobs_age_ahead_of_later_arrivals():
+    """A large PDF is only overtaken by jobs arriving within its delay."""
+    pdf = IngestionJob(
+        task_id="pdf",
+        source="x",
+        file_type="pdf",
+        file_size=50 * 1024 * 1024,
+        enqueued_at=100.0,
+    )
+    soon = IngestionJob(
+        task_id="soon", source="x", file_type="txt", file_size=1, enqueued_at=101.0
+    )
+    later = IngestionJob(
+        task_id="later",
+        source="x",
+        file_type="txt",
+        file_size=1,
+        enqueued_at=100.0 + IngestionJob.MAX_DELAY + 1,
+    )
+
+    assert soon.sort_key < pdf.sort_key
+    assert pdf.sort_key < later.sort_key, "Delay is capped at MAX_DELAY"
+
+
+@pytest.mark.asyncio
+async def test_handler_failure_does_not_stop_worker():
+    """A job that raises does not take its worker down."""
+    done = []
+
+    async def handler(job):
+        if job.task_id == "bad":
+            raise RuntimeError("boom")
+        done.append(job.task_id)
+
+    queue = IngestionQueue(handler=handler, worker_count=1)
+    queue.submit(IngestionJob(task_id="bad", source="x", file_type="txt"))
+    queue.submit(IngestionJob(task_id="good", source="x", file_type="txt"))
+
+    await queue.join()
+    await queue.stop()
+
+    assert done == ["good"]
@@ -0,0 +1,441 @@
+"""
+Tests for the in-process NumPy vector store.
+
+Covers flat top-k correctness, document filtering via row ranges,
+append-only persistence through the memory-mapped .npy and rows.jsonl,
+IVF recall, and quantized and reduced-dimension search with
+full-precision rescoring.
+"""
+
+import json
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services.vector_store import VectorStoreError, document_filter
+
+
+def _add_document(store, document_id, embeddings):
+    """Add one document's chunks to the store."""
+    store.add(
+        ids=[f"{document_id}_{i}" for i in range(len(embeddings))],
+        embeddings=[list(map(float, e)) for e in embeddings],
+        metadatas=[
+            {"document_id": document_id, "chunk_index": i}
+            for i in range(len(embeddings))
+        ],
+        documents=[f"{document_id} chunk {i}" for i in range(len(embeddings))],
+    )
+
+
+@pytest.fixture
+def vectors():
+    """Deterministic random 64-d embeddings."""
+    return np.random.default_rng(42).normal(size=(60, 64)).astype(np.float32)
+
+
+class TestNumpyVectorStore:
+    """Unit tests for NumpyVectorStore."""
+
+    def test_query_matches_brute_force(self, tmp_path, vectors):
+        """Top-k equals an exhaustive cosine ranking."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "doc", vectors)
+
+        query = vectors[7] + 0.1
+        result = store.query(embedding=query.tolist(), n_results=5)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        scores = normalized @ (query / np.linalg.norm(query))
+        expected = [f"doc_{i}" for i in np.argsort(-scores)[:5]]
+
+        assert result.ids == expected
+        assert result.distances == sorted(result.distances)
+        assert result.distances[0] == pytest.approx(1 - scores.max(), abs=1e-5)
+
+    def test_exact_match_is_top_result(self, tmp_path, vectors):
+        """Querying with a stored vector returns it with ~0 distance."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "doc", vectors)
+
+        result = store.query(embedding=vectors[3].tolist(), n_results=1)
+
+        assert result.ids == ["doc_3"]
+        assert result.documents == [""]  # Text is left to SQLite
+        assert result.distances[0] == pytest.approx(0.0, abs=1e-5)
+
+    def test_document_filters(self, tmp_path, vectors):
+        """Equality and $in filters restrict results to those documents."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:20])
+        _add_document(store, "b", vectors[20:40])
+        _add_document(store, "c", vectors[40:])
+
+        single = store.query(
+            embedding=vectors[0].tolist(), n_results=50, where=document_filter(["b"])
+        )
+        multi = store.query(
+            embedding=vectors[0].tolist(),
+            n_results=50,
+            where=document_filter(["a", "c"]),
+        )
+
+        assert {m["document_id"] for m in single.metadatas} == {"b"}
+        assert len(single.ids) == 20
+        assert {m["document_id"] for m in multi.metadatas} == {"a", "c"}
+        assert multi.ids[0] == "a_0"
+
+    def test_unknown_document_filter_returns_empty(self, tmp_path, vectors):
+        """Filtering on a missing document yields no results."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:5])
+
+        result = store.query(
+            embedding=vectors[0].tolist(), where={"document_id": "missing"}
+        )
+
+        assert result.ids == []
+
+    def test_delete_by_document(self, tmp_path, vectors):
+        """Deleting compacts rows and keeps other documents queryable."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:10])
+        _add_document(store, "b", vectors[10:20])
+
+        store.delete_by_document("a")
+
+        assert store.count() == 10
+        assert store.get_all_document_ids() == ["b"]
+        result = store.query(embedding=vectors[15].tolist(), n_results=1)
+        assert result.ids == ["b_5"]
+
+    def test_delete_and_update_by_id(self, tmp_path, vectors):
+        """Single chunks can be removed or re-labelled without re-adding."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:3])
+
+        store.delete(["a_1", "unknown"])
+        store.update_metadatas(["a_2"], [{"document_id": "a", "chunk_index": 1}])
+
+        reopened = NumpyVectorStore(persist_path=str(tmp_path))
+        result = reopened.get_document_vectors("a")
+        assert result.ids == ["a_0", "a_2"]
+        assert [m["chunk_index"] for m in result.metadatas] == [0, 1]
+        with pytest.raises(VectorStoreError):
+            reopened.update_metadatas(["a_1"], [{"document_id": "a"}])
+
+    def test_get_document_vectors(self, tmp_path, vectors):
+        """A document's vectors come back complete and in chunk order."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:5])
+        _add_document(store, "b", vectors[5:8])
+
+        result = store.get_document_vectors("b")
+
+        assert result.ids == ["b_0", "b_1", "b_2"]
+        assert [m["chunk_index"] for m in result.metadatas] == [0, 1, 2]
+        expected = vectors[5:8] / np.linalg.norm(vectors[5:8], axis=1, keepdims=True)
+        np.testing.assert_allclose(result.embeddings, expected, rtol=1e-5)
+        assert store.get_document_vectors("missing").ids == []
+
+    def test_query_without_content(self, tmp_path, vectors):
+        """include_content=False returns ids and distances only."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "doc", vectors[:10])
+
+        full = store.query(embedding=vectors[3].tolist(), n_results=3)
+        lean = store.query(
+            embedding=vectors[3].tolist(), n_results=3, include_content=False
+        )
+
+        assert lean.ids == full.ids
+        assert lean.distances == full.distances
+        assert lean.documents == [] and lean.metadatas == []
+        assert full.documents == ["", "", ""]  # Text is left to SQLite
+
+    def test_persistence_round_trip(self, tmp_path, vectors):
+        """A reopened store serves the same results from the mmap'd file."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:30])
+        _add_document(store, "b", vectors[30:])
+        before = store.query(embedding=vectors[12].tolist(), n_results=3)
+
+        reopened = NumpyVectorStore(persist_path=str(tmp_path))
+        after = reopened.query(embedding=vectors[12].tolist(), n_results=3)
+
+        assert isinstance(reopened._vectors, np.memmap)
+        assert reopened.count() == 60
+        assert reopened.get_all_document_ids() == ["a", "b"]
+        assert after.ids == before.ids
+
+        # Mutations after reopening still work
+        _add_document(reopened, "c", vectors[:2])
+        assert reopened.count() == 62
+
+    def test_adds_append_without_rewriting(self, tmp_path, vectors):
+        """Adds grow vectors.npy in place and only append to rows.jsonl."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:10])
+        inode = (tmp_path / "vectors.npy").stat().st_ino
+
+        with patch.object(store, "_rewrite", side_effect=AssertionError):
+            _add_document(store, "b", vectors[10:20])
+            store.update_metadatas(["a_0"], [{"document_id": "a", "chunk_index": 10}])
+
+        assert (tmp_path / "vectors.npy").stat().st_ino == inode
+        records = [
+            json.loads(line)
+            for line in (tmp_path / "rows.jsonl").read_text().splitlines()
+        ]
+        assert len(records) == 21
+        assert "a chunk" not in (tmp_path / "rows.jsonl").read_text()
+
+        reopened = NumpyVectorStore(persist_path=str(tmp_path))
+        assert reopened.count() == 20
+        assert reopened.get_document_vectors("a").ids[-1] == "a_0"
+        np.testing.assert_allclose(
+            reopened._vectors,
+            vectors[:20] / np.linalg.norm(vectors[:20], axis=1, keepdims=True),
+            rtol=1e-5,
+        )
+
+    def test_interrupted_append_is_dropped_on_load(self, tmp_path, vectors):
+        """Vectors without a complete rows.jsonl line are discarded."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:4])
+        # Crash after the vectors were written but mid-way through the log
+        store._append_vectors_in_place(4, vectors[4:6])
+        with open(tmp_path / "rows.jsonl", "a") as f:
+            f.write('{"id": "b_0", "meta')
+
+        reopened = NumpyVectorStore(persist_path=str(tmp_path))
+        assert reopened.count() == 4
+        assert len(np.load(tmp_path / "vectors.npy", mmap_mode="r")) == 4
+        _add_document(reopened, "c", vectors[6:8])
+
+        reopened = NumpyVectorStore(persist_path=str(tmp_path))
+        assert reopened.get_all_document_ids() == ["a", "c"]
+        assert reopened.query(embedding=vectors[7].tolist(), n_results=1).ids == [
+            "c_1"
+        ]
+
+    def test_legacy_index_is_migrated(self, tmp_path, vectors):
+        """An index.json sidecar is converted to rows.jsonl without text."""
+        normalized = vectors[:3] / np.linalg.norm(vectors[:3], axis=1, keepdims=True)
+        np.save(tmp_path / "vectors.npy", normalized.astype(np.float32))
+        (tmp_path / "index.json").write_text(
+            json.dumps(
+                {
+                    "ids": ["a_0", "a_1", "a_2"],
+                    "metadatas": [
+                        {"document_id": "a", "chunk_index": i} for i in range(3)
+                    ],
+                    "documents": ["x", "y", "z"],
+                }
+            )
+        )
+
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+
+        assert not (tmp_path / "index.json").exists()
+        assert store.get_document_vectors("a").ids == ["a_0", "a_1", "a_2"]
+        assert NumpyVectorStore(persist_path=str(tmp_path)).count() == 3
+
+    def test_dimension_mismatch_raises(self, tmp_path, vectors):
+        """Embeddings must match the stored dimensionality."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:2])
+
+        with pytest.raises(VectorStoreError):
+            _add_document(store, "b", np.ones((1, 32)))
+
+    def test_duplicate_ids_raise(self, tmp_path, vectors):
+        """Adding an existing id is rejected."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:2])
+
+        with pytest.raises(VectorStoreError):
+            _add_document(store, "a", vectors[2:4])
+
+    def test_unsupported_filter_raises(self, tmp_path, vectors):
+        """Only equality and $in filters are supported."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:2])
+
+        with pytest.raises(VectorStoreError):
+            store.query(
+                embedding=vectors[0].tolist(), where={"chunk_index": {"$gt": 0}}
+            )
+
+    def test_ivf_recall(self, tmp_path):
+        """IVF probing keeps high recall against the flat index."""
+        rng = np.random.default_rng(7)
+        centers = rng.normal(size=(20, 32))
+        data = np.repeat(centers, 50, axis=0) + 0.1 * rng.normal(size=(1000, 32))
+
+        flat = NumpyVectorStore(persist_path=str(tmp_path / "flat"))
+        ivf = NumpyVectorStore(
+            persist_path=str(tmp_path / "ivf"),
+            ivf_lists=20,
+            ivf_probes=4,
+            ivf_min_rows=100,
+        )
+        _add_document(flat, "doc", data)
+        _add_document(ivf, "doc", data)
+        ivf.wait_for_ivf()
+
+        hits = 0
+        queries = data[rng.choice(len(data), 20, replace=False)]
+        for query in queries:
+            expected = set(flat.query(embedding=query.tolist(), n_results=10).ids)
+            actual = set(ivf.query(embedding=query.tolist(), n_results=10).ids)
+            hits += len(expected & actual)
+
+        assert hits / 200 >= 0.9
+        assert ivf.get_stats()["ivf_lists"] == 20
+
+    def test_ivf_training_does_not_block_the_store(self, tmp_path):
+        """Queries and writes proceed with brute force while k-means runs."""
+        rng = np.random.default_rng(3)
+        data = rng.normal(size=(200, 16))
+        store = NumpyVectorStore(
+            persist_path=str(tmp_path / "ivf"), ivf_lists=8, ivf_min_rows=100
+        )
+        started = threading.Event()
+        release = threading.Event()
+        kmeans = store._kmeans
+
+        def slow_kmeans(vectors):
+            started.set()
+            release.wait(5)
+            return kmeans(vectors)
+
+        with patch.object(store, "_kmeans", side_effect=slow_kmeans):
+            _add_document(store, "doc", data)
+            assert started.wait(5), "Crossing ivf_min_rows starts training"
+
+            result = store.query(embedding=data[5].tolist(), n_results=1)
+            _add_document(store, "other", data[:10])
+
+            release.set()
+            store.wait_for_ivf()
+
+        assert result.ids == ["doc_5"]
+        assert store.get_stats()["ivf_lists"] == 8
+        assert len(store._assignments) == store.count() == 210
+
+    @pytest.mark.parametrize("quantization", ["float16", "int8"])
+    def test_quantized_search_rescores_at_full_precision(
+        self, tmp_path, vectors, quantization
+    ):
+        """Quantized shortlists keep recall and return exact distances."""
+        flat = NumpyVectorStore(persist_path=str(tmp_path / "flat"))
+        quantized = NumpyVectorStore(
+            persist_path=str(tmp_path / quantization), quantization=quantization
+        )
+        _add_document(flat, "a", vectors[:30])
+        _add_document(quantized, "a", vectors[:30])
+        _add_document(flat, "b", vectors[30:])
+        _add_document(quantized, "b", vectors[30:])
+
+        for query in vectors[:10] + 0.3:
+            expected = flat.query(embedding=query.tolist(), n_results=5)
+            actual = quantized.query(embedding=query.tolist(), n_results=5)
+            assert actual.ids == expected.ids
+            assert actual.distances == pytest.approx(expected.distances, abs=1e-6)
+
+        filtered = quantized.query(
+            embedding=vectors[40].tolist(), n_results=3, where={"document_id": "b"}
+        )
+        assert filtered.ids[0] == "b_10"
+        assert all(i.startswith("b_") for i in filtered.ids)
+
+        stats = quantized.get_stats()
+        bytes_per_value = {"float16": 2, "int8": 1}[quantization]
+        assert stats["full_precision_bytes"] == 60 * 64 * 4
+        assert stats["memory_bytes"] == 60 * (64 * bytes_per_value + 4)
+
+    def test_quantized_codes_survive_delete_and_reload(self, tmp_path, vectors):
+        """Codes follow compaction and are rebuilt from vectors.npy on load."""
+        store = NumpyVectorStore(persist_path=str(tmp_path), quantization="int8")
+        _add_document(store, "a", vectors[:5])
+        _add_document(store, "b", vectors[5:10])
+        store.delete_by_document("a")
+
+        reopened = NumpyVectorStore(persist_path=str(tmp_path), quantization="int8")
+
+        for instance in (store, reopened):
+            result = instance.query(embedding=vectors[7].tolist(), n_results=2)
+            assert result.ids[0] == "b_2"
+            assert instance.get_stats()["memory_bytes"] == 5 * (64 + 4)
+
+    @pytest.mark.parametrize("quantization", ["none", "int8"])
+    def test_reduced_dimension_search_rescores_full_vectors(
+        self, tmp_path, vectors, quantization
+    ):
+        """First pass on leading dims; returned distances use all dims."""
+        store = NumpyVectorStore(
+            persist_path=str(tmp_path),
+            quantization=quantization,
+            search_dimensions=32,
+            rescore_factor=3,
+        )
+        _add_document(store, "doc", vectors)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        for row in range(10):
+            result = store.query(embedding=vectors[row].tolist(), n_results=5)
+            assert result.ids[0] == f"doc_{row}"
+            assert result.distances == sorted(result.distances)
+            exact = [
+                1 - float(normalized[int(i.split("_")[1])] @ normalized[row])
+                for i in result.ids
+            ]
+            assert result.distances == pytest.approx(exact, abs=1e-5)
+
+        bytes_per_value = {"none": 4, "int8": 1}[quantization]
+        stats = store.get_stats()
+        assert stats["search_dimensions"] == 32
+        assert stats["memory_bytes"] == 60 * (32 * bytes_per_value + 4)
+
+    def test_upsert_replaces_existing_ids(self, tmp_path, vectors):
+        """Re-sending ids replaces their vectors instead of failing."""
+        store = NumpyVectorStore(persist_path=str(tmp_path), quantization="int8")
+        _add_document(store, "a", vectors[:5])
+
+        store.upsert(
+            ids=["a_1", "a_5"],
+            embeddings=[vectors[10].tolist(), vectors[11].tolist()],
+            metadatas=[
+                {"document_id": "a", "chunk_index": 1},
+                {"document_id": "a", "chunk_index": 5},
+            ],
+            documents=["a chunk 1", "a chunk 5"],
+        )
+
+        assert store.count() == 6
+        assert store.query(embedding=vectors[10].tolist(), n_results=1).ids == ["a_1"]
+        assert store.query(embedding=vectors[1].tolist(), n_results=1).ids != ["a_1"]
+        reopened = NumpyVectorStore(persist_path=str(tmp_path))
+        assert reopened.count() == 6
+
+    def test_unknown_quantization_raises(self, tmp_path):
+        """Only the supported quantization modes are accepted."""
+        with pytest.raises(VectorStoreError):
+            NumpyVectorStore(persist_path=str(tmp_path), quantization="int4")
+
+    @pytest.mark.asyncio
+    async def test_async_interface(self, tmp_path, vectors):
+        """Async wrappers delegate to the sync implementation."""
+        store = NumpyVectorStore(persist_path=str(tmp_path))
+        _add_document(store, "a", vectors[:5])
+
+        result = await store.aquery(embedding=vectors[1].tolist(), n_results=1)
+
+        assert result.ids == ["a_1"]
+        assert await store.acount() == 5
+        assert await store.ahealth_check() is True
+        assert await store.aget_all_document_ids() == ["a"]
@@ -40,8 +40,8 @@ def mock_vector_store():
         {"chunk_index": 2, "start_char": 200, "end_char": 300, "token_count": 50},
     ]
 
-    store.query = MagicMock(return_value=mock_results)
-    store.get_all_document_ids = AsyncMock(return_value=["doc-1", "doc-2"])
+    store.aquery = AsyncMock(return_value=mock_results)
+    store.aget_all_document_ids = AsyncMock(return_value=["doc-1", "doc-2"])
     return store
 
 
@@ -68,7 +68,7 @@ def mock_document_summary_service():
     service = MagicMock()
 
     # Mock summaries
-    from app.services.document_summary import DocumentSummary
+    from app.services.document_summary import DocumentSummary, SummaryIndex
 
     summaries = [
         DocumentSummary(
@@ -85,7 +85,12 @@ def mock_document_summary_service():
         ),
     ]
 
-    service.get_all_summaries = AsyncMock(return_value=summaries)
+    index = SummaryIndex()
+    index.build(
+        [s.document_id for s in summaries],
+        [np.array(s.embedding, dtype=np.float32) for s in summaries],
+    )
+    service.get_summary_index = AsyncMock(return_value=index)
     return service
 
 
@@ -131,7 +136,7 @@ async def test_retrieve_context_with_document_id(
     )
 
     # Verify vector store was queried
-    mock_vector_store.query.assert_called_once()
+    mock_vector_store.aquery.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -144,11 +149,13 @@ async def test_retrieve_context_multi_document(
     )
 
     # Verify document selection was called
-    mock_document_summary_service.get_all_summaries.assert_called_once()
+    mock_document_summary_service.get_summary_index.assert_awaited_once()
 
-    # Verify multiple documents were searched
+    # Verify all selected documents were searched in a single query
     assert len(result.selected_documents) > 0
-    assert mock_vector_store.query.call_count == len(result.selected_documents)
+    mock_vector_store.aquery.assert_awaited_once()
+    where = mock_vector_store.aquery.call_args.kwargs["where"]
+    assert where == {"document_id": {"$in": result.selected_documents}}
 
 
 @pytest.mark.asyncio
@@ -190,7 +197,7 @@ async def test_retrieve_context_filters_by_threshold(rag_service, mock_vector_st
         {"chunk_index": 0, "start_char": 0, "end_char": 100, "token_count": 50},
         {"chunk_index": 1, "start_char": 100, "end_char": 200, "token_count": 50},
     ]
-    mock_vector_store.query = MagicMock(return_value=mock_results)
+    mock_vector_store.aquery = AsyncMock(return_value=mock_results)
 
     result = await rag_service.retrieve_context(
         query="What is machine learning?", document_id="doc-1", n_results=5
@@ -215,7 +222,7 @@ async def test_retrieve_context_enforces_token_budget(rag_service, mock_vector_s
         {"chunk_index": 1, "start_char": 100, "end_char": 200, "token_count": 3000},
         {"chunk_index": 2, "start_char": 200, "end_char": 300, "token_count": 3000},
     ]
-    mock_vector_store.query = MagicMock(return_value=mock_results)
+    mock_vector_store.aquery = AsyncMock(return_value=mock_results)
 
     result = await rag_service.retrieve_context(
         query="What is machine learning?", document_id="doc-1", n_results=5
@@ -247,7 +254,11 @@ async def test_select_relevant_documents_fallback(
 ):
     """Test fallback when no summaries exist."""
     # Mock no summaries
-    mock_document_summary_service.get_all_summaries = AsyncMock(return_value=[])
+    from app.services.document_summary import SummaryIndex
+
+    mock_document_summary_service.get_summary_index = AsyncMock(
+        return_value=SummaryIndex()
+    )
 
     query_embedding = [0.1] * 512
 
@@ -329,21 +340,6 @@ def test_enforce_token_budget():
     assert result[0].chunk_id == "chunk-1"
 
 
-def test_cosine_similarity():
-    """Test cosine similarity calculation."""
-    service = RAGService(None, None, None, None, None)
-
-    vec1 = [1.0, 0.0, 0.0]
-    vec2 = [1.0, 0.0, 0.0]
-
-    similarity = service._cosine_similarity(vec1, vec2)
-    assert abs(similarity - 1.0) < 0.0001  # Should be 1.0 (identical vectors)
-
-    vec3 = [0.0, 1.0, 0.0]
-    similarity = service._cosine_similarity(vec1, vec3)
-    assert abs(similarity - 0.0) < 0.0001  # Should be 0.0 (orthogonal vectors)
-
-
 # Property-Based Tests
 
 
@@ -365,7 +361,7 @@ async def test_property_chunks_above_threshold(similarity_threshold):
         {"chunk_index": 0, "token_count": 50},
         {"chunk_index": 1, "token_count": 50},
     ]
-    mock_vector.query = MagicMock(return_value=mock_results)
+    mock_vector.aquery = AsyncMock(return_value=mock_results)
 
     mock_cache = MagicMock()
     mock_summary = MagicMock()
@@ -405,7 +401,7 @@ async def test_property_token_budget_respected(max_tokens):
         {"chunk_index": 1, "token_count": 3000},
         {"chunk_index": 2, "token_count": 3000},
     ]
-    mock_vector.query = MagicMock(return_value=mock_results)
+    mock_vector.aquery = AsyncMock(return_value=mock_results)
 
     mock_cache = MagicMock()
     mock_summary = MagicMock()
@@ -450,7 +446,7 @@ async def test_property_chunks_sorted_by_similarity(n_results):
     mock_results.metadatas = [
         {"chunk_index": i, "token_count": 50} for i in range(n_results)
     ]
-    mock_vector.query = MagicMock(return_value=mock_results)
+    mock_vector.aquery = AsyncMock(return_value=mock_results)
 
     mock_cache = MagicMock()
     mock_summary = MagicMock()
@@ -490,7 +486,7 @@ async def test_property_focus_boost_applied(focus_start):
     mock_results.metadatas = [
         {"chunk_index": 0, "start_char": 0, "end_char": 500, "token_count": 50}
     ]
-    mock_vector.query = MagicMock(return_value=mock_results)
+    mock_vector.aquery = AsyncMock(return_value=mock_results)
 
     mock_cache = MagicMock()
     mock_summary = MagicMock()
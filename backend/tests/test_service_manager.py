@@ -0,0 +1,181 @@
+"""
+Tests for the application-scoped ServiceManager.
+
+Verifies that shared services are created once, reused across calls,
+and released on shutdown.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.service_manager import ServiceManager, get_service_manager
+from app.services.numpy_vector_store import NumpyVectorStore
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """ServiceManager with configuration pointing at a temp directory."""
+    with patch("app.core.service_manager.settings") as mock_settings:
+        mock_settings.voyage_api_key = "test_voyage_key"
+        mock_settings.deepseek_api_key = "test_deepseek_key"
+        mock_settings.vector_store_backend = "chroma"
+        mock_settings.chroma_path = str(tmp_path / "chroma")
+        mock_settings.response_cache_max_size = 50
+        mock_settings.response_cache_ttl_seconds = 7200
+        mock_settings.vector_store_max_workers = 2
+        mock_settings.embedding_cache_max_mb = 1
+        mock_settings.embedding_cache_path = str(tmp_path / "embedding_cache.db")
+        mock_settings.embedding_cache_max_disk_entries = 100
+        mock_settings.embedding_max_batch_size = 64
+        mock_settings.embedding_max_batch_tokens = 5000
+        mock_settings.embedding_dimensions = 1024
+        mock_settings.vector_search_dimensions = 0
+        mock_settings.chroma_rescore_factor = 4
+        mock_settings.chroma_hnsw_m = 32
+        mock_settings.chroma_hnsw_construction_ef = 200
+        mock_settings.chroma_hnsw_search_ef = 64
+        mock_settings.conversion_workers = 3
+        mock_settings.conversion_timeout_seconds = 120
+        mock_settings.conversion_memory_limit_mb = 2048
+        mock_settings.conversion_max_jobs_per_worker = 0
+        yield ServiceManager()
+
+
+def test_get_service_manager_returns_global_instance():
+    """Dependency should always return the same container."""
+    assert get_service_manager() is get_service_manager()
+
+
+def test_services_are_shared(manager):
+    """Repeated lookups return the same instances."""
+    assert manager.get_embedding_service() is manager.get_embedding_service()
+    assert manager.get_vector_store() is manager.get_vector_store()
+    assert manager.get_deepseek_client() is manager.get_deepseek_client()
+    assert manager.get_response_cache() is manager.get_response_cache()
+
+
+def test_response_cache_uses_settings(manager):
+    """Response cache is sized from configuration."""
+    cache = manager.get_response_cache()
+    assert cache.max_size == 50
+    assert cache.ttl.total_seconds() == 7200
+
+
+def test_vector_store_backend_is_configurable(tmp_path):
+    """VECTOR_STORE_BACKEND selects the NumPy index."""
+    with patch("app.core.service_manager.settings") as mock_settings:
+        mock_settings.vector_store_backend = "numpy"
+        mock_settings.numpy_index_path = str(tmp_path / "numpy")
+        mock_settings.numpy_ivf_lists = 16
+        mock_settings.numpy_ivf_probes = 4
+        mock_settings.numpy_ivf_min_rows = 1000
+        mock_settings.numpy_quantization = "int8"
+        mock_settings.numpy_rescore_factor = 4
+        mock_settings.vector_search_dimensions = 256
+        store = ServiceManager().get_vector_store()
+
+    assert isinstance(store, NumpyVectorStore)
+    assert store.ivf_lists == 16
+    assert store.quantization == "int8"
+    assert store.search_dimensions == 256
+
+
+def test_chroma_hnsw_parameters_come_from_settings(manager):
+    """HNSW tuning settings reach the Chroma collection."""
+    store = manager.get_vector_store()
+
+    assert store.get_stats()["hnsw"] == {
+        "space": "cosine",
+        "M": 32,
+        "construction_ef": 200,
+        "search_ef": 64,
+    }
+
+
+def test_unknown_vector_store_backend(tmp_path):
+    """Unknown backends are rejected."""
+    with patch("app.core.service_manager.settings") as mock_settings:
+        mock_settings.vector_store_backend = "faiss"
+        with pytest.raises(ValueError):
+            ServiceManager().get_vector_store()
+
+
+def test_embedding_service_requires_api_key(tmp_path):
+    """Missing Voyage key surfaces as ValueError on first use."""
+    with patch("app.core.service_manager.settings") as mock_settings:
+        mock_settings.voyage_api_key = None
+        mock_settings.embedding_cache_max_mb = 1
+        mock_settings.embedding_cache_path = ""
+        mock_settings.embedding_cache_max_disk_entries = 100
+        mock_settings.embedding_max_batch_size = 64
+        mock_settings.embedding_max_batch_tokens = 5000
+        mock_settings.embedding_dimensions = 1024
+        manager = ServiceManager()
+        with pytest.raises(ValueError):
+            manager.get_embedding_service()
+
+
+def test_embedding_service_uses_configured_cache(manager, tmp_path):
+    """Embedding cache is sized and persisted from configuration."""
+    cache = manager.get_embedding_service().cache
+
+    assert cache.max_bytes == 1024 * 1024
+    assert cache.max_disk_entries == 100
+    assert (tmp_path / "embedding_cache.db").exists()
+
+
+def test_embedding_service_uses_configured_batch_limits(manager):
+    """Embedding batch limits come from configuration."""
+    service = manager.get_embedding_service()
+
+    assert service.max_batch_size == 64
+    assert service.max_batch_tokens == 5000
+
+
+def test_conversion_pool_uses_settings(manager):
+    """Conversion pool is shared and configured from settings."""
+    pool = manager.get_conversion_pool()
+
+    assert pool is manager.get_conversion_pool()
+    assert pool.workers == 3
+    assert pool.timeout_seconds == 120
+    assert pool.memory_limit_mb == 2048
+    assert pool.max_jobs_per_worker is None
+
+
+def test_conversion_pool_disabled_with_zero_workers():
+    """CONVERSION_WORKERS=0 keeps Docling in-process."""
+    with patch("app.core.service_manager.settings") as mock_settings:
+        mock_settings.conversion_workers = 0
+        assert ServiceManager().get_conversion_pool() is None
+
+
+@pytest.mark.asyncio
+async def test_shutdown_releases_services(manager):
+    """Shutdown stops the embedding executor and closes the DeepSeek client."""
+    embedding_service = manager.get_embedding_service()
+    deepseek_client = manager.get_deepseek_client()
+
+    with patch.object(embedding_service, "shutdown") as mock_shutdown, patch.object(
+        deepseek_client, "close", new=AsyncMock()
+    ) as mock_close:
+        await manager.shutdown()
+
+    mock_shutdown.assert_called_once()
+    mock_close.assert_awaited_once()
+
+    # New instances are created after shutdown
+    assert manager.get_embedding_service() is not embedding_service
+
+
+@pytest.mark.asyncio
+async def test_shutdown_tolerates_failures(manager):
+    """Errors while releasing one service do not prevent the others."""
+    embedding_service = manager.get_embedding_service()
+    deepseek_client = manager.get_deepseek_client()
+    embedding_service.shutdown = MagicMock(side_effect=RuntimeError("boom"))
+    deepseek_client.close = AsyncMock()
+
+    await manager.shutdown()
+
+    deepseek_client.close.assert_awaited_once()
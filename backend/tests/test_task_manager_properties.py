@@ -217,3 +217,16 @@ class TestTaskManagerProperties:
         assert (
             "chunk 5 of 10" in task.progress
         ), f"Progress should show chunk count, got: {task.progress}"
+
+    def test_conversion_progress_updates(self):
+        """Page-batch conversion progress should show pages done."""
+        manager = TaskManager()
+
+        task_id = "test_conversion"
+        manager.create_task(task_id, "test_doc")
+
+        manager.update_conversion_progress(task_id, 80, 400)
+
+        task = manager.get_task(task_id)
+        assert task.status == ProcessingStatus.CONVERTING
+        assert "page 80 of 400" in task.progress
@@ -0,0 +1,180 @@
+"""
+Tests for content-addressed upload deduplication.
+
+Uses an in-memory SQLite database and a mocked vector store to verify
+that duplicates are cloned instead of reprocessed, and that old
+databases gain the content_hash column.
+"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api import documents
+from app.core.database import Base, _add_missing_columns
+from app.models.document import Chunk, Document
+from app.services.vector_store import DocumentVectors
+
+
+@pytest_asyncio.fixture
+async def session():
+    """Async session on a fresh in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        yield db
+    await engine.dispose()
+
+
+def _document(doc_id, status="complete", markdown="# Report\n\nBody"):
+    """Build a document row sharing one content hash."""
+    return Document(
+        id=doc_id,
+        filename="abc.pdf",
+        original_name="report.pdf",
+        file_type="pdf",
+        content_hash="abc",
+        upload_time="2026-01-01T00:00:00+00:00",
+        processing_status=status,
+        markdown_content=markdown,
+        doc_metadata=json.dumps({"title": "Report"}),
+    )
+
+
+async def _seed_source(db):
+    """Add a completed source document with two chunks."""
+    db.add(_document("src"))
+    db.add(_document("new", status="pending", markdown=None))
+    for i in range(2):
+        db.add(
+            Chunk(
+                id=f"c{i}",
+                document_id="src",
+                chunk_index=i,
+                content=f"chunk {i}",
+                token_count=2,
+            )
+        )
+    await db.commit()
+
+
+@pytest.fixture
+def vector_store():
+    """Vector store holding the source document's vectors."""
+    store = MagicMock()
+    store.aget_document_vectors = AsyncMock(
+        return_value=DocumentVectors(
+            ids=["c0", "c1"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0]],
+            metadatas=[
+                {"document_id": "src", "chunk_index": 0},
+                {"document_id": "src", "chunk_index": 1},
+            ],
+            documents=["chunk 0", "chunk 1"],
+        )
+    )
+    store.aupsert = AsyncMock()
+    return store
+
+
+@pytest.mark.asyncio
+async def test_clone_copies_markdown_chunks_and_vectors(session, vector_store):
+    """A duplicate gets its own chunk rows and vectors without re-embedding."""
+    await _seed_source(session)
+
+    with patch.object(documents.settings, "voyage_api_key", "key"), patch.object(
+        documents.service_manager, "get_vector_store", return_value=vector_store
+    ):
+        cloned = await documents._clone_document("new", "src", session)
+
+    assert cloned
+    doc = (
+        await session.execute(select(Document).where(Document.id == "new"))
+    ).scalar_one()
+    assert doc.processing_status == "complete"
+    assert doc.markdown_content == "# Report\n\nBody"
+    assert json.loads(doc.doc_metadata) == {"title": "Report", "duplicate_of": "src"}
+
+    chunks = (
+        (await session.execute(select(Chunk).where(Chunk.document_id == "new")))
+        .scalars()
+        .all()
+    )
+    assert sorted(c.content for c in chunks) == ["chunk 0", "chunk 1"]
+    assert not {c.id for c in chunks} & {"c0", "c1"}
+    assert all(c.vector_stored for c in chunks)
+
+    written = vector_store.aupsert.call_args.kwargs
+    assert set(written["ids"]) == {c.id for c in chunks}
+    assert written["embeddings"] == [[1.0, 0.0], [0.0, 1.0]]
+    assert all(m["document_id"] == "new" for m in written["metadatas"])
+
+
+@pytest.mark.asyncio
+async def test_clone_falls_back_when_vectors_are_missing(session, vector_store):
+    """An incomplete source is not cloned, so the upload is reprocessed."""
+    await _seed_source(session)
+    vector_store.aget_document_vectors.return_value = DocumentVectors(
+        ids=["c0"], embeddings=[[1.0, 0.0]], metadatas=[{}], documents=["chunk 0"]
+    )
+
+    with patch.object(documents.settings, "voyage_api_key", "key"), patch.object(
+        documents.service_manager, "get_vector_store", return_value=vector_store
+    ):
+        cloned = await documents._clone_document("new", "src", session)
+
+    assert not cloned
+    vector_store.aupsert.assert_not_awaited()
+    count = await session.execute(select(Chunk).where(Chunk.document_id == "new"))
+    assert count.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_failed_clone_leaves_no_vector_checkpoints(session, vector_store):
+    """A clone whose vector write fails commits no chunks marked as stored."""
+    await _seed_source(session)
+    vector_store.aupsert.side_effect = RuntimeError("store unavailable")
+
+    with patch.object(documents.settings, "voyage_api_key", "key"), patch.object(
+        documents.service_manager, "get_vector_store", return_value=vector_store
+    ):
+        with pytest.raises(RuntimeError):
+            await documents._clone_document("new", "src", session)
+    await documents._handle_processing_error("new", "Database error.", session)
+
+    doc = (
+        await session.execute(select(Document).where(Document.id == "new"))
+    ).scalar_one()
+    assert doc.processing_status == "error"
+    stored = await session.execute(
+        select(Chunk).where(Chunk.document_id == "new", Chunk.vector_stored)
+    )
+    assert stored.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_missing_columns_are_added_to_existing_tables():
+    """Databases created before content_hash existed are migrated."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE documents (id VARCHAR(36) PRIMARY KEY, "
+                "filename VARCHAR(255) NOT NULL)"
+            )
+        )
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        columns = await conn.execute(text("PRAGMA table_info(documents)"))
+        indexes = await conn.execute(text("PRAGMA index_list(documents)"))
+        column_names = {row[1] for row in columns}
+        index_names = {row[1] for row in indexes}
+    await engine.dispose()
+
+    assert {"content_hash", "processing_status"} <= column_names
+    assert "ix_documents_content_hash" in index_names
@@ -0,0 +1,90 @@
+"""
+Tests for streamed upload handling.
+
+Verifies the Content-Length check before the body is read, chunked
+writes with on-the-fly hashing, the size abort and content sniffing.
+"""
+
+import hashlib
+import io
+
+import httpx
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.api import documents
+from main import app
+
+
+@pytest.mark.asyncio
+async def test_declared_oversized_upload_is_rejected_before_parsing(monkeypatch):
+    """A Content-Length over the limit gets 413 before any body is read."""
+    monkeypatch.setattr(documents, "MAX_FILE_SIZE", 10)
+    content = b"x" * (documents.MULTIPART_OVERHEAD + 100)
+    body_read = []
+
+    async def recording_app(scope, receive, send):
+        async def recording_receive():
+            message = await receive()
+            body_read.append(message.get("body", b""))
+            return message
+
+        await app(scope, recording_receive, send)
+
+    transport = httpx.ASGITransport(app=recording_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/documents/upload", files={"file": ("a.txt", content)}
+        )
+
+    assert response.status_code == 413
+    assert response.json()["detail"]["error"] == "File too large"
+    assert not any(body_read)
+
+
+@pytest.mark.asyncio
+async def test_upload_is_streamed_and_hashed(tmp_path, monkeypatch):
+    """Content is written in chunks and hashed as it arrives."""
+    monkeypatch.setattr(documents, "UPLOAD_CHUNK_SIZE", 4)
+    content = b"%PDF-1.7 some bytes"
+    target = tmp_path / "upload.part"
+
+    size, digest, head = await documents._receive_upload(
+        UploadFile(io.BytesIO(content), filename="a.pdf"), str(target)
+    )
+
+    assert size == len(content)
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert head == b"%PDF"
+    assert target.read_bytes() == content
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_aborts_early(tmp_path, monkeypatch):
+    """Exceeding the limit raises 413 and removes the partial file."""
+    monkeypatch.setattr(documents, "UPLOAD_CHUNK_SIZE", 4)
+    monkeypatch.setattr(documents, "MAX_FILE_SIZE", 10)
+    upload = UploadFile(io.BytesIO(b"x" * 100), filename="a.txt")
+    target = tmp_path / "upload.part"
+
+    with pytest.raises(HTTPException) as exc_info:
+        await documents._receive_upload(upload, str(target))
+
+    assert exc_info.value.status_code == 413
+    assert not target.exists()
+    assert upload.file.tell() == 12, "Stops reading once over the limit"
+
+
+@pytest.mark.parametrize(
+    "head,expected",
+    [
+        (b"%PDF-1.4\n", "pdf"),
+        (b"PK\x03\x04\x14\x00", "docx"),
+        (b"# Notes\n", "text"),
+        (b"", "text"),
+        (b"\x89PNG\r\n\x1a\n\x00", "binary"),
+    ],
+)
+def test_sniff_file_type(head, expected):
+    """Magic bytes identify binary formats."""
+    assert documents._sniff_file_type(head) == expected
@@ -10,12 +10,19 @@ Based on research:
 - Focus on testing properties, not specific values
 """
 
+import asyncio
 import tempfile
 import shutil
 import pytest
 from hypothesis import given, strategies as st, settings
+from unittest.mock import patch
 
-from app.services.vector_store import ChromaVectorStore
+from app.services.vector_store import (
+    ChromaVectorStore,
+    VectorStoreError,
+    document_filter,
+    truncate_embeddings,
+)
 
 
 class TestVectorStoreProperties:
@@ -148,3 +155,192 @@ class TestVectorStoreProperties:
         )
 
         assert store.count() == initial_count + 3
+
+    def test_multi_document_query_merges_top_k(self, tmp_path):
+        """A single $in query returns the global top-k across documents."""
+        store = ChromaVectorStore(persist_path=str(tmp_path))
+
+        ids, embeddings, metadatas = [], [], []
+        for doc_index, doc_id in enumerate(["doc_a", "doc_b", "doc_c"]):
+            for chunk_index in range(3):
+                emb = [0.0] * 16
+                emb[doc_index * 3 + chunk_index] = 1.0
+                emb[15] = 0.5  # Shared component so every vector is comparable
+                ids.append(f"{doc_id}_{chunk_index}")
+                embeddings.append(emb)
+                metadatas.append({"document_id": doc_id, "chunk_index": chunk_index})
+        store.add(
+            ids=ids,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            documents=[f"content {i}" for i in ids],
+        )
+
+        result = store.query(
+            embedding=embeddings[4],  # doc_b, chunk 1
+            n_results=4,
+            where=document_filter(["doc_a", "doc_b"]),
+        )
+
+        assert len(result.ids) == 4
+        assert result.ids[0] == "doc_b_1"
+        assert {m["document_id"] for m in result.metadatas} <= {"doc_a", "doc_b"}
+        assert result.distances == sorted(result.distances)
+
+    def test_two_stage_query_rescores_at_full_dimension(self, tmp_path):
+        """Reduced-dimension shortlists are reranked on the full vectors."""
+        store = ChromaVectorStore(
+            persist_path=str(tmp_path), search_dimensions=4, rescore_factor=3
+        )
+        # Identical leading components; only the tail separates a_0 and a_1
+        embeddings = [
+            [1.0, 0.0, 0.0, 0.0, 1.0, 0.0],
+            [1.0, 0.0, 0.0, 0.0, 0.0, 1.0],
+            [0.0, 1.0, 0.0, 0.0, 0.0, 0.0],
+        ]
+        store.add(
+            ids=["a_0", "a_1", "b_0"],
+            embeddings=embeddings,
+            metadatas=[
+                {"document_id": "a", "chunk_index": 0},
+                {"document_id": "a", "chunk_index": 1},
+                {"document_id": "b", "chunk_index": 0},
+            ],
+            documents=["first", "second", "third"],
+        )
+
+        result = store.query(embedding=embeddings[1], n_results=2)
+        assert result.ids == ["a_1", "a_0"]
+        assert result.distances[0] == pytest.approx(0.0, abs=1e-5)
+        assert result.distances[1] == pytest.approx(0.5, abs=1e-5)
+        assert result.documents == ["second", "first"]
+
+        store.delete_by_document("a")
+        assert store.query(embedding=embeddings[1], n_results=2).ids == ["b_0"]
+
+    def test_reduced_collection_is_backfilled(self, tmp_path):
+        """Enabling search_dimensions on an existing store backfills it."""
+        store = ChromaVectorStore(persist_path=str(tmp_path))
+        store.add(
+            ids=["a_0", "a_1"],
+            embeddings=[[1.0, 0.0, 1.0], [0.0, 1.0, 1.0]],
+            metadatas=[{"document_id": "a", "chunk_index": i} for i in range(2)],
+            documents=["first", "second"],
+        )
+
+        reopened = ChromaVectorStore(persist_path=str(tmp_path), search_dimensions=2)
+        assert reopened._search_collection.count() == 2
+        assert reopened.query(embedding=[0.0, 1.0, 1.0], n_results=1).ids == ["a_1"]
+
+    def test_search_ef_is_applied_to_existing_collection(self, tmp_path):
+        """Reopening with a new hnsw_search_ef updates the stored collection."""
+        ChromaVectorStore(persist_path=str(tmp_path), hnsw_search_ef=10)
+
+        reopened = ChromaVectorStore(persist_path=str(tmp_path), hnsw_search_ef=80)
+        assert reopened.get_stats()["hnsw"]["search_ef"] == 80
+        assert reopened.get_stats()["hnsw"]["space"] == "cosine"
+
+        collection = reopened._client.get_collection(ChromaVectorStore.COLLECTION_NAME)
+        assert collection.configuration_json["hnsw"]["ef_search"] == 80
+
+    def test_hnsw_defaults_are_left_to_chroma(self, tmp_path):
+        """Unset HNSW parameters are not written to the collection."""
+        store = ChromaVectorStore(persist_path=str(tmp_path))
+        assert store._collection.metadata == {"hnsw:space": "cosine"}
+
+    def test_upsert_is_batched_and_idempotent(self, tmp_path):
+        """Upserts split to max_batch_size and can be replayed safely."""
+        store = ChromaVectorStore(persist_path=str(tmp_path))
+        store.max_batch_size = 2
+        ids = [f"c_{i}" for i in range(5)]
+        embeddings = [[float(i == j) for j in range(5)] for i in range(5)]
+        metadatas = [{"document_id": "doc", "chunk_index": i} for i in range(5)]
+        documents = [f"chunk {i}" for i in range(5)]
+
+        with patch.object(
+            store, "_upsert_batch", wraps=store._upsert_batch
+        ) as upsert_batch:
+            store.upsert(ids, embeddings, metadatas, documents)
+        assert [len(call.args[0]) for call in upsert_batch.call_args_list] == [
+            2,
+            2,
+            1,
+        ]
+
+        # Replaying after a partial failure neither duplicates nor raises
+        store.upsert(ids, embeddings, metadatas, documents)
+        assert store.count() == 5
+        assert store.query(embedding=embeddings[3], n_results=1).ids == ["c_3"]
+
+    @pytest.mark.asyncio
+    async def test_async_methods_run_on_bounded_executor(self, tmp_path):
+        """Async variants go through the dedicated executor and are tracked."""
+        store = ChromaVectorStore(persist_path=str(tmp_path), max_workers=2)
+        try:
+            embeddings = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+            await store.aadd(
+                ids=["a_0", "b_0"],
+                embeddings=embeddings,
+                metadatas=[
+                    {"document_id": "doc_a", "chunk_index": 0},
+                    {"document_id": "doc_b", "chunk_index": 0},
+                ],
+                documents=["alpha", "beta"],
+            )
+
+            results = await asyncio.gather(
+                *[store.aquery(embedding=embeddings[1], n_results=1) for _ in range(5)]
+            )
+            assert all(r.ids == ["b_0"] for r in results)
+            assert await store.acount() == 2
+            assert await store.aget_all_document_ids() == ["doc_a", "doc_b"]
+
+            await store.adelete_by_document("doc_a")
+            assert await store.aget_all_document_ids() == ["doc_b"]
+
+            stats = store.get_stats()
+            assert stats["max_workers"] == 2
+            assert stats["queued"] == 0
+            assert stats["active"] == 0
+            assert stats["completed"] == 10
+            assert stats["max_queue_depth"] >= 1
+        finally:
+            store.close()
+
+    @pytest.mark.asyncio
+    async def test_async_errors_are_counted(self, tmp_path):
+        """Failed backend calls propagate VectorStoreError and are counted."""
+        store = ChromaVectorStore(persist_path=str(tmp_path))
+        try:
+            with pytest.raises(VectorStoreError):
+                await store.aadd(
+                    ids=["x"], embeddings=[], metadatas=[{}], documents=["x"]
+                )
+            assert store.get_stats()["failed"] == 1
+        finally:
+            store.close()
+
+
+class TestDocumentFilter:
+    """Tests for the document_filter helper."""
+
+    def test_empty_returns_none(self):
+        assert document_filter([]) is None
+
+    def test_single_document_uses_equality(self):
+        assert document_filter(["doc-1"]) == {"document_id": "doc-1"}
+
+    def test_multiple_documents_use_in(self):
+        assert document_filter(["doc-1", "doc-2", "doc-1"]) == {
+            "document_id": {"$in": ["doc-1", "doc-2"]}
+        }
+
+
+class TestTruncateEmbeddings:
+    """Tests for the truncate_embeddings helper."""
+
+    def test_keeps_leading_dimensions_normalized(self):
+        reduced = truncate_embeddings([[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]], 2)
+        assert reduced.shape == (2, 2)
+        assert reduced[0].tolist() == pytest.approx([0.6, 0.8])
+        assert reduced[1].tolist() == [0.0, 0.0]
@@ -150,6 +150,40 @@ export async function ingestUrl(url: string): Promise<UploadResponse> {
   }
 }
 
+export async function reingestDocument(
+  id: string,
+  file?: File,
+): Promise<UploadResponse> {
+  try {
+    const formData = new FormData();
+    if (file) {
+      formData.append("file", file);
+    }
+
+    const response = await fetch(
+      `${API_BASE_URL}/api/documents/${id}/reingest`,
+      {
+        method: "POST",
+        body: formData,
+      },
+    );
+
+    return handleResponse<UploadResponse>(response);
+  } catch (err) {
+    if (err instanceof ApiError) {
+      throw new ApiError(
+        mapUploadError(err.message),
+        err.statusCode,
+        err.details,
+      );
+    }
+    if (err instanceof Error) {
+      throw new Error(mapNetworkError(err));
+    }
+    throw err;
+  }
+}
+
 // ============================================================================
 // Status Polling
 // ============================================================================
@@ -33,6 +33,7 @@ export interface TaskStatusResponse {
   error: string | null;
   created_at: string;
   updated_at: string;
+  queue_position?: number | null;
 }
 
 export interface DocumentMetadata {